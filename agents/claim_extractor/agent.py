@@ -1,50 +1,82 @@
-from transformers import pipeline as hf_pipeline
 from pydantic import PrivateAttr
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 
+from agents.claim_extractor.chunking import pack_sentences, rank_sentences, select_top_sentences, split_sentences
+from core.config import env_int, env_str
+from core.inference import load_summarizer as load_summarizer_backend
+from core.metrics import ARTICLE_CHUNKS, instrumented
 from schemas.messages import Claim
 
+EXTRACTION_MODES = ("abstractive", "extractive")
+
+
+def load_summarizer():
+    """Loads the BART summarization pipeline used for claim extraction."""
+    print("[ClaimExtractorAgent] Loading summarization model...")
+    # The backend (stock PyTorch, int8, ONNX Runtime) is chosen by FACTOS_SUMMARIZER_BACKEND.
+    summarizer = load_summarizer_backend()
+    print("[ClaimExtractorAgent] Model loaded.")
+    return summarizer
+
 
 class ClaimExtractorAgent:
+    """
+    Extracts claims with BART summarization.
+
+    In 'abstractive' mode the whole article is split on sentence boundaries
+    into chunks that fit the summarizer's input window and every chunk is
+    summarized. In the faster 'extractive' mode sentences are first ranked by
+    centrality with the MiniLM embedding model and only the top segments
+    (`FACTOS_EXTRACTIVE_TOKENS` tokens each, `FACTOS_EXTRACTIVE_SEGMENTS`
+    of them) are summarized.
+    """
     _summarizer = PrivateAttr()
+    _embedding_model = PrivateAttr()
 
-    def __init__(self, **kwargs):
+    def __init__(self, summarizer=None, embedding_model=None, mode: Optional[str] = None, **kwargs):
         super().__init__(**kwargs)
         print("[ClaimExtractorAgent] Initializing...")
-        print("[ClaimExtractorAgent] Loading summarization model...")
-        self._summarizer = hf_pipeline(
-            "summarization",
-            model="facebook/bart-large-cnn",
-            device_map="auto"
-        )
-        print("[ClaimExtractorAgent] Model loaded.")
+        # A shared summarizer can be injected so the model is loaded only once per process.
+        self._summarizer = summarizer if summarizer is not None else load_summarizer()
+        self._embedding_model = embedding_model
 
-    def run(self, scraped_data: Dict[str, Any]) -> List[Claim]:
-        """
-        Extracts key claims from a raw text using a summarization model.
-        It now expects a dictionary from the SmartScraperAgent.
-        """
-        print("Extracting claims from text...")
+        self.mode = mode or env_str("FACTOS_CLAIM_EXTRACTION_MODE", "abstractive")
+        if self.mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode '{self.mode}', expected one of {EXTRACTION_MODES}.")
+        if self.mode == "extractive" and self._embedding_model is None:
+            raise ValueError("Extractive mode needs the sentence embedding model.")
 
-        if "error" in scraped_data and scraped_data["error"]:
-            print(f"Skipping claim extraction due to scraper error: {scraped_data['error']}")
-            return []
+        tokenizer = self._summarizer.tokenizer
+        # Leave room for the <s> and </s> tokens the summarizer adds.
+        model_max = min(tokenizer.model_max_length, 1024) - tokenizer.num_special_tokens_to_add()
+        self.chunk_tokens = min(env_int("FACTOS_SUMMARY_CHUNK_TOKENS", model_max), model_max)
+        self.extractive_tokens = min(env_int("FACTOS_EXTRACTIVE_TOKENS", 256), model_max)
+        self.extractive_segments = env_int("FACTOS_EXTRACTIVE_SEGMENTS", 2)
+        # Chunks summarized per model call when claims are streamed.
+        self.stream_chunk_batch = max(1, env_int("FACTOS_STREAM_CHUNK_BATCH", 1))
+        # Without a batch size the pipeline generates one chunk at a time.
+        self.summarizer_batch_size = max(1, env_int("FACTOS_SUMMARIZER_BATCH_SIZE", 8))
 
-        text_content = scraped_data.get("content", "")
-        if not text_content:
-            print("No content to extract claims from.")
-            return []
+    def _split_into_chunks(self, text_content: str, mode: Optional[str] = None) -> List[str]:
+        tokenizer = self._summarizer.tokenizer
+        sentences = split_sentences(text_content)
 
-        # Chunk the text to avoid memory errors with large articles
-        chunk_size = 4096  # A reasonable chunk size for a summarization model
-        overlap = 200
-        
-        text_chunks = [
-            text_content[i:i+chunk_size] 
-            for i in range(0, len(text_content), chunk_size - overlap)
-        ]
+        if (mode or self.mode) == "extractive" and len(sentences) > 1:
+            scores = rank_sentences(sentences, self._embedding_model)
+            budget = self.extractive_tokens * self.extractive_segments
+            sentences = select_top_sentences(sentences, scores, tokenizer, budget)
+            chunks = pack_sentences(sentences, tokenizer, self.extractive_tokens)
+        else:
+            # Chunk by the model's own tokenizer so no text is silently truncated.
+            chunks = pack_sentences(sentences, tokenizer, self.chunk_tokens)
+        ARTICLE_CHUNKS.observe(len(chunks))
+        return chunks
 
-        print(f"Split content into {len(text_chunks)} chunks.")
+    @instrumented("claim_extractor")
+    def summarize_chunks(self, text_chunks: List[str]) -> List[Claim]:
+        """Summarizes already-sized chunks into one claim per chunk, in order."""
+        if not text_chunks:
+            return []
 
         # The summarizer expects a list of texts
         summaries: List[Dict[str, str]] = self._summarizer(
@@ -52,12 +84,93 @@ class ClaimExtractorAgent:
             max_length=150,
             min_length=30,
             do_sample=False,
-            truncation=True # Ensure chunks that are slightly too long are handled
+            batch_size=min(self.summarizer_batch_size, len(text_chunks)),
+            truncation=True # Safety net only; chunks are already sized to the model's input window
         )
-        
-        claims = [Claim(claim_text=summary['summary_text']) for summary in summaries]
+        return [Claim(claim_text=summary['summary_text']) for summary in summaries]
+
+    def _article_text(self, scraped_data: Dict[str, Any]) -> str:
+        if "error" in scraped_data and scraped_data["error"]:
+            print(f"Skipping claim extraction due to scraper error: {scraped_data['error']}")
+            return ""
+
+        text_content = scraped_data.get("content", "")
+        if not text_content:
+            print("No content to extract claims from.")
+        return text_content
+
+    @staticmethod
+    def _deduplicate(claims: List[Claim]) -> List[Claim]:
         # Remove duplicate claims that might arise from overlapping chunks
-        unique_claims = list({claim.claim_text: claim for claim in claims}.values())
-        
+        return list({claim.claim_text: claim for claim in claims}.values())
+
+    def chunk_article(self, scraped_data: Dict[str, Any], mode: Optional[str] = None) -> List[str]:
+        """
+        Splits a scraped article into summarizer-sized chunks without summarizing
+        them, so callers can summarize chunk by chunk and surface claims early.
+        """
+        text_content = self._article_text(scraped_data)
+        return self._split_into_chunks(text_content, mode) if text_content else []
+
+    def iter_claims(self, scraped_data: Dict[str, Any], mode: Optional[str] = None) -> Iterator[Claim]:
+        """
+        Yields unique claims as soon as each group of `stream_chunk_batch`
+        chunks is summarized, so downstream stages can start on the first
+        claims while the rest of the article is still being processed.
+        """
+        text_chunks = self.chunk_article(scraped_data, mode)
+        print(f"Streaming claims from {len(text_chunks)} chunks.")
+
+        seen = set()
+        for start in range(0, len(text_chunks), self.stream_chunk_batch):
+            for claim in self.summarize_chunks(text_chunks[start:start + self.stream_chunk_batch]):
+                if claim.claim_text not in seen:
+                    seen.add(claim.claim_text)
+                    yield claim
+
+    @instrumented("claim_extractor")
+    def run(self, scraped_data: Dict[str, Any], mode: Optional[str] = None) -> List[Claim]:
+        """
+        Extracts key claims from a raw text using a summarization model.
+        It now expects a dictionary from the SmartScraperAgent.
+        `mode` overrides the configured extraction mode for this call.
+        """
+        print("Extracting claims from text...")
+
+        text_content = self._article_text(scraped_data)
+        if not text_content:
+            return []
+
+        text_chunks = self._split_into_chunks(text_content, mode)
+        print(f"Split content into {len(text_chunks)} chunks.")
+
+        unique_claims = self._deduplicate(self.summarize_chunks(text_chunks))
+
         print(f"Extracted {len(unique_claims)} unique claims.")
         return unique_claims
+
+    @instrumented("claim_extractor")
+    def run_many(self, scraped_items: List[Dict[str, Any]], mode: Optional[str] = None) -> List[List[Claim]]:
+        """
+        Extracts claims for several articles at once.
+        The chunks of every article are summarized in a single batched call and
+        the resulting claims are returned per article, in input order.
+        """
+        print(f"Extracting claims from {len(scraped_items)} articles...")
+
+        all_chunks: List[str] = []
+        chunk_ranges = []
+        for scraped_data in scraped_items:
+            text_content = self._article_text(scraped_data)
+            chunks = self._split_into_chunks(text_content, mode) if text_content else []
+            chunk_ranges.append((len(all_chunks), len(all_chunks) + len(chunks)))
+            all_chunks.extend(chunks)
+
+        print(f"Split content into {len(all_chunks)} chunks across all articles.")
+        all_claims = self.summarize_chunks(all_chunks)
+
+        claims_per_article = [
+            self._deduplicate(all_claims[start:end]) for start, end in chunk_ranges
+        ]
+        print(f"Extracted {sum(len(c) for c in claims_per_article)} unique claims.")
+        return claims_per_article
@@ -0,0 +1,106 @@
+import re
+from typing import List, Sequence
+
+import numpy as np
+
+# Sentence ends, or blank lines / markdown block boundaries.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])|\n\s*\n")
+_MARKDOWN_NOISE = re.compile(r"^\s*(#+\s*|[-*>]\s+|\|.*\|\s*$|!\[.*\]\(.*\)\s*$)")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits article markdown into sentences, dropping empty fragments and images/tables."""
+    sentences = []
+    for fragment in _SENTENCE_BOUNDARY.split(text):
+        fragment = fragment.strip()
+        if not fragment or (_MARKDOWN_NOISE.match(fragment) and len(fragment) < 40):
+            continue
+        sentences.append(" ".join(fragment.split()))
+    return sentences
+
+
+def _split_long_sentence(sentence: str, tokenizer, max_tokens: int) -> List[str]:
+    """Hard-splits a sentence that alone exceeds the budget, on token boundaries."""
+    offsets = tokenizer(
+        sentence,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=False,
+        verbose=False,
+    )["offset_mapping"]
+    pieces = []
+    for start in range(0, len(offsets), max_tokens):
+        window = offsets[start:start + max_tokens]
+        pieces.append(sentence[window[0][0]:window[-1][1]])
+    return pieces
+
+
+def pack_sentences(sentences: Sequence[str], tokenizer, max_tokens: int) -> List[str]:
+    """
+    Greedily packs consecutive sentences into chunks of at most `max_tokens`
+    tokens, measured with the model's tokenizer. Chunks end on sentence
+    boundaries, so nothing is truncated and no overlap is needed.
+    """
+    if not sentences:
+        return []
+    token_counts = [
+        len(ids) for ids in tokenizer(list(sentences), add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+    ]
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for sentence, n_tokens in zip(sentences, token_counts):
+        if n_tokens > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long_sentence(sentence, tokenizer, max_tokens))
+            continue
+        # Joining with a space can add at most one token per boundary.
+        if current and current_tokens + n_tokens + 1 > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += n_tokens + (1 if current_tokens else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def rank_sentences(sentences: Sequence[str], embedding_model) -> np.ndarray:
+    """
+    Scores sentences by centrality: cosine similarity of each sentence
+    embedding to the mean embedding of the article.
+    """
+    embeddings = embedding_model.encode(
+        list(sentences),
+        batch_size=64,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    )
+    centroid = embeddings.mean(axis=0)
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(len(sentences), dtype=np.float32)
+    return embeddings @ (centroid / norm)
+
+
+def select_top_sentences(
+    sentences: Sequence[str],
+    scores: np.ndarray,
+    tokenizer,
+    token_budget: int,
+) -> List[str]:
+    """Picks the highest-scoring sentences that fit in `token_budget`, in document order."""
+    token_counts = [
+        len(ids) for ids in tokenizer(list(sentences), add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+    ]
+    chosen = []
+    used = 0
+    for i in np.argsort(-scores):
+        if used + token_counts[i] > token_budget:
+            continue
+        chosen.append(i)
+        used += token_counts[i] + 1
+    return [sentences[i] for i in sorted(chosen)]
@@ -1,40 +1,31 @@
-import requests
-import json
-from typing import List
-import os
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple
+
+from core.firecrawl import FirecrawlClient, FirecrawlError
+from core.metrics import instrumented
+
 
 class CorpusBuilderAgent:
+    def __init__(self, client: FirecrawlClient = None):
+        # The shared client keeps Firecrawl connections alive between scrapes.
+        self._client = client if client is not None else FirecrawlClient()
+
+    @instrumented("corpus_builder")
     def run(self, urls: List[str]) -> List[str]:
         """
-        Uses direct REST API calls to scrape fact-check articles.
+        Uses the Firecrawl REST API to scrape fact-check articles.
         """
         print(f"Starting REST API-based scrape for {len(urls)} base URLs...")
         all_documents = []
-        api_key = os.getenv("FIRECRAWL_API_KEY")
 
-        if not api_key:
+        if not self._client.has_credentials:
             raise ValueError("FIRECRAWL_API_KEY environment variable not set.")
 
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        }
-        
-        scrape_url = "https://api.firecrawl.dev/v1/scrape"
-
         for url in urls:
             print(f"Scraping {url} with Firecrawl REST API...")
-            payload = {
-                "url": url, 
-                "onlyMainContent": True
-            }
-            
             try:
-                response = requests.post(scrape_url, headers=headers, json=payload, timeout=60)
-                response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
+                scraped_data = self._client.scrape(url)
 
-                scraped_data = response.json()
-                
                 # The successful response is nested under a 'data' key
                 if scraped_data.get("success") and "data" in scraped_data:
                     markdown = scraped_data["data"].get("markdown")
@@ -44,17 +35,51 @@ class CorpusBuilderAgent:
                 else:
                     print(f"API call succeeded but scrape failed for {url}: {scraped_data.get('error')}")
 
-            except requests.exceptions.HTTPError as e:
-                # Handle non-2xx responses
-                print(f"HTTP error occurred while scraping {url}: {e}")
-                # Try to print the error from the response body if it exists
-                try:
-                    print(f"API Response: {e.response.json()}")
-                except json.JSONDecodeError:
-                    print(f"API Response (non-JSON): {e.response.text}")
-            except requests.exceptions.RequestException as e:
-                # Handle other network errors (timeout, connection error, etc.)
-                print(f"An error occurred while making the request for {url}: {e}")
+            except FirecrawlError as e:
+                print(f"An error occurred while scraping {url}: {e}")
 
         print(f"Finished scraping. Total documents found: {len(all_documents)}")
-        return all_documents 
\ No newline at end of file
+        return all_documents
+
+    async def crawl(self, urls: List[str], concurrency: int = 8) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Scrapes `urls` with at most `concurrency` requests in flight and yields
+        `(url, markdown)` pairs as soon as each page arrives. `markdown` is None
+        when the page could not be scraped.
+        """
+        if not self._client.has_credentials:
+            raise ValueError("FIRECRAWL_API_KEY environment variable not set.")
+
+        url_queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            url_queue.put_nowait(url)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            while True:
+                try:
+                    url = url_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                markdown = None
+                try:
+                    scraped_data = await self._client.scrape_async(url)
+                    if scraped_data.get("success") and scraped_data.get("data"):
+                        markdown = scraped_data["data"].get("markdown") or None
+                    else:
+                        print(f"API call succeeded but scrape failed for {url}: {scraped_data.get('error')}")
+                except FirecrawlError as e:
+                    print(f"An error occurred while scraping {url}: {e}")
+                except Exception as e:
+                    # Any failure must still produce a result, or the consumer waits forever.
+                    print(f"Unexpected error while scraping {url}: {type(e).__name__}: {e}")
+                finally:
+                    results.put_nowait((url, markdown))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(urls)))]
+        try:
+            for _ in range(len(urls)):
+                yield await results.get()
+        finally:
+            for task in workers:
+                task.cancel()
@@ -1,53 +1,283 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
 from pydantic import PrivateAttr
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from agents.fact_check_matcher.indexing import CorpusManifest, content_id, split_into_passages
+from agents.fact_check_matcher.snapshots import CorpusSnapshots, LiveVectorStore
+from agents.fact_check_matcher.stores import (
+    DEFAULT_FAISS_DIR,
+    DEFAULT_QUANT_DIR,
+    ChromaVectorStore,
+    FaissVectorStore,
+    QuantizedVectorStore,
+    VectorStore,
+)
+from core.config import env_int, env_str
+from core.inference import load_embedder
+from core.metrics import instrumented
 from schemas.messages import Claim, FactCheck
 
+DB_PATH = "data/fact_checks_db"
+MANIFEST_PATH = os.path.join(DB_PATH, "manifest.json")
+COLLECTION_NAME = "fact_checks"
+
+
+def load_embedding_model():
+    """Loads the sentence embedding model used for the fact-check corpus."""
+    print("[FactCheckMatcherAgent] Loading embedding model...")
+    # The backend (stock PyTorch, int8, ONNX Runtime) is chosen by FACTOS_EMBEDDER_BACKEND.
+    model = load_embedder()
+    print("[FactCheckMatcherAgent] Model loaded.")
+    return model
+
+
+def open_db_client(path: str = DB_PATH):
+    """Opens the persistent ChromaDB client that stores the corpus on disk."""
+    # Only the Chroma backend needs chromadb, so it is imported on first use.
+    import chromadb
+    return chromadb.PersistentClient(path=path)
+
+
+def get_collection(db_client):
+    try:
+        return db_client.get_collection(COLLECTION_NAME)
+    except Exception:
+        # New collections use cosine distance to match our normalized embeddings.
+        # Existing collections keep their distance metric, which cannot be changed in place.
+        return db_client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+
+
+def legacy_store_path(backend: str) -> str:
+    """Where the backend keeps its store when no corpus snapshot has been published."""
+    if backend == "chroma":
+        return DB_PATH
+    if backend == "faiss":
+        return env_str("FACTOS_FAISS_DIR", DEFAULT_FAISS_DIR)
+    if backend == "quantized":
+        return env_str("FACTOS_QUANT_DIR", DEFAULT_QUANT_DIR)
+    raise ValueError(f"Unknown vector store '{backend}', expected 'chroma', 'faiss' or 'quantized'.")
+
+
+def open_vector_store(backend: Optional[str] = None, path: Optional[str] = None) -> VectorStore:
+    """
+    Opens the vector store selected by `FACTOS_VECTOR_STORE`:
+    'chroma' (default), 'faiss' (persisted under data/embedded_corpus/) or
+    'quantized' (compact int8/float16 arrays under data/quantized_corpus/).
+
+    With `path` the store in that directory is opened. Otherwise, once
+    build_corpus.py has published a corpus snapshot, the served store is a
+    `LiveVectorStore` that follows newly published versions.
+    """
+    backend = backend or env_str("FACTOS_VECTOR_STORE", "chroma")
+    if path is None:
+        snapshots = CorpusSnapshots(backend)
+        if snapshots.current() is not None:
+            return LiveVectorStore(snapshots, lambda snapshot_path: open_vector_store(backend, snapshot_path))
+    if backend == "chroma":
+        path = path or DB_PATH
+        client = open_db_client(path)
+        return ChromaVectorStore(get_collection(client), manifest_path=os.path.join(path, "manifest.json"), client=client)
+    if backend == "faiss":
+        return FaissVectorStore(path=path)
+    if backend == "quantized":
+        return QuantizedVectorStore(path=path)
+    raise ValueError(f"Unknown vector store '{backend}', expected 'chroma', 'faiss' or 'quantized'.")
+
+
+def get_corpus_version(vector_store: VectorStore) -> str:
+    """Returns an identifier that changes whenever the fact-check corpus changes."""
+    return vector_store.version()
+
+
+def make_snippet(text: str, max_chars: int) -> str:
+    """Shortens `text` to at most `max_chars` characters, cutting on a word boundary."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars - 1]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(",;:") + "…"
+
 
 class FactCheckMatcherAgent:
     _embedding_model = PrivateAttr()
-    _db_client = PrivateAttr()
-    _collection = PrivateAttr()
+    _store = PrivateAttr()
+    _manifest = PrivateAttr()
+    _embedding_cache = PrivateAttr()
+    _embedding_cache_lock = PrivateAttr()
 
-    def __init__(self, **kwargs):
+    def __init__(self, embedding_model=None, vector_store: VectorStore = None, manifest_path: Optional[str] = None, **kwargs):
         super().__init__(**kwargs)
         print("[FactCheckMatcherAgent] Initializing...")
-        
-        print("[FactCheckMatcherAgent] Loading embedding model...")
-        self._embedding_model = SentenceTransformer(
-            'all-MiniLM-L6-v2',
-            device='mps'
-        )
-        print("[FactCheckMatcherAgent] Model loaded.")
-
-        # Use a persistent client to store the database on disk
-        self._db_client = chromadb.PersistentClient(path="data/fact_checks_db")
-        self._collection = self._db_client.get_or_create_collection("fact_checks")
-        
-        print(f"ChromaDB collection '{self._collection.name}' loaded with {self._collection.count()} documents.")
-
-    def add_documents(self, documents: List[str]):
-        """Adds a list of documents to the ChromaDB collection."""
+
+        # Shared instances can be injected so the model and store are opened only once per process.
+        self._embedding_model = embedding_model if embedding_model is not None else load_embedding_model()
+        self._store = vector_store if vector_store is not None else open_vector_store()
+        self._manifest = CorpusManifest(manifest_path or self._store.manifest_path)
+
+        # LRU of claim text -> normalized embedding; viral claims repeat across articles.
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embedding_cache_lock = threading.Lock()
+        self.embedding_cache_size = env_int("FACTOS_EMBEDDING_CACHE_SIZE", 4096)
+
+        # Passages are sized to the embedding model's input window (minus [CLS]/[SEP]).
+        max_seq_length = getattr(self._embedding_model, "max_seq_length", 256)
+        self.passage_tokens = env_int("FACTOS_PASSAGE_TOKENS", max_seq_length - 2)
+        self.passage_overlap = env_int("FACTOS_PASSAGE_OVERLAP", 32)
+        # Matches carry only a short excerpt so payloads stay small.
+        self.snippet_chars = env_int("FACTOS_SNIPPET_CHARS", 280)
+
+        print(f"Vector store {type(self._store).__name__} loaded with {self._store.count()} passages.")
+
+    @property
+    def corpus_version(self) -> str:
+        return get_corpus_version(self._store)
+
+    @instrumented("fact_check_matcher")
+    def add_documents(self, documents: List[str], sources: Optional[List[str]] = None) -> int:
+        """
+        Splits documents into token-bounded, overlapping passages and upserts
+        them into the vector store under content-hash IDs.
+        Documents whose content is unchanged since the last build (per the
+        manifest) and passages that are already embedded are skipped.
+        Returns how many passages were embedded.
+        """
         if not documents:
-            return
-
-        print(f"Adding {len(documents)} new documents to the collection...")
-        # Add new documents. ChromaDB handles embedding via the model provided at collection creation.
-        # However, since we use SentenceTransformer, we'll embed manually for consistency.
-        embeddings = self._embedding_model.encode(documents).tolist()
-        
-        # Generate IDs for the documents
-        ids = [f"doc_{self._collection.count() + i}" for i in range(len(documents))]
-
-        self._collection.add(
-            embeddings=embeddings,
-            documents=documents,
-            ids=ids
-        )
-        print("Finished adding documents.")
+            return 0
+
+        sources = sources or [content_id(document) for document in documents]
+        print(f"Indexing {len(documents)} documents...")
+        if not self._manifest.legacy_ids_removed:
+            self._remove_legacy_entries()
+
+        new_passages = {}
+        replaced_ids = set()
+        for document, source_url in zip(documents, sources):
+            parent_id = content_id(document)
+            if self._manifest.is_current(source_url, parent_id):
+                continue
+
+            passages = split_into_passages(
+                document,
+                self._embedding_model.tokenizer,
+                max_tokens=self.passage_tokens,
+                overlap_tokens=self.passage_overlap,
+                source_url=source_url,
+            )
+            passage_ids = [passage.passage_id for passage in passages]
+
+            replaced_ids.update(self._manifest.passage_ids(source_url))
+            self._manifest.record(source_url, parent_id, passage_ids)
+            for passage in passages:
+                new_passages.setdefault(passage.passage_id, passage)
+
+        # Passages of previous page versions that nothing references any more. Only
+        # known once the whole batch is recorded: a passage may move to a later page.
+        stale_ids = replaced_ids - self._manifest.referenced_ids()
+
+        if new_passages:
+            for passage_id in self._store.existing_ids(list(new_passages)):
+                del new_passages[passage_id]
+
+        if stale_ids:
+            print(f"Removing {len(stale_ids)} stale passages...")
+            self._store.delete(list(stale_ids))
+
+        if new_passages:
+            passages = list(new_passages.values())
+            print(f"Embedding {len(passages)} new passages...")
+            # We embed manually with the SentenceTransformer so stored and query vectors come from the same model.
+            embeddings = self._embedding_model.encode(
+                [p.text for p in passages],
+                normalize_embeddings=True,
+            )
+            self._store.upsert(
+                ids=[p.passage_id for p in passages],
+                embeddings=embeddings,
+                documents=[p.text for p in passages],
+                metadatas=[
+                    {
+                        "parent_id": p.parent_id,
+                        "source_url": p.source_url,
+                        "passage_index": p.passage_index,
+                        "char_start": p.char_start,
+                        "char_end": p.char_end,
+                    }
+                    for p in passages
+                ],
+            )
+
+        self._store.persist()
+        self._manifest.save()
+        print(f"Finished indexing: {len(new_passages)} passages embedded, {len(self._manifest)} documents in manifest.")
+        return len(new_passages)
 
+    def _remove_legacy_entries(self, batch_size: int = 1000):
+        """
+        Deletes whole-page entries written under the old sequential `doc_N`
+        IDs. They were numbered from the collection size at the time, so all
+        of them lie below the current count.
+        """
+        legacy_ids = set()
+        count = self._store.count()
+        for start in range(0, count, batch_size):
+            legacy_ids |= self._store.existing_ids([f"doc_{i}" for i in range(start, min(count, start + batch_size))])
+        if legacy_ids:
+            print(f"Removing {len(legacy_ids)} legacy whole-page entries...")
+            self._store.delete(list(legacy_ids))
+        self._manifest.legacy_ids_removed = True
+
+    @instrumented("fact_check_matcher")
+    def embed_claims(self, claim_texts: List[str]) -> np.ndarray:
+        """
+        Returns normalized embeddings for `claim_texts`, one row per text.
+        Cached texts are reused and all misses are encoded in one batched call
+        with the same model that embedded the corpus.
+        """
+        embeddings: List[Optional[np.ndarray]] = [None] * len(claim_texts)
+        missing: Dict[str, List[int]] = {}
+        with self._embedding_cache_lock:
+            for i, text in enumerate(claim_texts):
+                cached = self._embedding_cache.get(text)
+                if cached is not None:
+                    self._embedding_cache.move_to_end(text)
+                    embeddings[i] = cached
+                else:
+                    missing.setdefault(text, []).append(i)
+
+        if missing:
+            texts = list(missing)
+            encoded = self._embedding_model.encode(
+                texts,
+                batch_size=64,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+            ).astype(np.float32)
+            with self._embedding_cache_lock:
+                for text, vector in zip(texts, encoded):
+                    for i in missing[text]:
+                        embeddings[i] = vector
+                    self._embedding_cache[text] = vector
+                    self._embedding_cache.move_to_end(text)
+                while len(self._embedding_cache) > self.embedding_cache_size:
+                    self._embedding_cache.popitem(last=False)
+
+        return np.vstack(embeddings) if embeddings else np.empty((0, 0), dtype=np.float32)
+
+    def fetch_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the full text and metadata of a matched passage, or None if it is no longer indexed."""
+        found = self._store.get([document_id])
+        if document_id not in found:
+            return None
+        document, metadata = found[document_id]
+        return {"document_id": document_id, "text": document, **metadata}
+
+    @instrumented("fact_check_matcher")
     def run(self, claims: List[Claim]) -> List[FactCheck]:
         """
         Finds relevant fact-checks for a list of claims.
@@ -58,34 +288,23 @@ class FactCheckMatcherAgent:
             return []
 
         claim_texts = [claim.claim_text for claim in claims]
-        
-        results = self._collection.query(
-            query_texts=claim_texts,
-            n_results=1
-        )
+
+        # Query with our own embeddings so the store never embeds text with a different model.
+        results = self._store.query(self.embed_claims(claim_texts), k=1)
 
         matches = []
-        if not results:
-            return matches
-
-        # Unpack results safely, providing default empty lists
-        documents = results.get('documents', [])
-        distances = results.get('distances', [])
-
-        if not documents or not distances:
-            return matches
-
-        # Each query will have a list of documents and distances
-        for i, claim in enumerate(claims):
-            if len(documents) > i and documents[i]:
-                best_match_doc = documents[i][0]
-                best_match_dist = distances[i][0] if len(distances) > i and distances[i] else 0.0
-                
+        for claim, hits in zip(claims, results):
+            if hits:
+                best = hits[0]
                 matches.append(FactCheck(
                     claim=claim,
-                    match_document=best_match_doc,
-                    match_score=1 - best_match_dist # Convert distance to similarity
+                    document_id=best.passage_id,
+                    source_url=best.metadata.get("source_url"),
+                    char_start=best.metadata.get("char_start"),
+                    char_end=best.metadata.get("char_end"),
+                    snippet=make_snippet(best.document, self.snippet_chars),
+                    match_score=best.similarity
                 ))
-        
+
         print(f"Found {len(matches)} potential fact-check matches.")
         return matches
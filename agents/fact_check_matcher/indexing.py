@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+from pydantic import BaseModel
+
+
+def content_id(text: str) -> str:
+    """Stable ID derived from the text itself, so identical content maps to one entry."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class Passage(BaseModel):
+    """
+    A token-bounded slice of a fact-check document, as stored in the index.
+    """
+    passage_id: str
+    parent_id: str
+    source_url: str
+    passage_index: int
+    char_start: int
+    char_end: int
+    text: str
+
+
+def split_into_passages(
+    document: str,
+    tokenizer,
+    max_tokens: int,
+    overlap_tokens: int,
+    source_url: str,
+) -> List[Passage]:
+    """
+    Splits `document` into overlapping passages of at most `max_tokens` tokens,
+    measured with the embedding model's own tokenizer, so nothing is silently
+    truncated at embedding time. Passage text is sliced from the original
+    document using the tokenizer's character offsets.
+    """
+    parent_id = content_id(document)
+    encoding = tokenizer(
+        document,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        truncation=False,
+        verbose=False,
+    )
+    offsets = encoding["offset_mapping"]
+    if not offsets:
+        return []
+
+    stride = max(1, max_tokens - overlap_tokens)
+    passages = []
+    for start in range(0, len(offsets), stride):
+        window = offsets[start:start + max_tokens]
+        char_start, char_end = window[0][0], window[-1][1]
+        text = document[char_start:char_end].strip()
+        if text:
+            passages.append(Passage(
+                passage_id=content_id(text),
+                parent_id=parent_id,
+                source_url=source_url,
+                passage_index=len(passages),
+                char_start=char_start,
+                char_end=char_end,
+                text=text,
+            ))
+        if start + max_tokens >= len(offsets):
+            break
+    return passages
+
+
+class CorpusManifest:
+    """
+    Records which source documents (by content hash) and passages are indexed,
+    so a rebuild only embeds new or changed content.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._documents: Dict[str, Dict] = {}
+        # Whether whole-page entries of the old doc_N scheme have been removed from the store.
+        self.legacy_ids_removed = False
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            self._documents = data.get("documents", {})
+            self.legacy_ids_removed = data.get("legacy_ids_removed", False)
+        except FileNotFoundError:
+            pass
+
+    def is_current(self, source_url: str, parent_id: str) -> bool:
+        entry = self._documents.get(source_url)
+        return entry is not None and entry["parent_id"] == parent_id
+
+    def passage_ids(self, source_url: str) -> List[str]:
+        entry = self._documents.get(source_url)
+        return list(entry["passage_ids"]) if entry else []
+
+    def referenced_ids(self, exclude_source: Optional[str] = None) -> Set[str]:
+        return {
+            passage_id
+            for source_url, entry in self._documents.items()
+            if source_url != exclude_source
+            for passage_id in entry["passage_ids"]
+        }
+
+    def record(self, source_url: str, parent_id: str, passage_ids: List[str]):
+        self._documents[source_url] = {"parent_id": parent_id, "passage_ids": passage_ids}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"documents": self._documents, "legacy_ids_removed": self.legacy_ids_removed}, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        return len(self._documents)
@@ -0,0 +1,385 @@
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from agents.fact_check_matcher.indexing import CorpusManifest
+from agents.fact_check_matcher.stores import VectorStore
+from core.config import env_float, env_int, env_str
+
+DEFAULT_CORPUS_DIR = "data/corpus"
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class CorpusSnapshots:
+    """
+    Versioned copies of the fact-check index for one vector store backend,
+    under `<FACTOS_CORPUS_DIR>/<backend>/`:
+
+        staging/            the build in progress, never served
+        versions/<version>/ one complete, validated store per published corpus
+        CURRENT, PREVIOUS   pointer files naming the served and the rollback version
+        pins/<version>@<pid> versions a running process still has open
+
+    A build copies the served version into `staging/`, updates it there and is
+    published by renaming it into `versions/` and then replacing `CURRENT`,
+    so readers only ever see a finished index.
+    """
+
+    def __init__(self, backend: str, root: Optional[str] = None, keep: Optional[int] = None):
+        self.backend = backend
+        self.root = os.path.join(root or env_str("FACTOS_CORPUS_DIR", DEFAULT_CORPUS_DIR), backend)
+        self.keep = max(2, keep or env_int("FACTOS_CORPUS_KEEP_VERSIONS", 3))
+        self.versions_dir = os.path.join(self.root, "versions")
+        self.staging_dir = os.path.join(self.root, "staging")
+        self.pins_dir = os.path.join(self.root, "pins")
+
+    def _pointer(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        try:
+            with open(self._pointer(name), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, name: str, version: Optional[str]):
+        path = self._pointer(name)
+        if version is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def current(self) -> Optional[str]:
+        return self._read_pointer("CURRENT")
+
+    def previous(self) -> Optional[str]:
+        return self._read_pointer("PREVIOUS")
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.versions_dir, version)
+
+    def info(self, version: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.path(version), SNAPSHOT_FILE), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"version": version}
+
+    def versions(self) -> List[str]:
+        """Published versions, oldest first."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if os.path.isdir(self.path(name)))
+
+    def _pin_path(self, version: str) -> str:
+        return os.path.join(self.pins_dir, f"{version}@{os.getpid()}")
+
+    def pin(self, version: str):
+        """Marks `version` as open in this process, so `prune` keeps it."""
+        os.makedirs(self.pins_dir, exist_ok=True)
+        open(self._pin_path(version), "w").close()
+
+    def unpin(self, version: str):
+        try:
+            os.remove(self._pin_path(version))
+        except FileNotFoundError:
+            pass
+
+    def pinned(self) -> Set[str]:
+        """Versions some live process has pinned. Pins left by dead processes are removed."""
+        if not os.path.isdir(self.pins_dir):
+            return set()
+        versions = set()
+        for name in os.listdir(self.pins_dir):
+            version, _, pid = name.rpartition("@")
+            if not version or not pid.isdigit():
+                continue
+            try:
+                os.kill(int(pid), 0)
+            except ProcessLookupError:
+                os.remove(os.path.join(self.pins_dir, name))
+                continue
+            except PermissionError:
+                # A live process of another user.
+                pass
+            versions.add(version)
+        return versions
+
+    def prepare_staging(self, base_path: Optional[str], fresh: bool = False) -> Tuple[str, bool]:
+        """
+        Returns the staging directory and whether an interrupted build is being
+        resumed in it. A new staging directory starts as a copy of `base_path`
+        (the served corpus), so unchanged documents are not embedded again.
+        """
+        if os.path.isdir(self.staging_dir) and not fresh:
+            return self.staging_dir, True
+        self.discard_staging()
+        os.makedirs(self.root, exist_ok=True)
+        if base_path and os.path.isdir(base_path):
+            print(f"[CorpusSnapshots] Copying {base_path} into {self.staging_dir}...")
+            shutil.copytree(base_path, self.staging_dir, ignore=shutil.ignore_patterns(SNAPSHOT_FILE, "*.tmp"))
+        else:
+            os.makedirs(self.staging_dir)
+        return self.staging_dir, False
+
+    def discard_staging(self):
+        if os.path.isdir(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+
+    def _new_version(self) -> str:
+        version = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        candidate, suffix = version, 1
+        while os.path.exists(self.path(candidate)):
+            suffix += 1
+            candidate = f"{version}-{suffix}"
+        return candidate
+
+    def publish(self, validation: Dict[str, Any]) -> str:
+        """Turns the staging directory into a new version and makes it the served one."""
+        version = self._new_version()
+        current = self.current()
+        with open(os.path.join(self.staging_dir, SNAPSHOT_FILE), "w") as f:
+            json.dump({
+                "version": version,
+                "backend": self.backend,
+                "parent": current,
+                "published_at": time.time(),
+                "validation": validation,
+            }, f, indent=2)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        os.rename(self.staging_dir, self.path(version))
+        self._write_pointer("PREVIOUS", current)
+        self._write_pointer("CURRENT", version)
+        self.prune()
+        return version
+
+    def rollback(self) -> str:
+        """Serves the previous version again; the rolled-back one becomes the previous."""
+        current, previous = self.current(), self.previous()
+        if not previous or not os.path.isdir(self.path(previous)):
+            raise ValueError("There is no previous corpus version to roll back to.")
+        self._write_pointer("PREVIOUS", current)
+        self._write_pointer("CURRENT", previous)
+        return previous
+
+    def prune(self):
+        """Deletes the oldest versions beyond `keep`, never the current, previous or a pinned one."""
+        protected = {self.current(), self.previous()} | self.pinned()
+        versions = self.versions()
+        for version in versions[:max(0, len(versions) - self.keep)]:
+            if version not in protected:
+                shutil.rmtree(self.path(version), ignore_errors=True)
+
+
+def validate_snapshot(
+    store: VectorStore,
+    embed: Callable[[List[str]], np.ndarray],
+    manifest: CorpusManifest,
+    previous_count: Optional[int] = None,
+    sample_size: Optional[int] = None,
+    min_recall: Optional[float] = None,
+    max_shrink: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Checks a freshly built store before it is published: it must not be empty
+    or shrink by more than `max_shrink` against the served corpus, every
+    sampled manifest passage must be stored, and searching for a sampled
+    passage's own text must return it in the top 3 for at least `min_recall`
+    of the sample.
+    """
+    sample_size = sample_size or env_int("FACTOS_CORPUS_VALIDATION_SAMPLE", 50)
+    min_recall = min_recall if min_recall is not None else env_float("FACTOS_CORPUS_MIN_RECALL", 0.9)
+    max_shrink = max_shrink if max_shrink is not None else env_float("FACTOS_CORPUS_MAX_SHRINK", 0.5)
+
+    problems = []
+    count = store.count()
+    if count == 0:
+        problems.append("The index is empty.")
+    if previous_count and count < previous_count * (1 - max_shrink):
+        problems.append(f"The index shrank from {previous_count} to {count} passages.")
+
+    passage_ids = sorted(manifest.referenced_ids())
+    sample = random.Random(0).sample(passage_ids, min(sample_size, len(passage_ids)))
+    found = store.get(sample)
+    if len(found) < len(sample):
+        problems.append(f"{len(sample) - len(found)} of {len(sample)} sampled manifest passages are missing.")
+
+    recall = None
+    if found:
+        ids = list(found)
+        hits = store.query(embed([found[passage_id][0] for passage_id in ids]), k=3)
+        recall = sum(
+            any(hit.passage_id == passage_id for hit in row)
+            for passage_id, row in zip(ids, hits)
+        ) / len(ids)
+        if recall < min_recall:
+            problems.append(f"Self-retrieval recall {recall:.2f} is below {min_recall:.2f}.")
+
+    return {
+        "ok": not problems,
+        "passages": count,
+        "previous_passages": previous_count,
+        "sampled": len(sample),
+        "self_recall": recall,
+        "problems": problems,
+    }
+
+
+class _ServedVersion:
+    """One opened snapshot and how many calls are still reading it."""
+
+    __slots__ = ("version", "store", "readers", "retired")
+
+    def __init__(self, version: str, store: VectorStore):
+        self.version = version
+        self.store = store
+        self.readers = 0
+        self.retired = False
+
+
+class LiveVectorStore(VectorStore):
+    """
+    Read-only vector store that serves the published snapshot named by
+    `CURRENT` and switches to a newer one without a restart.
+
+    The pointer is re-read at most every `poll_seconds`
+    (`FACTOS_CORPUS_POLL_SECONDS`). The new store is opened by the first
+    caller that notices the change while concurrent queries keep using the
+    old one, then swapped in with a single assignment, so no query ever sees
+    a half-open index. The old store is closed once its last reader is done.
+    Every open version is pinned so `CorpusSnapshots.prune` in another
+    process keeps it. `version()` is the snapshot version, which the
+    verification and claim caches key on.
+    """
+
+    def __init__(self, snapshots: CorpusSnapshots, opener: Callable[[str], VectorStore], poll_seconds: Optional[float] = None):
+        self._snapshots = snapshots
+        self._open = opener
+        self.poll_seconds = poll_seconds if poll_seconds is not None else env_float("FACTOS_CORPUS_POLL_SECONDS", 10.0)
+        version = snapshots.current()
+        if version is None:
+            raise ValueError(f"No corpus snapshot has been published under {snapshots.root}.")
+        self._active = self._open_version(version)
+        self._checked_at = time.monotonic()
+        self._reload_lock = threading.Lock()
+        self._readers_lock = threading.Lock()
+        print(f"[LiveVectorStore] Serving corpus version {version}.")
+
+    def _open_version(self, version: str) -> _ServedVersion:
+        # Pinned before opening, so a concurrent prune cannot delete it underneath us.
+        self._snapshots.pin(version)
+        try:
+            return _ServedVersion(version, self._open(self._snapshots.path(version)))
+        except BaseException:
+            self._snapshots.unpin(version)
+            raise
+
+    def _close_version(self, served: _ServedVersion):
+        served.store.close()
+        self._snapshots.unpin(served.version)
+        print(f"[LiveVectorStore] Closed corpus version {served.version}.")
+
+    @property
+    def snapshots(self) -> CorpusSnapshots:
+        return self._snapshots
+
+    @property
+    def active_version(self) -> str:
+        return self._active.version
+
+    @property
+    def manifest_path(self) -> str:
+        return self._active.store.manifest_path
+
+    @contextmanager
+    def _reading(self):
+        """Yields the served store and keeps it open until the caller is done with it."""
+        if time.monotonic() - self._checked_at >= self.poll_seconds:
+            self.refresh(blocking=False)
+        with self._readers_lock:
+            served = self._active
+            served.readers += 1
+        try:
+            yield served.store
+        finally:
+            with self._readers_lock:
+                served.readers -= 1
+                drained = served.retired and served.readers == 0
+            if drained:
+                self._close_version(served)
+
+    def refresh(self, blocking: bool = True) -> bool:
+        """Switches to the version `CURRENT` names, if it changed. Returns whether it switched."""
+        if not self._reload_lock.acquire(blocking=blocking):
+            # Another thread is already opening the new version.
+            return False
+        try:
+            self._checked_at = time.monotonic()
+            version = self._active.version
+            target = self._snapshots.current()
+            if target is None or target == version:
+                return False
+            try:
+                served = self._open_version(target)
+            except Exception as e:
+                print(f"[LiveVectorStore] Could not open corpus version {target}, still serving {version}: {e}")
+                return False
+            with self._readers_lock:
+                old, self._active = self._active, served
+                old.retired = True
+                drained = old.readers == 0
+            print(f"[LiveVectorStore] Switched corpus version {version} -> {target}.")
+            if drained:
+                self._close_version(old)
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def count(self) -> int:
+        with self._reading() as store:
+            return store.count()
+
+    def existing_ids(self, ids):
+        with self._reading() as store:
+            return store.existing_ids(ids)
+
+    def query(self, embeddings, k):
+        with self._reading() as store:
+            return store.query(embeddings, k)
+
+    def get(self, ids):
+        with self._reading() as store:
+            return store.get(ids)
+
+    def version(self) -> str:
+        # Polls like a query would, so caches notice a swap without waiting for one.
+        with self._reading():
+            return f"snapshot:{self.active_version}"
+
+    def close(self):
+        with self._readers_lock:
+            served = self._active
+            served.retired = True
+            drained = served.readers == 0
+        if drained:
+            self._close_version(served)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        raise RuntimeError("Published corpus snapshots are read-only; build a new version with build_corpus.py.")
+
+    def delete(self, ids):
+        raise RuntimeError("Published corpus snapshots are read-only; build a new version with build_corpus.py.")
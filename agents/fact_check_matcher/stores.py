@@ -0,0 +1,818 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from core.config import env_bool, env_float, env_int, env_str
+
+DEFAULT_FAISS_DIR = "data/embedded_corpus"
+DEFAULT_QUANT_DIR = "data/quantized_corpus"
+# Random token rewritten on every change to a store; the corpus version is derived from it.
+STAMP_FILE = "build_stamp"
+
+
+def new_stamp() -> str:
+    return uuid.uuid4().hex
+
+
+class VectorHit(BaseModel):
+    """
+    A single nearest-neighbour result from a vector store.
+    """
+    passage_id: str
+    document: str
+    metadata: Dict[str, Any]
+    similarity: float
+
+
+class VectorStore(ABC):
+    """
+    Interface implemented by every vector store backend of the matcher.
+    Embeddings are expected to be L2-normalized, so similarity is cosine.
+    """
+
+    # Where the corpus manifest for this store lives, next to the stored vectors.
+    manifest_path: str
+
+    @abstractmethod
+    def count(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: np.ndarray, documents: List[str], metadatas: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def query(self, embeddings: np.ndarray, k: int) -> List[List[VectorHit]]:
+        """Returns the top-`k` hits for every query row, best first."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, ids: List[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Returns `(document, metadata)` for every stored passage ID in `ids`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def version(self) -> str:
+        """Identifier that changes whenever the stored corpus changes."""
+        raise NotImplementedError
+
+    def persist(self):
+        """Flushes pending writes to disk. Backends that write through need not override."""
+
+    def close(self):
+        """Releases open files; the store must not be used afterwards."""
+
+
+class ChromaVectorStore(VectorStore):
+    """Vector store backed by the persistent ChromaDB collection."""
+
+    def __init__(self, collection, manifest_path: str, client=None):
+        self._collection = collection
+        self._client = client
+        self.manifest_path = manifest_path
+        self._stamp_path = os.path.join(os.path.dirname(manifest_path) or ".", STAMP_FILE)
+        try:
+            # Exclusive create, so processes opening the same store agree on its first stamp.
+            with open(self._stamp_path, "x") as f:
+                f.write(new_stamp())
+        except FileExistsError:
+            pass
+
+    def _restamp(self):
+        tmp_path = f"{self._stamp_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(new_stamp())
+        os.replace(tmp_path, self._stamp_path)
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        if not ids:
+            return set()
+        return set(self._collection.get(ids=ids, include=[])["ids"])
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._collection.upsert(
+            ids=ids,
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=documents,
+            metadatas=metadatas,
+        )
+        self._restamp()
+
+    def delete(self, ids):
+        if ids:
+            self._collection.delete(ids=ids)
+            self._restamp()
+
+    def _distance_to_similarity(self, distance: float) -> float:
+        # Collections created before cosine was the default use squared L2,
+        # which for unit vectors equals 2 - 2 * cosine.
+        space = (self._collection.metadata or {}).get("hnsw:space", "l2")
+        if space == "l2":
+            return 1 - distance / 2
+        return 1 - distance
+
+    def query(self, embeddings, k):
+        if len(embeddings) == 0:
+            return []
+        results = self._collection.query(
+            query_embeddings=np.asarray(embeddings).tolist(),
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+        )
+        ids = results.get("ids") or []
+        documents = results.get("documents") or []
+        metadatas = results.get("metadatas") or []
+        distances = results.get("distances") or []
+
+        hits = []
+        for i in range(len(embeddings)):
+            row = []
+            for j, passage_id in enumerate(ids[i] if i < len(ids) else []):
+                row.append(VectorHit(
+                    passage_id=passage_id,
+                    document=documents[i][j],
+                    metadata=(metadatas[i][j] if metadatas and metadatas[i] else None) or {},
+                    similarity=self._distance_to_similarity(distances[i][j]),
+                ))
+            hits.append(row)
+        return hits
+
+    def get(self, ids):
+        if not ids:
+            return {}
+        page = self._collection.get(ids=list(ids), include=["documents", "metadatas"])
+        return {
+            passage_id: (document, metadata or {})
+            for passage_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+        }
+
+    def version(self) -> str:
+        # Read on every call, so a build by another process is noticed too.
+        with open(self._stamp_path, "r") as f:
+            return f"chroma:{self._collection.name}:{f.read().strip()}"
+
+    def close(self):
+        client, self._client, self._collection = self._client, None, None
+        if client is None:
+            return
+        # Chroma has no public close, and clear_system_cache() would stop the
+        # clients of every path in the process. Evict and stop only this
+        # path's shared system so its files and threads are released.
+        systems = getattr(type(client), "_identifier_to_system", None)
+        system = systems.pop(getattr(client, "_identifier", None), None) if systems is not None else None
+        if system is not None:
+            system.stop()
+
+    def iter_all(self, batch_size: int = 1000):
+        """Yields `(ids, embeddings, documents, metadatas)` pages of the whole collection."""
+        for offset in range(0, self.count(), batch_size):
+            page = self._collection.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=offset,
+            )
+            yield (
+                page["ids"],
+                np.asarray(page["embeddings"], dtype=np.float32),
+                page["documents"],
+                [metadata or {} for metadata in page["metadatas"]],
+            )
+
+
+class _PassageTable:
+    """
+    SQLite side table mapping integer vector IDs to passage IDs, text and
+    metadata for the array-based stores. Deletes are tombstones so vector
+    positions stay stable until the store compacts them away.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS passages ("
+                " row_id INTEGER PRIMARY KEY,"
+                " passage_id TEXT UNIQUE NOT NULL,"
+                " document TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " deleted INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('stamp', ?)", (new_stamp(),))
+
+    def _restamp(self):
+        # Called inside the transaction that changes the passages.
+        self._conn.execute("UPDATE meta SET value = ? WHERE key = 'stamp'", (new_stamp(),))
+
+    def stamp(self) -> str:
+        with self._lock:
+            (stamp,) = self._conn.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        return stamp
+
+    def next_row_id(self) -> int:
+        with self._lock:
+            (max_id,) = self._conn.execute("SELECT MAX(row_id) FROM passages").fetchone()
+        return 0 if max_id is None else max_id + 1
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM passages WHERE deleted = 0").fetchone()
+        return count
+
+    def live_row_ids(self) -> np.ndarray:
+        with self._lock:
+            rows = self._conn.execute("SELECT row_id FROM passages WHERE deleted = 0 ORDER BY row_id").fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def purge_deleted(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM passages WHERE deleted = 1")
+
+    def compact(self) -> np.ndarray:
+        """
+        Drops tombstoned rows and renumbers the live ones 0..n-1 in their
+        current order. Returns the old row IDs, so `array[old_ids]` is the
+        compacted array.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM passages WHERE deleted = 1")
+            old_ids = [row[0] for row in self._conn.execute("SELECT row_id FROM passages ORDER BY row_id")]
+            # Ascending order: each new ID is at most the old one and already free.
+            self._conn.executemany(
+                "UPDATE passages SET row_id = ? WHERE row_id = ?",
+                [(new_id, old_id) for new_id, old_id in enumerate(old_ids) if new_id != old_id],
+            )
+        return np.array(old_ids, dtype=np.int64)
+
+    def lookup(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for passage_id, row_id, deleted in self._conn.execute(
+                    f"SELECT passage_id, row_id, deleted FROM passages WHERE passage_id IN ({placeholders})", chunk
+                ):
+                    found[passage_id] = {"row_id": row_id, "deleted": bool(deleted)}
+        return found
+
+    def insert(self, rows: List[tuple]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO passages (row_id, passage_id, document, metadata) VALUES (?, ?, ?, ?)", rows
+            )
+            self._restamp()
+
+    def set_deleted(self, ids: List[str], deleted: bool):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE passages SET deleted = ? WHERE passage_id = ?", [(int(deleted), i) for i in ids]
+            )
+            self._restamp()
+
+    def fetch(self, row_ids: Iterable[int]) -> Dict[int, tuple]:
+        row_ids = [int(r) for r in row_ids]
+        if not row_ids:
+            return {}
+        placeholders = ",".join("?" * len(row_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT row_id, passage_id, document, metadata FROM passages"
+                f" WHERE deleted = 0 AND row_id IN ({placeholders})",
+                row_ids,
+            ).fetchall()
+        return {row[0]: (row[1], row[2], json.loads(row[3])) for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def fetch_by_passage_ids(self, ids: Iterable[str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        ids = list(ids)
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for passage_id, document, metadata in self._conn.execute(
+                    f"SELECT passage_id, document, metadata FROM passages"
+                    f" WHERE deleted = 0 AND passage_id IN ({placeholders})",
+                    chunk,
+                ):
+                    found[passage_id] = (document, json.loads(metadata))
+        return found
+
+
+class FaissVectorStore(VectorStore):
+    """
+    Vector store backed by a FAISS index persisted in `data/embedded_corpus/`.
+
+    `index_type` is 'flat' (exact, for small corpora), 'ivf' or 'hnsw'
+    (approximate, for large ones). A saved index is memory-mapped at load so
+    several workers on one host share its pages; it is only read into private
+    memory when new vectors are written. `nprobe` (IVF) and `ef_search`
+    (HNSW) trade recall for latency at query time.
+    """
+
+    INDEX_FILE = "index.faiss"
+    TABLE_FILE = "passages.sqlite3"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dimension: Optional[int] = None,
+        index_type: Optional[str] = None,
+        nlist: Optional[int] = None,
+        hnsw_m: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ):
+        import faiss
+        self._faiss = faiss
+
+        self.path = path or env_str("FACTOS_FAISS_DIR", DEFAULT_FAISS_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+        self.dimension = dimension
+        self.index_type = index_type or env_str("FACTOS_FAISS_INDEX", "flat")
+        self.nlist = nlist or env_int("FACTOS_FAISS_NLIST", 1024)
+        self.hnsw_m = hnsw_m or env_int("FACTOS_FAISS_HNSW_M", 32)
+        self.nprobe = nprobe or env_int("FACTOS_FAISS_NPROBE", 16)
+        self.ef_search = ef_search or env_int("FACTOS_FAISS_EF_SEARCH", 64)
+        self.compact_ratio = env_float("FACTOS_TOMBSTONE_COMPACT_RATIO", 0.2)
+        if self.index_type not in ("flat", "ivf", "hnsw"):
+            raise ValueError(f"Unknown FAISS index type '{self.index_type}', expected 'flat', 'ivf' or 'hnsw'.")
+
+        self._table = _PassageTable(os.path.join(self.path, self.TABLE_FILE))
+        self._lock = threading.RLock()
+        self._index = None
+        self._mmapped = False
+        self._dirty = False
+
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            self._index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self._mmapped = True
+            self.dimension = self._index.d
+            print(f"[FaissVectorStore] Memory-mapped index with {self._index.ntotal} vectors from {index_path}.")
+        self._apply_search_params()
+
+    def _apply_search_params(self):
+        if self._index is None:
+            return
+        base = self._faiss.downcast_index(
+            self._index.index if isinstance(self._index, self._faiss.IndexIDMap) else self._index
+        )
+        if isinstance(base, self._faiss.IndexIVF):
+            base.nprobe = self.nprobe
+        elif isinstance(base, self._faiss.IndexHNSW):
+            base.hnsw.efSearch = self.ef_search
+
+    def _create_index(self, training_vectors: np.ndarray):
+        faiss = self._faiss
+        dimension = training_vectors.shape[1]
+        if self.index_type == "ivf":
+            # IVF needs training data; keep at least ~39 training points per list.
+            nlist = max(1, min(self.nlist, len(training_vectors) // 39))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(training_vectors)
+            index.own_fields = True
+            quantizer.this.disown()
+        elif self.index_type == "hnsw":
+            index = faiss.IndexIDMap(faiss.IndexHNSWFlat(dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT))
+        else:
+            index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+        self.dimension = dimension
+        self._index = index
+        self._apply_search_params()
+
+    def _index_contents(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row IDs and vectors of everything in the index, tombstones included."""
+        if isinstance(self._index, self._faiss.IndexIDMap):
+            ids = self._faiss.vector_to_array(self._index.id_map)
+            return ids, self._index.index.reconstruct_n(0, self._index.ntotal)
+
+        from faiss.contrib.inspect_tools import get_invlist
+
+        index = self._faiss.downcast_index(self._index)
+        ids, vectors = [], []
+        for list_no in range(index.nlist):
+            list_ids, codes = get_invlist(index.invlists, list_no)
+            ids.append(list_ids)
+            # IVF-Flat stores the raw float32 vectors as its codes.
+            vectors.append(codes.view(np.float32).reshape(len(list_ids), index.d))
+        return np.concatenate(ids), np.ascontiguousarray(np.concatenate(vectors))
+
+    def _rebuild(self, ids: np.ndarray, vectors: np.ndarray):
+        self._create_index(vectors)
+        self._index.add_with_ids(vectors, ids)
+        self._mmapped = False
+
+    def _retrain_ivf(self):
+        """
+        Rebuilds an IVF index trained on too little data, e.g. the first small
+        batch of a build, once the stored vectors support at least twice as
+        many lists. Otherwise every later vector lands in the same few lists
+        and search degrades towards a full scan.
+        """
+        index = self._faiss.downcast_index(self._index)
+        if max(1, min(self.nlist, index.ntotal // 39)) < 2 * index.nlist:
+            return
+        old_nlist = index.nlist
+        self._rebuild(*self._index_contents())
+        print(f"[FaissVectorStore] Retrained IVF index on {self._index.ntotal} vectors: {old_nlist} -> {self._index.nlist} lists.")
+
+    def _compact(self) -> bool:
+        """
+        Rebuilds the index from the live rows once tombstoned vectors make up
+        `compact_ratio` of it, so deleted passages stop taking search slots.
+        """
+        dead = self._index.ntotal - self._table.count()
+        if dead <= 0 or dead < self.compact_ratio * self._index.ntotal:
+            return False
+        ids, vectors = self._index_contents()
+        keep = np.isin(ids, self._table.live_row_ids())
+        if keep.any():
+            self._rebuild(np.ascontiguousarray(ids[keep]), np.ascontiguousarray(vectors[keep]))
+        else:
+            self._index = None
+            self._mmapped = False
+        self._table.purge_deleted()
+        print(f"[FaissVectorStore] Compacted index: dropped {dead} deleted vectors.")
+        return True
+
+    def _ensure_writable(self):
+        # Memory-mapped indexes are read-only; load a private copy before the first write.
+        if self._mmapped:
+            self._index = self._faiss.read_index(os.path.join(self.path, self.INDEX_FILE))
+            self._mmapped = False
+            self._apply_search_params()
+
+    def count(self) -> int:
+        return self._table.count()
+
+    def existing_ids(self, ids):
+        return {passage_id for passage_id, row in self._table.lookup(ids).items() if not row["deleted"]}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._lock:
+            known = self._table.lookup(ids)
+            # IDs are content hashes, so a known ID already has the right vector.
+            revived = [passage_id for passage_id in ids if passage_id in known and known[passage_id]["deleted"]]
+            if revived:
+                self._table.set_deleted(revived, False)
+
+            new_rows = [i for i, passage_id in enumerate(ids) if passage_id not in known]
+            if not new_rows:
+                return
+            vectors = embeddings[new_rows]
+            if self._index is None:
+                self._create_index(vectors)
+            self._ensure_writable()
+
+            start = self._table.next_row_id()
+            row_ids = np.arange(start, start + len(new_rows), dtype=np.int64)
+            self._index.add_with_ids(vectors, row_ids)
+            self._table.insert([
+                (int(row_id), ids[i], documents[i], json.dumps(metadatas[i]))
+                for row_id, i in zip(row_ids, new_rows)
+            ])
+            self._dirty = True
+
+    def delete(self, ids):
+        if ids:
+            self._table.set_deleted(list(ids), True)
+
+    def query(self, embeddings, k):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(embeddings) == 0:
+            return []
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return [[] for _ in range(len(embeddings))]
+            # Tombstoned vectors stay in the index until the next compaction;
+            # fetch past all of them so they cannot crowd out live hits.
+            dead = max(0, self._index.ntotal - self._table.count())
+            scores, row_ids = self._index.search(embeddings, min(self._index.ntotal, k + dead))
+
+        rows = self._table.fetch({int(r) for r in row_ids.ravel() if r >= 0})
+        hits = []
+        for score_row, id_row in zip(scores, row_ids):
+            row = []
+            for score, row_id in zip(score_row, id_row):
+                if row_id < 0 or int(row_id) not in rows:
+                    continue
+                passage_id, document, metadata = rows[int(row_id)]
+                row.append(VectorHit(passage_id=passage_id, document=document, metadata=metadata, similarity=float(score)))
+                if len(row) == k:
+                    break
+            hits.append(row)
+        return hits
+
+    def get(self, ids):
+        return self._table.fetch_by_passage_ids(ids)
+
+    def persist(self):
+        with self._lock:
+            if self._index is not None and self._compact():
+                self._dirty = True
+            if not self._dirty:
+                return
+            index_path = os.path.join(self.path, self.INDEX_FILE)
+            if self._index is None:
+                # Every passage was deleted.
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                self._dirty = False
+                return
+            if self.index_type == "ivf":
+                self._retrain_ivf()
+            tmp_path = f"{index_path}.tmp"
+            self._faiss.write_index(self._index, tmp_path)
+            os.replace(tmp_path, index_path)
+            self._dirty = False
+            print(f"[FaissVectorStore] Saved index with {self._index.ntotal} vectors to {index_path}.")
+
+    def close(self):
+        with self._lock:
+            self._index = None
+            self._table.close()
+
+    def version(self) -> str:
+        return f"faiss:{self.index_type}:{self._table.stamp()}"
+
+
+class QuantizedVectorStore(VectorStore):
+    """
+    Compact vector store for CPU-only deployments.
+
+    Vectors live in one contiguous memory-mapped array, either as float16 or
+    as int8 codes with a per-vector float32 scale. Search is a blocked matrix
+    multiply of all queries against the whole array at once. When
+    `rescore` is enabled a float32 copy is kept on disk and only the
+    shortlisted rows are read from it to re-rank with full precision.
+    """
+
+    TABLE_FILE = "passages.sqlite3"
+    CODES_FILE = "codes.npy"
+    SCALES_FILE = "scales.npy"
+    FULL_FILE = "full.npy"
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        dtype: Optional[str] = None,
+        rescore: Optional[bool] = None,
+        rescore_factor: Optional[int] = None,
+        block_size: int = 65536,
+    ):
+        self.path = path or env_str("FACTOS_QUANT_DIR", DEFAULT_QUANT_DIR)
+        os.makedirs(self.path, exist_ok=True)
+        self.manifest_path = os.path.join(self.path, "manifest.json")
+        self.dtype = dtype or env_str("FACTOS_QUANT_DTYPE", "int8")
+        if self.dtype not in ("int8", "float16"):
+            raise ValueError(f"Unknown quantized dtype '{self.dtype}', expected 'int8' or 'float16'.")
+        self.rescore = rescore if rescore is not None else env_bool("FACTOS_QUANT_RESCORE", False)
+        self.rescore_factor = rescore_factor or env_int("FACTOS_QUANT_RESCORE_FACTOR", 4)
+        self.compact_ratio = env_float("FACTOS_TOMBSTONE_COMPACT_RATIO", 0.2)
+        self.block_size = block_size
+
+        self._table = _PassageTable(os.path.join(self.path, self.TABLE_FILE))
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load_array(self, name: str) -> Optional[np.ndarray]:
+        path = self._file(name)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def _load(self):
+        self._codes = self._load_array(self.CODES_FILE)
+        self._scales = self._load_array(self.SCALES_FILE)
+        self._full = self._load_array(self.FULL_FILE)
+        if self._codes is not None:
+            print(f"[QuantizedVectorStore] Memory-mapped {len(self._codes)} {self._codes.dtype} vectors from {self.path}.")
+
+    def _save_array(self, name: str, array: np.ndarray):
+        tmp_path = self._file(name + ".tmp.npy")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, self._file(name))
+
+    def quantize(self, embeddings: np.ndarray):
+        """Returns `(codes, scales)`; scales are None for float16."""
+        if self.dtype == "float16":
+            return embeddings.astype(np.float16), None
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _dequantize(self, stop: int) -> np.ndarray:
+        vectors = np.asarray(self._codes[:stop], dtype=np.float32)
+        if self._scales is not None:
+            vectors *= np.asarray(self._scales[:stop])[:, None]
+        return vectors
+
+    def count(self) -> int:
+        return self._table.count()
+
+    def existing_ids(self, ids):
+        return {passage_id for passage_id, row in self._table.lookup(ids).items() if not row["deleted"]}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._lock:
+            known = self._table.lookup(ids)
+            revived = [passage_id for passage_id in ids if passage_id in known and known[passage_id]["deleted"]]
+            if revived:
+                self._table.set_deleted(revived, False)
+
+            new_rows = [i for i, passage_id in enumerate(ids) if passage_id not in known]
+            if not new_rows:
+                return
+            vectors = embeddings[new_rows]
+            codes, scales = self.quantize(vectors)
+
+            # Row IDs are positions in the arrays, so the table and arrays grow together.
+            start = len(self._codes) if self._codes is not None else 0
+            self._codes = codes if self._codes is None else np.concatenate([self._codes, codes])
+            if scales is not None:
+                self._scales = scales if self._scales is None else np.concatenate([self._scales, scales])
+            # Once kept, full vectors must cover every row, whether or not rescoring is on now.
+            if self.rescore or self._full is not None:
+                if self._full is None and start:
+                    print(f"[QuantizedVectorStore] Rescoring enabled on a store without full vectors; backfilling {start} rows by dequantizing.")
+                    self._full = self._dequantize(start)
+                self._full = vectors if self._full is None else np.concatenate([self._full, vectors])
+
+            self._table.insert([
+                (start + offset, ids[i], documents[i], json.dumps(metadatas[i]))
+                for offset, i in enumerate(new_rows)
+            ])
+            self._dirty = True
+
+    def delete(self, ids):
+        if ids:
+            self._table.set_deleted(list(ids), True)
+
+    def _compact(self) -> bool:
+        """
+        Drops the rows of deleted passages from the arrays once they make up
+        `compact_ratio` of them, so they stop taking shortlist slots.
+        """
+        dead = len(self._codes) - self._table.count()
+        if dead <= 0 or dead < self.compact_ratio * len(self._codes):
+            return False
+        keep = self._table.compact()
+        self._codes = np.asarray(self._codes[keep])
+        if self._scales is not None:
+            self._scales = np.asarray(self._scales[keep])
+        if self._full is not None:
+            self._full = np.asarray(self._full[keep])
+        print(f"[QuantizedVectorStore] Compacted arrays: dropped {dead} deleted rows.")
+        return True
+
+    def persist(self):
+        with self._lock:
+            if self._codes is not None and self._compact():
+                self._dirty = True
+            if not self._dirty:
+                return
+            self._save_array(self.CODES_FILE, self._codes)
+            if self._scales is not None:
+                self._save_array(self.SCALES_FILE, self._scales)
+            if self._full is not None:
+                self._save_array(self.FULL_FILE, self._full)
+            self._dirty = False
+            # Re-open as memory maps so the in-memory copies can be released.
+            self._load()
+
+    def close(self):
+        with self._lock:
+            # Dropping the last reference unmaps the arrays.
+            self._codes = self._scales = self._full = None
+            self._table.close()
+
+    def _search_rows(self, queries: np.ndarray, k: int):
+        """Blocked top-k over all stored vectors. Returns `(scores, rows)`, best first."""
+        n = len(self._codes)
+        k = min(k, n)
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+
+        for start in range(0, n, self.block_size):
+            block = np.asarray(self._codes[start:start + self.block_size], dtype=np.float32)
+            scores = queries @ block.T
+            if self._scales is not None:
+                scores *= self._scales[start:start + len(block)][None, :]
+
+            rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, rows], axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_scores, order, axis=1), np.take_along_axis(best_rows, order, axis=1)
+
+    def _rescore(self, queries: np.ndarray, rows: np.ndarray):
+        # Only the shortlisted rows are read from the full-precision file.
+        scores = np.einsum("qd,qkd->qk", queries, np.asarray(self._full[rows.ravel()]).reshape(*rows.shape, -1))
+        order = np.argsort(-scores, axis=1)
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+    def query(self, embeddings, k):
+        queries = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(queries) == 0:
+            return []
+        with self._lock:
+            if self._codes is None or len(self._codes) == 0:
+                return [[] for _ in range(len(queries))]
+            # Full vectors written before rows were kept aligned cannot be used.
+            rescore = self.rescore and self._full is not None and len(self._full) == len(self._codes)
+            shortlist = k * self.rescore_factor if rescore else k
+            # Deleted rows stay in the arrays until the next compaction; fetch
+            # past all of them so they cannot crowd out live hits.
+            dead = max(0, len(self._codes) - self._table.count())
+            scores, rows = self._search_rows(queries, shortlist + dead)
+            if rescore:
+                scores, rows = self._rescore(queries, rows)
+
+        found = self._table.fetch({int(r) for r in rows.ravel()})
+        hits = []
+        for score_row, row_ids in zip(scores, rows):
+            row = []
+            for score, row_id in zip(score_row, row_ids):
+                if int(row_id) not in found:
+                    continue
+                passage_id, document, metadata = found[int(row_id)]
+                row.append(VectorHit(passage_id=passage_id, document=document, metadata=metadata, similarity=float(score)))
+                if len(row) == k:
+                    break
+            hits.append(row)
+        return hits
+
+    def get(self, ids):
+        return self._table.fetch_by_passage_ids(ids)
+
+    def version(self) -> str:
+        return f"quantized:{self.dtype}:{self._table.stamp()}"
+
+
+def evaluate_recall(candidate: VectorStore, reference: VectorStore, queries: np.ndarray, k: int = 10) -> Dict[str, float]:
+    """
+    Compares `candidate` against `reference` on the same queries.
+    Reports recall@k of the reference top-k IDs, how often the top-1 agrees,
+    and the mean absolute difference of the top-1 similarity scores.
+    """
+    candidate_hits = candidate.query(queries, k)
+    reference_hits = reference.query(queries, k)
+
+    recalls, top1_agreement, score_errors = [], [], []
+    for cand, ref in zip(candidate_hits, reference_hits):
+        if not ref:
+            continue
+        ref_ids = {hit.passage_id for hit in ref}
+        cand_ids = {hit.passage_id for hit in cand}
+        recalls.append(len(ref_ids & cand_ids) / len(ref_ids))
+        top1_agreement.append(float(bool(cand) and cand[0].passage_id == ref[0].passage_id))
+        if cand:
+            score_errors.append(abs(cand[0].similarity - ref[0].similarity))
+
+    def mean(values: List[float]) -> float:
+        return float(np.mean(values)) if values else 0.0
+
+    return {
+        "queries": len(recalls),
+        f"recall@{k}": mean(recalls),
+        "top1_agreement": mean(top1_agreement),
+        "mean_top1_score_error": mean(score_errors),
+    }
@@ -1,13 +1,39 @@
 from typing import List
+from core.metrics import instrumented
 from schemas.messages import ScoredClaim
 
 
+def build_formatter_instruction(scored_claims: List[ScoredClaim]) -> str:
+    """Builds the prompt used by the LLM response formatter."""
+    # Create a string representation of the scored claims
+    claims_str = "\\n".join([
+        f"- Claim: {sc.claim.claim_text}\\n  Score: {sc.truth_score}\\n  Explanation: {sc.explanation}"
+        f"\\n  Source: {sc.fact_check.source_url or 'unknown'}"
+        for sc in scored_claims
+    ])
+
+    return f"""You are a fact-checking analyst. Your task is to generate a clear, concise, and user-friendly Markdown report based on the provided data.
+Your report should follow this structure exactly:
+
+1.  **Overall Verdict**: Start with a single, conclusive verdict for the main claim (e.g., "False", "Misleading", "True").
+2.  **Main Claim**: State the most important claim that was analyzed.
+3.  **Detailed Analysis**: Provide a paragraph explaining *why* the claim received its verdict. Synthesize the explanations from the provided data.
+4.  **Verified Sources**: List the sources that were used to verify the claims, using the source of each claim.
+5.  **Our Recommendation**: Write a corrected, more nuanced version of the main claim.
+6.  **Media Literacy Tip**: Provide a general, helpful tip for identifying similar misinformation in the future.
+
+Here is the data you must use:
+{claims_str}
+"""
+
+
 class ResponseFormatterAgent:
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         print("[ResponseFormatterAgent] Initializing...")
 
+    @instrumented("response_formatter")
     def run(self, scored_claims: List[ScoredClaim]) -> str:
         """
         Formats the final verification results into a user-friendly Markdown report.
@@ -24,7 +50,9 @@ class ResponseFormatterAgent:
             report += f"**Truth Score:** {sc.truth_score:.2f}/1.0\n"
             report += f"**Explanation:** {sc.explanation}\n"
             report += "**Closest Fact-Check:**\n"
-            report += f"> {sc.fact_check.match_document}\n"
+            report += f"> {sc.fact_check.snippet}\n"
+            if sc.fact_check.source_url:
+                report += f"Source: {sc.fact_check.source_url}\n"
             report += f"_(Match Similarity: {sc.fact_check.match_score:.2f})_\n\n"
             report += "---\n\n"
             
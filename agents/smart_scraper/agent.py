@@ -1,46 +1,38 @@
-import requests
-import json
 from typing import Dict, Any
-import os
+
+from core.firecrawl import FirecrawlClient, FirecrawlError
+from core.metrics import instrumented
+
 
 class SmartScraperAgent:
+    def __init__(self, client: FirecrawlClient = None):
+        # The shared client keeps Firecrawl connections alive between scrapes.
+        self._client = client if client is not None else FirecrawlClient()
+
+    def _parse_response(self, scraped_data: Dict[str, Any]) -> Dict[str, Any]:
+        if scraped_data.get("success"):
+            return {"content": scraped_data["data"].get("markdown", "")}
+        return {"error": f"API call failed: {scraped_data.get('error')}"}
+
+    @instrumented("smart_scraper")
     def run(self, url: str) -> Dict[str, Any]:
         """
-        Uses a direct REST API call to scrape the content of a single URL.
+        Uses the Firecrawl REST API to scrape the content of a single URL.
         """
         print(f"Scraping {url} with Firecrawl REST API...")
-        api_key = os.getenv("FIRECRAWL_API_KEY")
-
-        if not api_key:
-            return {"error": "FIRECRAWL_API_KEY environment variable not set."}
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}",
-        }
-        
-        scrape_url_endpoint = "https://api.firecrawl.dev/v1/scrape"
-        payload = {
-            "url": url,
-            "onlyMainContent": True
-        }
-
         try:
-            response = requests.post(scrape_url_endpoint, headers=headers, json=payload, timeout=60)
-            response.raise_for_status()
-            
-            scraped_data = response.json()
-            if scraped_data.get("success"):
-                return {"content": scraped_data["data"].get("markdown", "")}
-            else:
-                return {"error": f"API call failed: {scraped_data.get('error')}"}
+            return self._parse_response(self._client.scrape(url))
+        except FirecrawlError as e:
+            return {"error": str(e)}
 
-        except requests.exceptions.HTTPError as e:
-            error_details = ""
-            try:
-                error_details = e.response.json()
-            except json.JSONDecodeError:
-                error_details = e.response.text
-            return {"error": f"HTTP error during scrape: {e}. Details: {error_details}"}
-        except requests.exceptions.RequestException as e:
-            return {"error": f"Unexpected error during scrape: {e}"}
+    @instrumented("smart_scraper")
+    async def run_async(self, url: str) -> Dict[str, Any]:
+        """
+        Same as `run`, but performs the Firecrawl call with non-blocking I/O
+        so it can be awaited from the event loop.
+        """
+        print(f"Scraping {url} with Firecrawl REST API (async)...")
+        try:
+            return self._parse_response(await self._client.scrape_async(url))
+        except FirecrawlError as e:
+            return {"error": str(e)}
@@ -1,5 +1,6 @@
 from typing import List
 
+from core.metrics import instrumented
 from schemas.messages import FactCheck, ScoredClaim
 
 
@@ -9,6 +10,7 @@ class TruthScorerAgent:
         super().__init__(**kwargs)
         print("[TruthScorerAgent] Initializing...")
 
+    @instrumented("truth_scorer")
     def run(self, fact_checks: List[FactCheck]) -> List[ScoredClaim]:
         """
         Scores the truthfulness of claims based on their fact-check matches.
@@ -0,0 +1,71 @@
+import argparse
+import glob
+import os
+import statistics
+import time
+from typing import Dict, List
+
+from agents.claim_extractor.agent import EXTRACTION_MODES, ClaimExtractorAgent
+from core.registry import registry
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "articles")
+
+
+def load_articles(path: str) -> Dict[str, str]:
+    """Loads every markdown file in `path`, keyed by file name."""
+    articles = {}
+    for file_path in sorted(glob.glob(os.path.join(path, "*.md"))):
+        with open(file_path, "r") as f:
+            articles[os.path.basename(file_path)] = f.read()
+    return articles
+
+
+def benchmark_mode(extractor: ClaimExtractorAgent, articles: Dict[str, str], mode: str, repeats: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    chunks: List[int] = []
+    claims: List[int] = []
+    for _ in range(repeats):
+        for text in articles.values():
+            start = time.perf_counter()
+            extracted = extractor.run({"content": text}, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            chunks.append(len(extractor._split_into_chunks(text, mode)))
+            claims.append(len(extracted))
+    return {
+        "mean_s": statistics.mean(latencies),
+        "p50_s": statistics.median(latencies),
+        "max_s": max(latencies),
+        "chunks_per_article": statistics.mean(chunks),
+        "claims_per_article": statistics.mean(claims),
+    }
+
+
+def main():
+    """
+    Measures claim extraction latency per article for each extraction mode.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark ClaimExtractorAgent modes.")
+    parser.add_argument("--articles", default=FIXTURE_DIR, help="Directory of markdown articles.")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    articles = load_articles(args.articles)
+    if not articles:
+        raise SystemExit(f"No .md articles found in {args.articles}.")
+
+    extractor: ClaimExtractorAgent = registry.get("claim_extractor")
+    # Warm up so model initialization is not counted against the first mode.
+    extractor.run({"content": next(iter(articles.values()))})
+
+    print(f"--- Claim extraction benchmark: {len(articles)} articles x {args.repeats} repeats ---")
+    print(f"{'mode':<12} {'mean s':>8} {'p50 s':>8} {'max s':>8} {'chunks':>8} {'claims':>8}")
+    for mode in EXTRACTION_MODES:
+        result = benchmark_mode(extractor, articles, mode, args.repeats)
+        print(
+            f"{mode:<12} {result['mean_s']:>8.2f} {result['p50_s']:>8.2f} {result['max_s']:>8.2f} "
+            f"{result['chunks_per_article']:>8.1f} {result['claims_per_article']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+from transformers import AutoTokenizer
+
+from agents.claim_extractor.chunking import pack_sentences, split_sentences
+from benchmarks.claim_extraction import FIXTURE_DIR, load_articles
+from core.inference import INFERENCE_BACKENDS, SUMMARIZER_MODEL, load_embedder, load_summarizer
+
+
+def _lcs_length(a: List[str], b: List[str]) -> int:
+    previous = [0] * (len(b) + 1)
+    for token_a in a:
+        current = [0]
+        for j, token_b in enumerate(b):
+            current.append(previous[j] + 1 if token_a == token_b else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge_l(candidate: str, reference: str) -> float:
+    """ROUGE-L F1 between two summaries, on lower-cased whitespace tokens."""
+    a, b = candidate.lower().split(), reference.lower().split()
+    if not a or not b:
+        return 0.0
+    lcs = _lcs_length(a, b)
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(a), lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def benchmark_summarizer(backend: str, chunks: List[str], repeats: int) -> Dict:
+    start = time.perf_counter()
+    summarizer = load_summarizer(backend)
+    load_seconds = time.perf_counter() - start
+
+    latencies, summaries = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        outputs = summarizer(chunks, max_length=150, min_length=30, do_sample=False, truncation=True)
+        latencies.append((time.perf_counter() - start) / len(chunks))
+        summaries = [output["summary_text"] for output in outputs]
+    return {"load_s": load_seconds, "latency_s": statistics.median(latencies), "outputs": summaries}
+
+
+def benchmark_embedder(backend: str, sentences: List[str], repeats: int) -> Dict:
+    start = time.perf_counter()
+    embedder = load_embedder(backend)
+    load_seconds = time.perf_counter() - start
+
+    latencies, embeddings = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embeddings = embedder.encode(sentences, batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        latencies.append((time.perf_counter() - start) / len(sentences))
+    return {"load_s": load_seconds, "latency_s": statistics.median(latencies), "outputs": embeddings}
+
+
+def main():
+    """
+    Compares latency and output quality of every inference backend against
+    the stock PyTorch path, for both the summarizer and the embedder.
+    """
+    parser = argparse.ArgumentParser(description="Compare CPU inference backends.")
+    parser.add_argument("--articles", default=FIXTURE_DIR)
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    articles = load_articles(args.articles)
+    sentences = [s for text in articles.values() for s in split_sentences(text)]
+    # One full-size chunk per article, sized with the tokenizer every backend shares.
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+    chunks = [pack_sentences(split_sentences(text), tokenizer, 1022)[0] for text in articles.values()]
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    summarizer_results, embedder_results = {}, {}
+    for backend in backends:
+        summarizer_results[backend] = benchmark_summarizer(backend, chunks, args.repeats)
+        embedder_results[backend] = benchmark_embedder(backend, sentences, args.repeats)
+
+    baseline_summaries = summarizer_results["torch"]["outputs"]
+    baseline_embeddings = embedder_results["torch"]["outputs"]
+
+    print("--- Summarizer (facebook/bart-large-cnn) ---")
+    print(f"{'backend':<12} {'load s':>8} {'s/chunk':>9} {'speedup':>8} {'ROUGE-L vs torch':>17}")
+    for backend in backends:
+        result = summarizer_results[backend]
+        quality = statistics.mean(rouge_l(c, r) for c, r in zip(result["outputs"], baseline_summaries))
+        speedup = summarizer_results["torch"]["latency_s"] / result["latency_s"]
+        print(f"{backend:<12} {result['load_s']:>8.1f} {result['latency_s']:>9.3f} {speedup:>7.2f}x {quality:>17.3f}")
+
+    print("--- Embedder (all-MiniLM-L6-v2) ---")
+    print(f"{'backend':<12} {'load s':>8} {'ms/sent':>9} {'speedup':>8} {'cosine vs torch':>17}")
+    for backend in backends:
+        result = embedder_results[backend]
+        cosine = float(np.mean(np.sum(result["outputs"] * baseline_embeddings, axis=1)))
+        speedup = embedder_results["torch"]["latency_s"] / result["latency_s"]
+        print(f"{backend:<12} {result['load_s']:>8.1f} {result['latency_s'] * 1000:>9.2f} {speedup:>7.2f}x {cosine:>17.4f}")
+
+
+if __name__ == "__main__":
+    main()
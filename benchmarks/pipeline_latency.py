@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from benchmarks.claim_extraction import FIXTURE_DIR, load_articles
+from benchmarks.stubs import NullCache, StubFirecrawlServer, StubFormatter
+from core.claim_cache import ClaimVerdictCache
+from core.firecrawl import FirecrawlClient
+from core.pipeline import VerificationPipeline
+from core.registry import registry
+
+DEFAULT_URLS_FILE = os.path.join(os.path.dirname(__file__), "fixtures", "urls.jsonl")
+STAGES = ("scrape", "extract", "match", "score", "format")
+
+
+class TimedPipeline(VerificationPipeline):
+    """VerificationPipeline that records the wall time of every stage call."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+
+    async def _timed(self, stage: str, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[stage].append(time.perf_counter() - start)
+
+    async def scrape(self, url):
+        return await self._timed("scrape", super().scrape(url))
+
+    async def extract(self, scraped_data):
+        return await self._timed("extract", super().extract(scraped_data))
+
+    async def match(self, claims):
+        return await self._timed("match", super().match(claims))
+
+    async def score(self, fact_checks):
+        return await self._timed("score", super().score(fact_checks))
+
+    async def format(self, scored_claims):
+        return await self._timed("format", super().format(scored_claims))
+
+
+def load_urls(path: str) -> List[str]:
+    """Reads the `url` field of every JSONL line; lines without one are skipped."""
+    urls = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            url = json.loads(line).get("url")
+            if url:
+                urls.append(url)
+    return urls
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+    if len(samples) == 1:
+        return {"n": 1, "p50": samples[0], "p95": samples[0], "p99": samples[0]}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"n": len(samples), "p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+async def replay(pipeline: TimedPipeline, urls: List[str], concurrency: int) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def verify(url: str):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await pipeline.verify(url)
+            latencies.append(time.perf_counter() - start)
+            if result.get("error"):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify(url) for url in urls))
+    wall_seconds = time.perf_counter() - start
+    return {
+        "requests": len(urls),
+        "errors": errors,
+        "wall_s": wall_seconds,
+        "throughput_per_min": len(urls) / wall_seconds * 60 if wall_seconds else 0.0,
+        "end_to_end": percentiles(latencies),
+    }
+
+
+async def benchmark(pipeline: TimedPipeline, urls: List[str], concurrency: int) -> Dict[str, Any]:
+    # One untimed request loads every model before measuring.
+    await pipeline.verify(urls[0])
+    pipeline.timings.clear()
+    pipeline.cache.clear()
+    pipeline.claim_cache.clear()
+    return await replay(pipeline, urls, concurrency)
+
+
+def check_regression(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns a description of every metric that regressed by more than `tolerance`."""
+    failures = []
+    for name, current in [("end_to_end", report["end_to_end"])] + [(s, report["stages"][s]) for s in STAGES]:
+        previous = baseline["end_to_end"] if name == "end_to_end" else baseline.get("stages", {}).get(name)
+        if previous and previous["p95"] and current["p95"] > previous["p95"] * (1 + tolerance):
+            failures.append(f"{name} p95 {current['p95']:.3f}s vs baseline {previous['p95']:.3f}s")
+    if report["throughput_per_min"] < baseline["throughput_per_min"] * (1 - tolerance):
+        failures.append(
+            f"throughput {report['throughput_per_min']:.1f}/min vs baseline {baseline['throughput_per_min']:.1f}/min"
+        )
+    return failures
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"--- Pipeline benchmark: {report['requests']} requests, concurrency {report['concurrency']} ---")
+    print(f"{'stage':<12} {'n':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for name in STAGES + ("end_to_end",):
+        row = report["end_to_end"] if name == "end_to_end" else report["stages"][name]
+        print(f"{name:<12} {row['n']:>6} {row['p50']:>8.3f} {row['p95']:>8.3f} {row['p99']:>8.3f}")
+    print(f"Throughput: {report['throughput_per_min']:.1f} articles/min ({report['errors']} errors, {report['wall_s']:.1f}s wall)")
+    print(f"Peak RSS: {report['peak_rss_mb']['self']:.0f} MiB (this process), {report['peak_rss_mb']['children']:.0f} MiB (largest worker)")
+
+
+def main():
+    """
+    Replays a URL list through the full pipeline without touching the network:
+    scrapes are served by a local stub Firecrawl with the fixture articles and
+    the Gemini formatter is replaced by a fixed-latency local renderer. The
+    summarizer, embedder and vector store are the real ones, so model and
+    search regressions show up in the per-stage numbers.
+    """
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark.")
+    parser.add_argument("--urls", default=DEFAULT_URLS_FILE, help="JSONL file with a 'url' field per line.")
+    parser.add_argument("--articles", default=FIXTURE_DIR, help="Directory of markdown articles served by the stub.")
+    parser.add_argument("--repeat", type=int, default=3, help="Times the URL list is replayed.")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--firecrawl-latency-ms", type=float, default=50.0)
+    parser.add_argument("--firecrawl-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--cache", action="store_true", help="Keep the verification and claim-verdict caches enabled.")
+    parser.add_argument("--json-out", help="Write the report as JSON, e.g. to use as a baseline.")
+    parser.add_argument("--baseline", help="Previous --json-out report to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95/throughput regression (fraction).")
+    args = parser.parse_args()
+
+    urls = load_urls(args.urls) * args.repeat
+    if not urls:
+        raise SystemExit(f"No URLs found in {args.urls}.")
+
+    server = StubFirecrawlServer(
+        load_articles(args.articles),
+        latency_ms=args.firecrawl_latency_ms,
+        error_rate=args.firecrawl_error_rate,
+    ).start()
+    registry.register("firecrawl_client", lambda: FirecrawlClient(base_url=server.url, per_host_rate=0.0))
+
+    pipeline = TimedPipeline(
+        executor_kind=args.executor,
+        model_workers=args.workers,
+        formatter=StubFormatter(args.llm_latency_ms),
+        cache=None if args.cache else NullCache(persist=False),
+        claim_cache=None if args.cache else ClaimVerdictCache(enabled=False),
+    )
+    try:
+        report = asyncio.run(benchmark(pipeline, urls, args.concurrency))
+        report["concurrency"] = args.concurrency
+        report["stages"] = {stage: percentiles(pipeline.timings.get(stage, [])) for stage in STAGES}
+    finally:
+        # Wait for worker processes to exit so their peak RSS is reported.
+        pipeline.shutdown(wait=True)
+        server.stop()
+    report["peak_rss_mb"] = peak_rss_mb()
+
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            failures = check_regression(report, json.load(f), args.max_regression)
+        if failures:
+            print("Regressions against baseline:")
+            for failure in failures:
+                print(f"  - {failure}")
+            raise SystemExit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
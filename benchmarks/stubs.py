@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from agents.response_formatter.agent import ResponseFormatterAgent
+from benchmarks.claim_extraction import FIXTURE_DIR, load_articles
+from core.cache import VerificationCache
+from schemas.messages import ScoredClaim
+
+
+class StubFirecrawlServer:
+    """
+    Local Firecrawl-compatible server that answers `POST /v1/scrape` with
+    fixture articles. A URL whose path contains a fixture's name gets that
+    article; any other URL is mapped to a fixture by hash, so arbitrary URL
+    lists can be replayed. `latency_ms` and `error_rate` (503 responses)
+    simulate the real service.
+    """
+
+    def __init__(
+        self,
+        articles: Dict[str, str],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        if not articles:
+            raise ValueError("The stub server needs at least one fixture article.")
+        self._articles = {os.path.splitext(name)[0]: text for name, text in sorted(articles.items())}
+        self._names = list(self._articles)
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.requests = 0
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article_for(self, url: str) -> str:
+        path = urlsplit(url).path
+        for name in self._names:
+            if name in path:
+                return self._articles[name]
+        index = int(hashlib.sha256(url.encode("utf-8")).hexdigest(), 16) % len(self._names)
+        return self._articles[self._names[index]]
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        with self._random_lock:
+            self.requests += 1
+        if request.path != "/v1/scrape":
+            self._reply(request, 404, {"success": False, "error": "Not found"})
+            return
+        length = int(request.headers.get("Content-Length") or 0)
+        try:
+            url = json.loads(request.rfile.read(length) or b"{}")["url"]
+        except (ValueError, KeyError):
+            self._reply(request, 400, {"success": False, "error": "Body must be JSON with a 'url'."})
+            return
+
+        with self._random_lock:
+            fail = self._random.random() < self.error_rate
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if fail:
+            self._reply(request, 503, {"success": False, "error": "Simulated overload"})
+            return
+        self._reply(request, 200, {
+            "success": True,
+            "data": {"markdown": self.article_for(url), "metadata": {"sourceURL": url}},
+        })
+
+    @staticmethod
+    def _reply(request: BaseHTTPRequestHandler, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def start(self) -> "StubFirecrawlServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-firecrawl", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubFirecrawlServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StubFormatter:
+    """
+    Stands in for `LlmFormatter`: waits `latency_ms` to mimic the Gemini
+    round-trip, then renders the deterministic report locally.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self._local_formatter = ResponseFormatterAgent()
+
+    async def format(self, scored_claims: List[ScoredClaim]) -> str:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._local_formatter.run(scored_claims)
+
+    async def stream(self, scored_claims: List[ScoredClaim]) -> AsyncIterator[str]:
+        yield await self.format(scored_claims)
+
+
+class NullCache(VerificationCache):
+    """A verification cache that never hits, so every replayed URL runs every stage."""
+
+    def get_by_url(self, url: str, corpus_version: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def get_by_content(self, markdown: str, corpus_version: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def put(self, result: Dict[str, Any], corpus_version: str, url: Optional[str] = None, markdown: Optional[str] = None):
+        pass
+
+
+def main():
+    """
+    Serves the fixture articles on a local Firecrawl-compatible endpoint, so
+    the API can run offline with `FIRECRAWL_BASE_URL=http://127.0.0.1:<port>`.
+    """
+    parser = argparse.ArgumentParser(description="Run the stub Firecrawl server.")
+    parser.add_argument("--articles", default=FIXTURE_DIR, help="Directory of markdown articles.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubFirecrawlServer(
+        load_articles(args.articles),
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+    )
+    print(f"Stub Firecrawl serving {args.articles} on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,24 @@
+import argparse
+import asyncio
+import json
 import os
 import sys
+import time
+from typing import List, Optional, Set
+
 from agents.corpus_builder.agent import CorpusBuilderAgent
-from agents.fact_check_matcher.agent import FactCheckMatcherAgent
+from agents.fact_check_matcher.agent import FactCheckMatcherAgent, legacy_store_path, open_vector_store
+from agents.fact_check_matcher.indexing import CorpusManifest
+from agents.fact_check_matcher.snapshots import CorpusSnapshots, validate_snapshot
+from core.config import env_str
+
+DEFAULT_FACT_CHECKER_URLS = [
+    "https://www.factcheck.org/",
+    "https://reporterslab.org/fact-checking/",
+    "https://apnews.com/ap-fact-check",
+]
+DEFAULT_CHECKPOINT = "data/corpus_build_checkpoint.json"
+
 
 def load_env():
     """Manually loads environment variables from a .env file."""
@@ -15,39 +32,187 @@ def load_env():
     except FileNotFoundError:
         print("Warning: .env file not found. Relying on system environment variables.")
 
+
+def load_urls(path: str) -> List[str]:
+    """Reads one URL per line, or JSONL objects with a `url` field."""
+    urls = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            urls.append(json.loads(line)["url"] if line.startswith('{') else line)
+    return urls
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    try:
+        with open(path, 'r') as f:
+            return set(json.load(f).get("done", []))
+    except FileNotFoundError:
+        return set()
+
+
+def save_checkpoint(path: str, done: Set[str]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp_path, path)
+
+
+def served_passage_count(snapshots: CorpusSnapshots, current: Optional[str], backend: str, base_path: str) -> Optional[int]:
+    """Passages in the corpus being served, which the new build is validated against."""
+    if current is not None:
+        # Recorded at publish time; opening the served store here would write into it.
+        return snapshots.info(current).get("validation", {}).get("passages")
+    if not os.path.isdir(base_path):
+        return None
+    store = open_vector_store(backend, path=base_path)
+    try:
+        return store.count()
+    finally:
+        store.close()
+
+
+class BuildStats:
+    """Tracks crawl and embedding throughput for progress reports."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.failed = 0
+        self.embeddings = 0
+        self.embedding_seconds = 0.0
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        pages_per_sec = self.pages / elapsed if elapsed else 0.0
+        embeddings_per_sec = self.embeddings / self.embedding_seconds if self.embedding_seconds else 0.0
+        return (
+            f"{self.pages} pages ({self.failed} failed) in {elapsed:.1f}s, "
+            f"{pages_per_sec:.2f} pages/sec, {self.embeddings} embeddings at {embeddings_per_sec:.1f} embeddings/sec"
+        )
+
+
+async def build(urls: List[str], concurrency: int, batch_size: int, checkpoint_path: str, fact_matcher: FactCheckMatcherAgent):
+    done = load_checkpoint(checkpoint_path)
+    remaining = [url for url in urls if url not in done]
+    if done:
+        print(f"Resuming from checkpoint: {len(urls) - len(remaining)} of {len(urls)} URLs already indexed.")
+
+    corpus_builder = CorpusBuilderAgent()
+    stats = BuildStats()
+
+    async def write_batch(batch_urls: List[str], documents: List[str]):
+        # Embedding runs in a worker thread so the crawl keeps going meanwhile.
+        start = time.perf_counter()
+        stats.embeddings += await asyncio.to_thread(fact_matcher.add_documents, documents, batch_urls)
+        stats.embedding_seconds += time.perf_counter() - start
+        done.update(batch_urls)
+        save_checkpoint(checkpoint_path, done)
+        print(f"[build_corpus] Indexed batch of {len(documents)} documents. {stats.report()}")
+
+    batch_urls: List[str] = []
+    batch_documents: List[str] = []
+    pending_write = None
+
+    async for url, markdown in corpus_builder.crawl(remaining, concurrency=concurrency):
+        stats.pages += 1
+        if markdown is None:
+            # Failed pages are not checkpointed, so a resumed build retries them.
+            stats.failed += 1
+            continue
+        batch_urls.append(url)
+        batch_documents.append(markdown)
+
+        if len(batch_documents) >= batch_size:
+            if pending_write is not None:
+                await pending_write
+            pending_write = asyncio.create_task(write_batch(batch_urls, batch_documents))
+            batch_urls, batch_documents = [], []
+
+    if pending_write is not None:
+        await pending_write
+    if batch_documents:
+        await write_batch(batch_urls, batch_documents)
+
+    print(f"[build_corpus] Finished. {stats.report()}")
+
+
 def main():
     """
     Builds the fact-checking corpus by crawling specified websites
-    and adding their content to the ChromaDB vector store.
+    and adding their content to the vector store.
+
+    The build never touches the served index: it updates a staging copy of
+    it, validates the result and publishes it as a new corpus version, which
+    running servers switch to without a restart. `--rollback` serves the
+    previous version again.
     """
+    parser = argparse.ArgumentParser(description="Build the fact-check corpus.")
+    parser.add_argument("--urls-file", help="File with one URL per line (or JSONL with a `url` field).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum scrapes in flight.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Documents embedded and written per batch.")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Progress file used to resume a build.")
+    parser.add_argument("--fresh", action="store_true", help="Ignore any existing checkpoint and interrupted build.")
+    parser.add_argument("--rollback", action="store_true", help="Serve the previous corpus version again and exit.")
+    args = parser.parse_args()
+
+    backend = env_str("FACTOS_VECTOR_STORE", "chroma")
+    snapshots = CorpusSnapshots(backend)
+    if args.rollback:
+        try:
+            version = snapshots.rollback()
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        print(f"Rolled back: corpus version {version} is served again.")
+        return
+
     print("--- Starting Corpus Build Process ---")
 
     # Manually load environment variables first
     load_env()
 
-    # 1. Define the fact-checker sources
-    fact_checker_urls = [
-        "https://www.factcheck.org/",
-        "https://reporterslab.org/fact-checking/",
-        "https://apnews.com/ap-fact-check",
-    ]
+    fact_checker_urls = load_urls(args.urls_file) if args.urls_file else DEFAULT_FACT_CHECKER_URLS
 
-    # 2. Initialize the agents
-    # Make sure FIRECRAWL_API_KEY is set in your .env file
-    corpus_builder = CorpusBuilderAgent()
-    fact_matcher = FactCheckMatcherAgent()
+    # Start from the served corpus so unchanged documents are not embedded again.
+    current = snapshots.current()
+    base_path = snapshots.path(current) if current else legacy_store_path(backend)
+    staging_path, resumed = snapshots.prepare_staging(base_path, fresh=args.fresh)
+    # The checkpoint describes the staging copy, so it goes when the copy is new.
+    if not resumed and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(f"{'Resuming' if resumed else 'Building'} corpus in {staging_path} (serving {current or base_path}).")
 
-    # 3. Run the corpus builder to get the documents
-    documents = corpus_builder.run(urls=fact_checker_urls)
+    staged_store = open_vector_store(backend, path=staging_path)
+    fact_matcher = FactCheckMatcherAgent(vector_store=staged_store)
+    try:
+        asyncio.run(build(fact_checker_urls, args.concurrency, args.batch_size, args.checkpoint, fact_matcher))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
-    # 4. Add the scraped documents to the persistent vector database
-    if documents:
-        fact_matcher.add_documents(documents)
-    else:
-        print("No new documents found to add to the corpus.")
+    served_count = served_passage_count(snapshots, current, backend, base_path)
+    report = validate_snapshot(
+        staged_store,
+        fact_matcher.embed_claims,
+        CorpusManifest(staged_store.manifest_path),
+        previous_count=served_count,
+    )
+    print(f"Validation: {json.dumps(report)}")
+    if not report["ok"]:
+        print(f"Error: the new corpus failed validation and was not published; {current or base_path} is still served.")
+        print(f"The build is kept in {staging_path}; rerun to resume it or pass --fresh to start over.")
+        sys.exit(1)
 
+    version = snapshots.publish(report)
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(f"Published corpus version {version}; running servers switch to it on their next poll.")
     print("--- Corpus Build Process Finished ---")
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
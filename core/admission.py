@@ -0,0 +1,222 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from core.config import env_float, env_int
+from core.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_REQUESTS, STAGE_LIMIT_WAIT_SECONDS
+
+T = TypeVar("T")
+
+# Default concurrency per pipeline stage. Extraction is kept lowest because
+# every in-flight BART summarization holds its own activations in memory.
+STAGE_DEFAULTS = {"scrape": 16, "extract": 2, "match": 4, "format": 8}
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of queued; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away and the verification was cancelled."""
+
+
+class AdmissionSlot:
+    """An admitted request's hold on `weight` active slots. Releasing twice is harmless."""
+
+    def __init__(self, controller: "AdmissionController", weight: int = 1):
+        self._controller = controller
+        self.weight = weight
+        self._started_at = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self.weight, time.monotonic() - self._started_at)
+
+
+class AdmissionController:
+    """
+    Admission control for the verification endpoints.
+
+    At most `max_active` verifications (`FACTOS_MAX_ACTIVE_REQUESTS`) run at
+    once and at most `max_queued` more (`FACTOS_MAX_QUEUED_REQUESTS`) wait for
+    a slot. A request that finds the queue full is rejected at once with 429;
+    one that waits longer than `queue_timeout` seconds
+    (`FACTOS_QUEUE_TIMEOUT_SECONDS`) gets 503. Both carry a Retry-After
+    estimated from the recent request duration and the current backlog.
+
+    A request can weigh more than one slot (a batch is charged one per URL).
+    Waiting requests are admitted strictly in arrival order, so a heavy
+    request is not starved by a stream of light ones.
+    """
+
+    def __init__(self, max_active: Optional[int] = None, max_queued: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.max_active = max(1, max_active or env_int("FACTOS_MAX_ACTIVE_REQUESTS", 8))
+        self.max_queued = max(0, max_queued if max_queued is not None else env_int("FACTOS_MAX_QUEUED_REQUESTS", 32))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else env_float("FACTOS_QUEUE_TIMEOUT_SECONDS", 10.0)
+        self._waiters: "deque[Tuple[int, asyncio.Future]]" = deque()
+        self._active = 0
+        self._queued = 0
+        # Exponentially weighted mean request duration, seeded with a typical verification.
+        self._mean_duration = 10.0
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0, "disconnected": 0}
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free: the mean duration times the backlog in rounds."""
+        rounds = math.ceil((self._queued + 1) / self.max_active)
+        return int(min(120, max(1, math.ceil(self._mean_duration * rounds))))
+
+    def _shed(self, outcome: str, status_code: int, reason: str):
+        self._counters[outcome] += 1
+        ADMISSION_REQUESTS.inc(outcome=outcome)
+        raise Overloaded(status_code, reason, self.retry_after())
+
+    async def acquire(self, weight: int = 1) -> AdmissionSlot:
+        """Waits for `weight` active slots, or raises `Overloaded` when the request is shed."""
+        # Capped so a request heavier than the whole server still runs, alone.
+        weight = max(1, min(weight, self.max_active))
+        # Counted without awaiting, so a burst arriving together cannot overfill the queue.
+        if self._active + self._queued + weight > self.max_active + self.max_queued:
+            self._shed("rejected", 429, "Too many verifications are queued.")
+
+        start = time.monotonic()
+        if self._waiters or self._active + weight > self.max_active:
+            waiter = (weight, asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            self._queued += weight
+            try:
+                await asyncio.wait_for(waiter[1], timeout=self.queue_timeout)
+            except BaseException as e:
+                if waiter[1].done() and not waiter[1].cancelled():
+                    # Granted just as the wait ended: hand the slots on.
+                    self._active -= weight
+                elif waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    self._queued -= weight
+                self._wake()
+                if isinstance(e, asyncio.TimeoutError):
+                    self._shed("timed_out", 503, f"No verification slot became free within {self.queue_timeout:g}s.")
+                raise
+        else:
+            self._active += weight
+
+        ADMISSION_QUEUE_SECONDS.observe(time.monotonic() - start)
+        ADMISSION_REQUESTS.inc(outcome="admitted")
+        self._counters["admitted"] += 1
+        return AdmissionSlot(self, weight)
+
+    def _wake(self):
+        """Admits waiting requests in arrival order while their weight fits."""
+        while self._waiters:
+            weight, future = self._waiters[0]
+            if future.done():
+                # Timed out or cancelled; its own cleanup has not run yet.
+                self._waiters.popleft()
+                self._queued -= weight
+                continue
+            if self._active + weight > self.max_active:
+                return
+            self._waiters.popleft()
+            self._queued -= weight
+            self._active += weight
+            future.set_result(None)
+
+    def _release(self, weight: int, duration: float):
+        self._active -= weight
+        self._mean_duration = 0.8 * self._mean_duration + 0.2 * duration
+        self._wake()
+
+    @asynccontextmanager
+    async def admit(self, weight: int = 1):
+        slot = await self.acquire(weight)
+        try:
+            yield slot
+        finally:
+            slot.release()
+
+    def record_disconnect(self):
+        self._counters["disconnected"] += 1
+        ADMISSION_REQUESTS.inc(outcome="disconnected")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "active": self._active,
+            "queued": self._queued,
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "queue_timeout_s": self.queue_timeout,
+            "mean_duration_s": round(self._mean_duration, 3),
+            "retry_after_s": self.retry_after(),
+        }
+
+
+class StageLimits:
+    """
+    Caps how many calls of each pipeline stage run at once, across all
+    requests. Limits come from `FACTOS_<STAGE>_CONCURRENCY` (e.g.
+    `FACTOS_EXTRACT_CONCURRENCY`); 0 leaves a stage unlimited.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        limits = limits or {}
+        self.limits = {
+            stage: limits.get(stage, env_int(f"FACTOS_{stage.upper()}_CONCURRENCY", default))
+            for stage, default in STAGE_DEFAULTS.items()
+        }
+        self._semaphores = {stage: asyncio.Semaphore(limit) for stage, limit in self.limits.items() if limit > 0}
+        self._active = {stage: 0 for stage in self.limits}
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            yield
+            return
+        start = time.monotonic()
+        async with semaphore:
+            STAGE_LIMIT_WAIT_SECONDS.observe(time.monotonic() - start, stage=name)
+            self._active[name] += 1
+            try:
+                yield
+            finally:
+                self._active[name] -= 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {stage: {"limit": limit, "active": self._active[stage]} for stage, limit in self.limits.items()}
+
+
+async def cancel_on_disconnect(
+    awaitable: Awaitable[T],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    poll_seconds: Optional[float] = None,
+) -> T:
+    """
+    Awaits `awaitable` as a task and cancels it as soon as `is_disconnected`
+    reports that the client went away, so no further stage runs for a
+    response nobody will read.
+    Work already handed to an executor thread finishes, but its result is dropped.
+    """
+    poll_seconds = poll_seconds if poll_seconds is not None else env_float("FACTOS_DISCONNECT_POLL_SECONDS", 0.5)
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_seconds)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
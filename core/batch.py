@@ -0,0 +1,132 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
+
+from core.registry import registry
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_pipeline = None
+
+
+def _init_batch_worker(workers: int):
+    """Loads every model once per worker process and keeps one event loop for its lifetime."""
+    global _worker_loop, _worker_pipeline
+    # Split the cores between workers instead of letting each one use all of them.
+    os.environ.setdefault("FACTOS_INTRA_OP_THREADS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+    from core.pipeline import VerificationPipeline
+
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    # Model stages run on a single thread: parallelism comes from the processes.
+    _worker_pipeline = VerificationPipeline(executor_kind="thread", model_workers=1)
+    registry.warm_up()
+
+
+def _verify_in_worker(url: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        result = _worker_loop.run_until_complete(_worker_pipeline.verify(url))
+    except Exception as e:
+        result = {"url": url, "error": f"Verification failed: {e}", "claims": [], "report": None}
+    return {**result, "elapsed_s": round(time.perf_counter() - start, 3)}
+
+
+def read_urls(path: str) -> List[str]:
+    """Reads the `url` field of every JSONL line, dropping duplicates but keeping order."""
+    urls = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            url = json.loads(line).get("url")
+            if url:
+                urls.append(url)
+    return list(dict.fromkeys(urls))
+
+
+def completed_urls(output_path: str, retry_errors: bool = False) -> Set[str]:
+    """URLs that already have a result in `output_path`. A torn last line is ignored."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if retry_errors and result.get("error"):
+                continue
+            done.add(result.get("url"))
+    return done
+
+
+def _open_for_append(output_path: str):
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    needs_newline = False
+    if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    output = open(output_path, "a")
+    if needs_newline:
+        # Terminate a line torn by an earlier crash so the next result starts cleanly.
+        output.write("\n")
+    return output
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 2, retry_errors: bool = False) -> Dict[str, Any]:
+    """
+    Verifies every URL in `input_path` across `workers` processes and appends
+    one JSON result per line to `output_path` as each finishes. URLs already
+    in the output are skipped, so an interrupted run resumes where it stopped.
+    """
+    urls = read_urls(input_path)
+    done = completed_urls(output_path, retry_errors)
+    pending = [url for url in urls if url not in done]
+    print(f"{len(urls)} URLs in {input_path}: {len(urls) - len(pending)} already done, {len(pending)} to verify.")
+    summary = {"total": len(urls), "skipped": len(urls) - len(pending), "verified": 0, "errors": 0, "elapsed_s": 0.0}
+    if not pending:
+        return summary
+
+    start = time.perf_counter()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_batch_worker,
+        initargs=(workers,),
+    )
+    try:
+        with _open_for_append(output_path) as output:
+            futures = {executor.submit(_verify_in_worker, url): url for url in pending}
+            for future in as_completed(futures):
+                result = future.result()
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+
+                summary["verified"] += 1
+                if result.get("error"):
+                    summary["errors"] += 1
+                elapsed = time.perf_counter() - start
+                rate = summary["verified"] / elapsed * 60
+                remaining = len(pending) - summary["verified"]
+                status = "error" if result.get("error") else f"{len(result['claims'])} claims"
+                print(
+                    f"[{summary['verified']}/{len(pending)}] {futures[future]} ({status}) "
+                    f"- {rate:.1f} articles/min, ~{remaining / rate if rate else 0:.1f} min left"
+                )
+    except KeyboardInterrupt:
+        print("Interrupted; finished results are saved and a rerun resumes from there.")
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        summary["elapsed_s"] = time.perf_counter() - start
+    return summary
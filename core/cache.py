@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.config import env_bool, env_int, env_str
+
+DEFAULT_CACHE_DIR = "data/verification_cache"
+
+# Query parameters that never change the article being served.
+_TRACKING_PARAMS = ("fbclid", "gclid", "mc_cid", "mc_eid", "cmpid")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so trivially different links to the same article share a
+    cache entry: lower-cased scheme and host, no default port, fragment or
+    tracking parameters, sorted query and no trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(markdown: str) -> str:
+    """Hashes scraped markdown with whitespace collapsed, so syndicated copies match."""
+    normalized = re.sub(r"\s+", " ", markdown).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class VerificationCache:
+    """
+    Cache of finished verification results.
+
+    Entries are reachable both by normalized URL and by a hash of the scraped
+    markdown. The in-memory tier is an LRU with a TTL; an optional on-disk tier
+    keeps results across restarts. Every entry is tagged with the fact-check
+    corpus version and the whole cache is dropped when that version changes.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        persist: Optional[bool] = None,
+    ):
+        self.max_entries = max_entries or env_int("FACTOS_CACHE_MAX_ENTRIES", 1024)
+        self.ttl_seconds = ttl_seconds or env_int("FACTOS_CACHE_TTL_SECONDS", 24 * 60 * 60)
+        persist = persist if persist is not None else env_bool("FACTOS_CACHE_PERSIST", False)
+        self.cache_dir = (cache_dir or env_str("FACTOS_CACHE_DIR", DEFAULT_CACHE_DIR)) if persist else None
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self._corpus_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "url_hits": 0,
+            "content_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return f"url:{normalize_url(url)}"
+
+    @staticmethod
+    def content_key(markdown: str) -> str:
+        return f"content:{content_hash(markdown)}"
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _check_corpus_version(self, corpus_version: str):
+        # Called with the lock held.
+        if self._corpus_version is not None and self._corpus_version != corpus_version:
+            print(f"[VerificationCache] Corpus changed ({self._corpus_version} -> {corpus_version}), invalidating cache.")
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+        self._corpus_version = corpus_version
+
+    def _is_fresh(self, stored_at: float, entry_version: str, corpus_version: str) -> bool:
+        return entry_version == corpus_version and time.time() - stored_at < self.ttl_seconds
+
+    def _read_disk(self, key: str, corpus_version: str) -> Optional[Tuple[float, str, Dict[str, Any]]]:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not self._is_fresh(record["stored_at"], record["corpus_version"], corpus_version):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return record["stored_at"], record["corpus_version"], record["result"]
+
+    def _write_disk(self, key: str, entry: Tuple[float, str, Dict[str, Any]]):
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        stored_at, corpus_version, result = entry
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "stored_at": stored_at, "corpus_version": corpus_version, "result": result}, f)
+        os.replace(tmp_path, path)
+
+    def _get(self, key: str, corpus_version: str, hit_counter: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._check_corpus_version(corpus_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_fresh(entry[0], entry[1], corpus_version):
+                    self._entries.move_to_end(key)
+                    self._counters[hit_counter] += 1
+                    return entry[2]
+                del self._entries[key]
+
+        entry = self._read_disk(key, corpus_version)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters[hit_counter] += 1
+            self._counters["disk_hits"] += 1
+            self._store_in_memory(key, entry)
+            return entry[2]
+
+    def _store_in_memory(self, key: str, entry: Tuple[float, str, Dict[str, Any]]):
+        # Called with the lock held.
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get_by_url(self, url: str, corpus_version: str) -> Optional[Dict[str, Any]]:
+        return self._get(self.url_key(url), corpus_version, "url_hits")
+
+    def get_by_content(self, markdown: str, corpus_version: str) -> Optional[Dict[str, Any]]:
+        return self._get(self.content_key(markdown), corpus_version, "content_hits")
+
+    def put(self, result: Dict[str, Any], corpus_version: str, url: Optional[str] = None, markdown: Optional[str] = None):
+        """Stores `result` under the URL key, the content key, or both."""
+        keys = []
+        if url:
+            keys.append(self.url_key(url))
+        if markdown:
+            keys.append(self.content_key(markdown))
+
+        entry = (time.time(), corpus_version, result)
+        with self._lock:
+            self._check_corpus_version(corpus_version)
+            for key in keys:
+                self._store_in_memory(key, entry)
+        if self.cache_dir:
+            for key in keys:
+                self._write_disk(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "corpus_version": self._corpus_version,
+                "persistent": bool(self.cache_dir),
+            }
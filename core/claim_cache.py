@@ -0,0 +1,271 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.config import env_bool, env_float, env_int
+from core.metrics import CLAIM_CACHE_LOOKUPS
+from schemas.messages import Claim, ScoredClaim
+
+# (cache key, verdict) for one claim; claims sharing a key are near-duplicates.
+Verdict = Tuple[str, ScoredClaim]
+
+
+def rebind(scored_claim: ScoredClaim, claim: Claim) -> ScoredClaim:
+    """Returns `scored_claim` as the verdict for `claim`, a near-duplicate of the claim it was computed for."""
+    if scored_claim.claim == claim:
+        return scored_claim
+    return scored_claim.model_copy(update={
+        "claim": claim,
+        "fact_check": scored_claim.fact_check.model_copy(update={"claim": claim}),
+    })
+
+
+def collapse(verdicts: Iterable[Optional[Verdict]], seen: Optional[Set[str]] = None) -> List[ScoredClaim]:
+    """
+    Keeps the first claim of every near-duplicate group, in order. Claims
+    without a verdict (no fact-check matched) are dropped. Pass the same
+    `seen` set across calls to collapse duplicates spread over several batches
+    of one article.
+    """
+    seen = set() if seen is None else seen
+    scored_claims = []
+    for verdict in verdicts:
+        if verdict is None or verdict[0] in seen:
+            continue
+        seen.add(verdict[0])
+        scored_claims.append(verdict[1])
+    return scored_claims
+
+
+class ClaimLookup:
+    """
+    Result of `ClaimVerdictCache.lookup` for one list of claims: which claim
+    stands in for each near-duplicate group, and the verdicts found so far.
+    `pending` still has to be matched and scored, then handed to
+    `ClaimVerdictCache.store`.
+    """
+
+    def __init__(self, claims: List[Claim], embeddings: np.ndarray, representatives: List[int], verdicts: Dict[int, Verdict]):
+        self.claims = claims
+        self.embeddings = embeddings
+        self.representatives = representatives
+        self.verdicts = verdicts
+
+    @property
+    def pending(self) -> List[Claim]:
+        indices = dict.fromkeys(self.representatives)
+        return [self.claims[i] for i in indices if i not in self.verdicts]
+
+    def verdict_for(self, index: int) -> Optional[Verdict]:
+        verdict = self.verdicts.get(self.representatives[index])
+        if verdict is None:
+            return None
+        return verdict[0], rebind(verdict[1], self.claims[index])
+
+    def results(self, seen: Optional[Set[str]] = None) -> List[ScoredClaim]:
+        return collapse((self.verdict_for(i) for i in range(len(self.claims))), seen)
+
+
+class _Entry:
+    __slots__ = ("slot", "stored_at", "corpus_version", "scored_claim")
+
+    def __init__(self, slot: int, stored_at: float, corpus_version: str, scored_claim: ScoredClaim):
+        self.slot = slot
+        self.stored_at = stored_at
+        self.corpus_version = corpus_version
+        self.scored_claim = scored_claim
+
+
+class ClaimVerdictCache:
+    """
+    Claim-level cache of fact-check verdicts, keyed by meaning rather than text.
+
+    Each entry keeps the claim's normalized embedding together with its
+    `FactCheck` and `ScoredClaim`. A new claim whose cosine similarity to a
+    cached claim reaches `threshold` (`FACTOS_CLAIM_CACHE_THRESHOLD`) reuses
+    that verdict, so the same viral claim reworded by another outlet skips
+    the vector search and scoring. Near-duplicates within one list of claims
+    are collapsed onto the first of them before anything is matched.
+
+    Embeddings live in one preallocated matrix of `max_entries` rows that is
+    searched with a single matrix product; at this size that is faster than
+    an approximate index and exact. Entries are evicted LRU, after
+    `ttl_seconds`, and all at once when the corpus version changes.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        enabled: Optional[bool] = None,
+    ):
+        self.enabled = enabled if enabled is not None else env_bool("FACTOS_CLAIM_CACHE", True)
+        self.threshold = threshold if threshold is not None else env_float("FACTOS_CLAIM_CACHE_THRESHOLD", 0.92)
+        self.max_entries = max(1, max_entries or env_int("FACTOS_CLAIM_CACHE_MAX_ENTRIES", 4096))
+        self.ttl_seconds = ttl_seconds or env_int("FACTOS_CLAIM_CACHE_TTL_SECONDS", 24 * 60 * 60)
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._occupied = np.zeros(self.max_entries, dtype=bool)
+        self._slot_keys: List[Optional[str]] = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+        self._corpus_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "collapsed": 0,
+            "stored": 0,
+            "evictions": 0,
+            "expired": 0,
+            "invalidations": 0,
+        }
+
+    def _clear_entries(self):
+        # Called with the lock held.
+        self._entries.clear()
+        self._occupied[:] = False
+        self._slot_keys = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _check_corpus_version(self, corpus_version: str):
+        # Called with the lock held.
+        if self._corpus_version is not None and self._corpus_version != corpus_version:
+            print(f"[ClaimVerdictCache] Corpus changed ({self._corpus_version} -> {corpus_version}), dropping cached verdicts.")
+            self._clear_entries()
+            self._counters["invalidations"] += 1
+        self._corpus_version = corpus_version
+
+    def _remove(self, key: str):
+        # Called with the lock held.
+        entry = self._entries.pop(key)
+        self._occupied[entry.slot] = False
+        self._slot_keys[entry.slot] = None
+        self._free_slots.append(entry.slot)
+
+    def _representatives(self, embeddings: np.ndarray) -> List[int]:
+        """Maps every claim to the first earlier claim it nearly duplicates, or to itself."""
+        if not self.enabled:
+            return list(range(len(embeddings)))
+        similarities = embeddings @ embeddings.T
+        representatives: List[int] = []
+        unique: List[int] = []
+        for i in range(len(embeddings)):
+            if unique:
+                scores = similarities[i, unique]
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    representatives.append(unique[best])
+                    continue
+            unique.append(i)
+            representatives.append(i)
+        return representatives
+
+    def lookup(self, claims: List[Claim], embeddings: np.ndarray, corpus_version: str) -> ClaimLookup:
+        """
+        Collapses near-duplicate `claims` and answers what it can from the
+        cache. `embeddings` are the claims' normalized embeddings, one row each.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not claims:
+            return ClaimLookup(claims, embeddings, [], {})
+        representatives = self._representatives(embeddings)
+        unique = list(dict.fromkeys(representatives))
+        collapsed = len(claims) - len(unique)
+
+        verdicts: Dict[int, Verdict] = {}
+        now = time.time()
+        with self._lock:
+            self._check_corpus_version(corpus_version)
+            if self.enabled and self._entries and self._matrix is not None and self._matrix.shape[1] == embeddings.shape[1]:
+                similarities = embeddings[unique] @ self._matrix.T
+                similarities[:, ~self._occupied] = -np.inf
+                for i, row in zip(unique, similarities):
+                    slot = int(np.argmax(row))
+                    if row[slot] < self.threshold:
+                        continue
+                    key = self._slot_keys[slot]
+                    entry = self._entries[key]
+                    if now - entry.stored_at >= self.ttl_seconds:
+                        self._remove(key)
+                        self._counters["expired"] += 1
+                        continue
+                    self._entries.move_to_end(key)
+                    verdicts[i] = (key, entry.scored_claim)
+            hits = len(verdicts)
+            self._counters["hits"] += hits
+            self._counters["misses"] += len(unique) - hits
+            self._counters["collapsed"] += collapsed
+
+        CLAIM_CACHE_LOOKUPS.inc(hits, outcome="hit")
+        CLAIM_CACHE_LOOKUPS.inc(len(unique) - hits, outcome="miss")
+        CLAIM_CACHE_LOOKUPS.inc(collapsed, outcome="collapsed")
+        return ClaimLookup(claims, embeddings, representatives, verdicts)
+
+    def store(self, lookup: ClaimLookup, scored_claims: List[ScoredClaim], corpus_version: str):
+        """Records the verdicts computed for `lookup.pending` in the lookup and in the cache."""
+        pending = {lookup.claims[i].claim_text: i for i in dict.fromkeys(lookup.representatives) if i not in lookup.verdicts}
+        stored_at = time.time()
+        with self._lock:
+            self._check_corpus_version(corpus_version)
+            for scored_claim in scored_claims:
+                i = pending.get(scored_claim.claim.claim_text)
+                if i is None:
+                    continue
+                key = scored_claim.claim.claim_text
+                lookup.verdicts[i] = (key, scored_claim)
+                if self.enabled:
+                    self._put(key, lookup.embeddings[i], scored_claim, corpus_version, stored_at)
+
+    def _put(self, key: str, embedding: np.ndarray, scored_claim: ScoredClaim, corpus_version: str, stored_at: float):
+        # Called with the lock held.
+        if self._matrix is None or self._matrix.shape[1] != embedding.shape[0]:
+            # First entry, or the embedding model changed: size the matrix to it.
+            self._clear_entries()
+            self._matrix = np.zeros((self.max_entries, embedding.shape[0]), dtype=np.float32)
+
+        if key in self._entries:
+            slot = self._entries.pop(key).slot
+        else:
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+            slot = self._free_slots.pop()
+
+        self._matrix[slot] = embedding
+        self._occupied[slot] = True
+        self._slot_keys[slot] = key
+        self._entries[key] = _Entry(slot, stored_at, corpus_version, scored_claim)
+        self._counters["stored"] += 1
+
+    def verdicts(self, matcher, scorer, claims: List[Claim], seen: Optional[Set[str]] = None) -> List[ScoredClaim]:
+        """
+        Synchronous match-and-score for `claims` through the cache, for callers
+        that hold the agents directly (the ADK agent). Near-duplicates are
+        collapsed, also across calls sharing `seen`.
+        """
+        if not claims:
+            return []
+        corpus_version = matcher.corpus_version
+        lookup = self.lookup(claims, matcher.embed_claims([claim.claim_text for claim in claims]), corpus_version)
+        if lookup.pending:
+            self.store(lookup, scorer.run(matcher.run(lookup.pending)), corpus_version)
+        return lookup.results(seen)
+
+    def clear(self):
+        with self._lock:
+            self._clear_entries()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "entries": len(self._entries),
+                "corpus_version": self._corpus_version,
+            }
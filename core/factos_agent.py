@@ -1,13 +1,29 @@
+import asyncio
+
 from google.adk.agents import LlmAgent, SequentialAgent
 from google.adk.agents.base_agent import BaseAgent
 from google.adk.events import Event
-from typing import Callable, AsyncIterator, Dict, Any, List
+from google.genai import types
+from typing import Callable, AsyncIterator, Any, List, Optional
+
+from agents.response_formatter.agent import build_formatter_instruction
+from core.config import env_bool
+from core.formatter import FORMATTER_MODEL
+from core.metrics import STAGE_ITEMS, STAGE_SECONDS, span
+from core.registry import registry
+from core.streaming import iterate_in_thread, micro_batch_settings, micro_batches
+from schemas.messages import Claim, ScoredClaim
+
 
-from agents.smart_scraper.agent import SmartScraperAgent
-from agents.claim_extractor.agent import ClaimExtractorAgent
-from agents.fact_check_matcher.agent import FactCheckMatcherAgent
-from agents.truth_scorer.agent import TruthScorerAgent
-from schemas.messages import ScoredClaim
+def progress_event(ctx: 'InvocationContext', author: str, text: str) -> Event:
+    # Partial so runners waiting for the final response skip progress updates.
+    return Event(
+        invocation_id=ctx.invocation_id,
+        author=author,
+        branch=ctx.branch,
+        partial=True,
+        content=types.Content(role="model", parts=[types.Part(text=text)]),
+    )
 
 
 class FunctionAgent(BaseAgent):
@@ -15,85 +31,151 @@ class FunctionAgent(BaseAgent):
     fn: Callable
     input_key: str
     output_key: str
+    # Drop the input from session state once consumed, e.g. the scraped article.
+    consume_input: bool = False
 
     async def _run_async_impl(self, ctx: 'InvocationContext') -> AsyncIterator[Event]:
         fn_input = ctx.session.state.get(self.input_key)
-        result = self.fn(fn_input)
+        with span(self.name), STAGE_SECONDS.time(stage=self.name):
+            result = self.fn(fn_input)
+        if isinstance(result, list):
+            STAGE_ITEMS.observe(len(result), stage=self.name, direction="out")
         ctx.session.state[self.output_key] = result
-        if False:
-            yield
+        if self.consume_input:
+            ctx.session.state.pop(self.input_key, None)
+        yield progress_event(ctx, self.name, self._progress(result))
+
+    def _progress(self, result: Any) -> str:
+        if isinstance(result, list):
+            return f"{self.name} finished: {len(result)} {self.output_key.replace('_', ' ')}."
+        return f"{self.name} finished."
 
 class FactosAgent(BaseAgent):
-    """The main agent for the Factos pipeline."""
+    """
+    The main agent for the Factos pipeline.
+
+    By default each stage runs to completion over the whole claim list before
+    the next one starts. In streaming mode (`streaming=True` or
+    `FACTOS_AGENT_STREAMING`) claims are extracted on a worker thread and
+    matched and scored in micro-batches as they arrive.
+    """
+    streaming: bool = False
+
+    def __init__(self, streaming: Optional[bool] = None, **kwargs):
+        if streaming is None:
+            streaming = env_bool("FACTOS_AGENT_STREAMING", False)
+        super().__init__(name="FactosAgent", streaming=streaming, **kwargs)
+
+    async def _run_streaming(self, ctx: 'InvocationContext') -> AsyncIterator[Event]:
+        scraper = FunctionAgent(
+            fn=registry.get("smart_scraper").run,
+            name="SmartScraper",
+            input_key="url",
+            output_key="scraped_content",
+        )
+        async for event in scraper.run_async(ctx):
+            yield event
+
+        # The article is only needed by the extractor, so it leaves session state here.
+        scraped_content = ctx.session.state.pop("scraped_content", None)
+        extractor = registry.get("claim_extractor")
+        matcher = registry.get("fact_check_matcher")
+        scorer = registry.get("truth_scorer")
+        claim_cache = registry.get("claim_cache")
+
+        claims, fact_checks, scored_claims = [], [], []
+        seen_verdicts = set()
+        max_size, max_wait = micro_batch_settings()
+        claim_stream = iterate_in_thread(lambda: extractor.iter_claims(scraped_content))
+        async for batch in micro_batches(claim_stream, max_size, max_wait):
+            # Vector search runs off the loop while the next chunks are summarized.
+            batch_scored_claims = await asyncio.to_thread(claim_cache.verdicts, matcher, scorer, batch, seen_verdicts)
+            claims.extend(batch)
+            fact_checks.extend(scored_claim.fact_check for scored_claim in batch_scored_claims)
+            scored_claims.extend(batch_scored_claims)
+            yield progress_event(ctx, self.name, f"Scored {len(scored_claims)} claims so far.")
 
-    def __init__(self, **kwargs):
-        super().__init__(name="FactosAgent", **kwargs)
+        ctx.session.state["claims"] = claims
+        ctx.session.state["fact_checks"] = fact_checks
+        ctx.session.state["scored_claims"] = scored_claims
 
     async def _run_async_impl(
         self, ctx: 'InvocationContext'
     ) -> AsyncIterator[Event]:
-        
+        if self.streaming:
+            async for event in self._run_streaming(ctx):
+                yield event
+        else:
+            async for event in self._run_sequential(ctx):
+                yield event
+
+        scored_claims: List[ScoredClaim] = ctx.session.state.get("scored_claims", [])
+
+        # High-confidence results and repeated inputs are answered without Gemini.
+        policy = registry.get("formatter_policy")
+        report = policy.lookup(scored_claims, FORMATTER_MODEL)
+        if report is not None:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author="ResponseFormatter",
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=report)]),
+            )
+            return
+
+        # Now, dynamically create the final formatting agent with the data
+        formatter_instruction = build_formatter_instruction(scored_claims)
+
+        response_formatter_agent = LlmAgent(
+            name="ResponseFormatter",
+            model=FORMATTER_MODEL,
+            instruction=formatter_instruction,
+        )
+
+        # Run the final formatter and yield its events
+        async for event in response_formatter_agent.run_async(ctx):
+            if event.is_final_response() and event.content and event.content.parts:
+                policy.remember(scored_claims, FORMATTER_MODEL, "".join(part.text or "" for part in event.content.parts))
+            yield event
+
+    async def _run_sequential(self, ctx: 'InvocationContext') -> AsyncIterator[Event]:
+        # Agents come from the process-wide registry, so models are loaded once
+        # and reused by every invocation.
+        matcher = registry.get("fact_check_matcher")
+        scorer = registry.get("truth_scorer")
+        claim_cache = registry.get("claim_cache")
+
+        def match_and_score(claims: List[Claim]) -> List[ScoredClaim]:
+            # Claims close to an earlier one reuse its verdict; new ones are matched and scored once.
+            return claim_cache.verdicts(matcher, scorer, claims)
+
         processing_pipeline = SequentialAgent(
             name="ProcessingPipeline",
             sub_agents=[
                 FunctionAgent(
-                    fn=SmartScraperAgent().run,
+                    fn=registry.get("smart_scraper").run,
                     name="SmartScraper",
                     input_key="url",
                     output_key="scraped_content",
                 ),
                 FunctionAgent(
-                    fn=ClaimExtractorAgent().run,
+                    fn=registry.get("claim_extractor").run,
                     name="ClaimExtractor",
                     input_key="scraped_content",
                     output_key="claims",
+                    consume_input=True,
                 ),
                 FunctionAgent(
-                    fn=FactCheckMatcherAgent().run,
+                    fn=match_and_score,
                     name="FactCheckMatcher",
                     input_key="claims",
-                    output_key="fact_checks",
-                ),
-                FunctionAgent(
-                    fn=TruthScorerAgent().run,
-                    name="TruthScorer",
-                    input_key="fact_checks",
                     output_key="scored_claims",
                 ),
             ]
         )
 
-        # Run the processing pipeline first
+        # Run the stages in order, forwarding each stage's progress event
         async for event in processing_pipeline.run_async(ctx):
-            # We don't yield these events, we just let the state update
-            pass
-
-        # Now, dynamically create the final formatting agent with the data
-        scored_claims: List[ScoredClaim] = ctx.session.state.get("scored_claims", [])
-        
-        # Create a string representation of the scored claims
-        claims_str = "\\n".join([f"- Claim: {sc.claim.claim_text}\\n  Score: {sc.truth_score}\\n  Explanation: {sc.explanation}" for sc in scored_claims])
-
-        formatter_instruction = f"""You are a fact-checking analyst. Your task is to generate a clear, concise, and user-friendly Markdown report based on the provided data.
-Your report should follow this structure exactly:
-
-1.  **Overall Verdict**: Start with a single, conclusive verdict for the main claim (e.g., "False", "Misleading", "True").
-2.  **Main Claim**: State the most important claim that was analyzed.
-3.  **Detailed Analysis**: Provide a paragraph explaining *why* the claim received its verdict. Synthesize the explanations from the provided data.
-4.  **Verified Sources**: List the sources that were used to verify the claims. You will have to infer these from the fact-check documents.
-5.  **Our Recommendation**: Write a corrected, more nuanced version of the main claim.
-6.  **Media Literacy Tip**: Provide a general, helpful tip for identifying similar misinformation in the future.
-
-Here is the data you must use:
-{claims_str}
-"""
-        
-        response_formatter_agent = LlmAgent(
-            name="ResponseFormatter",
-            model="gemini-1.5-flash-latest",
-            instruction=formatter_instruction,
-        )
-
-        # Run the final formatter and yield its events
-        async for event in response_formatter_agent.run_async(ctx):
-            yield event 
\ No newline at end of file
+            yield event
+        # Same session state as the streaming path.
+        ctx.session.state["fact_checks"] = [sc.fact_check for sc in ctx.session.state.get("scored_claims", [])]
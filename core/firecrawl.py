@@ -0,0 +1,267 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.config import env_float, env_int, env_str
+from core.metrics import FIRECRAWL_REQUEST_SECONDS, FIRECRAWL_RETRIES
+
+DEFAULT_BASE_URL = "https://api.firecrawl.dev"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FirecrawlError(Exception):
+    """Raised when a scrape fails after all retries, or with a non-retryable error."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, details: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+class _RateLimiter:
+    """Spaces out requests to a host so at most `rate` start per second."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str) -> float:
+        """Reserves the next slot for `host` and returns how long to wait for it."""
+        if not self._interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval
+            return slot - now
+
+
+class _LoopState:
+    """Async resources are bound to the event loop that created them."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+class FirecrawlClient:
+    """
+    Shared client for the Firecrawl scrape API.
+
+    Connections are pooled and kept alive across calls, the number of
+    concurrent scrapes and their rate are limited per target host, and
+    429/5xx responses or transport errors are retried with jittered
+    exponential backoff. `FIRECRAWL_BASE_URL` points the client at another
+    Firecrawl-compatible server, e.g. a local stub for load tests.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        per_host_rate: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        max_backoff_seconds: Optional[float] = None,
+    ):
+        self.base_url = (base_url or env_str("FIRECRAWL_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+        self._api_key = api_key
+        self.timeout = timeout or env_float("FIRECRAWL_TIMEOUT", 60.0)
+        self.max_connections = max_connections or env_int("FIRECRAWL_MAX_CONNECTIONS", 20)
+        self.per_host_concurrency = per_host_concurrency or env_int("FIRECRAWL_PER_HOST_CONCURRENCY", 4)
+        self.max_retries = max_retries if max_retries is not None else env_int("FIRECRAWL_MAX_RETRIES", 3)
+        self.backoff_seconds = backoff_seconds or env_float("FIRECRAWL_BACKOFF_SECONDS", 0.5)
+        self.max_backoff_seconds = max_backoff_seconds or env_float("FIRECRAWL_MAX_BACKOFF_SECONDS", 30.0)
+        self._rate_limiter = _RateLimiter(
+            per_host_rate if per_host_rate is not None else env_float("FIRECRAWL_PER_HOST_RPS", 0.0)
+        )
+
+        self._limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        self._client: Optional[httpx.Client] = None
+        # Keyed on the loop itself, so the state of a finished loop is dropped with it.
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def scrape_endpoint(self) -> str:
+        return f"{self.base_url}/v1/scrape"
+
+    @property
+    def api_key(self) -> Optional[str]:
+        # Read lazily so keys loaded from .env after construction are picked up.
+        return self._api_key or os.getenv("FIRECRAWL_API_KEY")
+
+    @property
+    def has_credentials(self) -> bool:
+        # A custom base URL (e.g. a local stub) may not need an API key.
+        return bool(self.api_key) or self.base_url != DEFAULT_BASE_URL
+
+    def _headers(self) -> Dict[str, str]:
+        api_key = self.api_key
+        if not self.has_credentials:
+            raise FirecrawlError("FIRECRAWL_API_KEY environment variable not set.")
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        return headers
+
+    @staticmethod
+    def _payload(url: str) -> Dict[str, Any]:
+        return {"url": url, "onlyMainContent": True}
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlsplit(url).hostname or "").lower()
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                # A server asking for minutes would stall the whole crawl; cap it like our own backoff.
+                return min(float(retry_after), self.max_backoff_seconds)
+        return min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _error_from_response(response: httpx.Response) -> FirecrawlError:
+        try:
+            details = response.json()
+        except ValueError:
+            details = response.text
+        return FirecrawlError(
+            f"HTTP error during scrape: {response.status_code} {response.reason_phrase}. Details: {details}",
+            status_code=response.status_code,
+            details=details,
+        )
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Dict[str, Any]:
+        try:
+            return response.json()
+        except ValueError as e:
+            raise FirecrawlError(
+                f"Scrape returned a body that is not valid JSON: {e}",
+                status_code=response.status_code,
+                details=response.text[:500],
+            ) from e
+
+    def _should_retry(self, attempt: int, response: Optional[httpx.Response]) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return response is None or response.status_code in RETRYABLE_STATUS_CODES
+
+    # --- sync API -------------------------------------------------------
+
+    def _get_client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(timeout=self.timeout, limits=self._limits)
+            return self._client
+
+    def _host_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host_concurrency)
+            return self._host_semaphores[host]
+
+    def scrape(self, url: str) -> Dict[str, Any]:
+        """Scrapes `url` and returns the decoded Firecrawl response body."""
+        headers = self._headers()
+        host = self._host(url)
+        client = self._get_client()
+
+        with self._host_semaphore(host):
+            attempt = 0
+            while True:
+                time.sleep(self._rate_limiter.reserve(host))
+                response = None
+                request_start = time.perf_counter()
+                try:
+                    response = client.post(self.scrape_endpoint, headers=headers, json=self._payload(url))
+                except httpx.TransportError as e:
+                    FIRECRAWL_REQUEST_SECONDS.observe(time.perf_counter() - request_start, outcome="transport_error")
+                    if not self._should_retry(attempt, None):
+                        raise FirecrawlError(f"Unexpected error during scrape: {e}")
+                else:
+                    FIRECRAWL_REQUEST_SECONDS.observe(time.perf_counter() - request_start, outcome=str(response.status_code))
+                    if response.is_success:
+                        return self._decode(response)
+                    if not self._should_retry(attempt, response):
+                        raise self._error_from_response(response)
+
+                delay = self._backoff(attempt, response)
+                FIRECRAWL_RETRIES.inc()
+                print(f"[FirecrawlClient] Retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}).")
+                time.sleep(delay)
+                attempt += 1
+
+    # --- async API ------------------------------------------------------
+
+    def _get_loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_states.get(loop)
+            if state is None:
+                state = _LoopState(httpx.AsyncClient(timeout=self.timeout, limits=self._limits))
+                self._loop_states[loop] = state
+            return state
+
+    async def scrape_async(self, url: str) -> Dict[str, Any]:
+        """Non-blocking version of `scrape`."""
+        headers = self._headers()
+        host = self._host(url)
+        state = self._get_loop_state()
+        semaphore = state.semaphores.setdefault(host, asyncio.Semaphore(self.per_host_concurrency))
+
+        async with semaphore:
+            attempt = 0
+            while True:
+                await asyncio.sleep(self._rate_limiter.reserve(host))
+                response = None
+                request_start = time.perf_counter()
+                try:
+                    response = await state.client.post(self.scrape_endpoint, headers=headers, json=self._payload(url))
+                except httpx.TransportError as e:
+                    FIRECRAWL_REQUEST_SECONDS.observe(time.perf_counter() - request_start, outcome="transport_error")
+                    if not self._should_retry(attempt, None):
+                        raise FirecrawlError(f"Unexpected error during scrape: {e}")
+                else:
+                    FIRECRAWL_REQUEST_SECONDS.observe(time.perf_counter() - request_start, outcome=str(response.status_code))
+                    if response.is_success:
+                        return self._decode(response)
+                    if not self._should_retry(attempt, response):
+                        raise self._error_from_response(response)
+
+                delay = self._backoff(attempt, response)
+                FIRECRAWL_RETRIES.inc()
+                print(f"[FirecrawlClient] Retrying {url} in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries}).")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def close(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self):
+        """Closes the async client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_states.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
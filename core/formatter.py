@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from agents.response_formatter.agent import build_formatter_instruction
+from core.config import env_float, env_int
+from core.metrics import FORMATTER_REPORTS, LLM_REQUEST_SECONDS, LLM_TOKENS
+from schemas.messages import ScoredClaim
+
+FORMATTER_MODEL = "gemini-1.5-flash-latest"
+
+
+class FormatterPolicy:
+    """
+    Decides when the final report needs the LLM at all.
+
+    When every claim matched its fact-check with at least `min_confidence`
+    similarity (`FACTOS_FORMATTER_MIN_CONFIDENCE`) there is nothing ambiguous
+    to synthesize, so the deterministic `ResponseFormatterAgent` renders the
+    report locally. Otherwise LLM reports are memoized by a hash of the
+    scored claims (`FACTOS_FORMATTER_MEMO_SIZE` entries, LRU), so identical
+    inputs are only sent once.
+    """
+
+    def __init__(self, local_formatter, min_confidence: Optional[float] = None, memo_size: Optional[int] = None):
+        self._local_formatter = local_formatter
+        self.min_confidence = min_confidence if min_confidence is not None else env_float("FACTOS_FORMATTER_MIN_CONFIDENCE", 0.9)
+        self.memo_size = memo_size if memo_size is not None else env_int("FACTOS_FORMATTER_MEMO_SIZE", 512)
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local_reports = 0
+        self._memo_hits = 0
+        self._llm_calls = 0
+
+    def is_confident(self, scored_claims: List[ScoredClaim]) -> bool:
+        return all(sc.fact_check.match_score >= self.min_confidence for sc in scored_claims)
+
+    @staticmethod
+    def key(scored_claims: List[ScoredClaim], model: str) -> str:
+        payload = json.dumps([sc.model_dump() for sc in scored_claims], sort_keys=True)
+        return hashlib.sha256(f"{model}\n{payload}".encode("utf-8")).hexdigest()
+
+    def lookup(self, scored_claims: List[ScoredClaim], model: str) -> Optional[str]:
+        """
+        Returns a report that avoids the LLM call, or None when the caller
+        must call the LLM (and then `remember` its output).
+        """
+        if self.is_confident(scored_claims):
+            with self._lock:
+                self._local_reports += 1
+            FORMATTER_REPORTS.inc(source="local")
+            return self._local_formatter.run(scored_claims)
+
+        key = self.key(scored_claims, model)
+        with self._lock:
+            report = self._memo.get(key)
+            if report is not None:
+                self._memo.move_to_end(key)
+                self._memo_hits += 1
+                FORMATTER_REPORTS.inc(source="memo")
+                return report
+            self._llm_calls += 1
+        FORMATTER_REPORTS.inc(source="llm")
+        return None
+
+    def remember(self, scored_claims: List[ScoredClaim], model: str, report: str):
+        if not report or self.memo_size <= 0:
+            return
+        key = self.key(scored_claims, model)
+        with self._lock:
+            self._memo[key] = report
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "min_confidence": self.min_confidence,
+                "local_reports": self._local_reports,
+                "memoized_reports": self._memo_hits,
+                "llm_calls": self._llm_calls,
+                "llm_calls_avoided": self._local_reports + self._memo_hits,
+                "memo_entries": len(self._memo),
+            }
+
+
+class LlmFormatter:
+    """
+    Produces the final Markdown report with Gemini, using the same
+    instruction as the ADK `ResponseFormatter` agent. With a `FormatterPolicy`
+    the call is skipped for high-confidence or previously seen inputs.
+    """
+
+    def __init__(self, model: str = FORMATTER_MODEL, policy: Optional[FormatterPolicy] = None):
+        self.model = model
+        self.policy = policy
+        self._client = None
+
+    def _record_usage(self, usage_metadata):
+        if usage_metadata is None:
+            return
+        for kind, attribute in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+            count = getattr(usage_metadata, attribute, None)
+            if count is not None:
+                LLM_TOKENS.observe(count, model=self.model, kind=kind)
+
+    def _get_client(self):
+        if self._client is None:
+            api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY must be set in the environment.")
+            # Imported on first use to keep the google-genai import off the startup path.
+            from google import genai
+            self._client = genai.Client(api_key=api_key)
+        return self._client
+
+    async def format(self, scored_claims: List[ScoredClaim]) -> str:
+        """Asynchronously generates the report for the given scored claims."""
+        if self.policy is not None:
+            report = self.policy.lookup(scored_claims, self.model)
+            if report is not None:
+                return report
+
+        with LLM_REQUEST_SECONDS.time(model=self.model):
+            response = await self._get_client().aio.models.generate_content(
+                model=self.model,
+                contents=build_formatter_instruction(scored_claims),
+            )
+        self._record_usage(response.usage_metadata)
+        report = response.text or ""
+        if self.policy is not None:
+            self.policy.remember(scored_claims, self.model, report)
+        return report
+
+    async def stream(self, scored_claims: List[ScoredClaim]) -> AsyncIterator[str]:
+        """Yields the report text piece by piece as Gemini generates it."""
+        if self.policy is not None:
+            report = self.policy.lookup(scored_claims, self.model)
+            if report is not None:
+                yield report
+                return
+
+        parts = []
+        usage_metadata = None
+        start = time.perf_counter()
+        response_stream = await self._get_client().aio.models.generate_content_stream(
+            model=self.model,
+            contents=build_formatter_instruction(scored_claims),
+        )
+        async for chunk in response_stream:
+            # Usage is cumulative; the last chunk that carries it has the totals.
+            usage_metadata = chunk.usage_metadata or usage_metadata
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, model=self.model)
+        self._record_usage(usage_metadata)
+        if self.policy is not None:
+            self.policy.remember(scored_claims, self.model, "".join(parts))
@@ -0,0 +1,220 @@
+import glob
+import os
+import re
+from typing import Optional
+
+from core.config import env_int, env_str
+
+SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+DEFAULT_MODEL_CACHE_DIR = "data/model_cache"
+
+_threads_configured = False
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """
+    Picks the torch device for the embedding model. `FACTOS_EMBEDDING_DEVICE`
+    may name one explicitly ('cpu', 'cuda', 'mps'); 'auto' uses the best available.
+    """
+    device = device or env_str("FACTOS_EMBEDDING_DEVICE", "auto")
+    if device != "auto":
+        return device
+
+    import torch
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def _backend(name: str, default: str = "torch") -> str:
+    backend = env_str(name, default)
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' in {name}, expected one of {INFERENCE_BACKENDS}.")
+    return backend
+
+
+def _cache_dir(model_name: str, backend: str) -> str:
+    root = env_str("FACTOS_MODEL_CACHE_DIR", DEFAULT_MODEL_CACHE_DIR)
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+    return os.path.join(root, f"{slug}-{backend}")
+
+
+def configure_threads():
+    """
+    Applies per-worker thread limits once per process. `FACTOS_INTRA_OP_THREADS`
+    bounds the threads one operator may use and `FACTOS_INTER_OP_THREADS` how
+    many operators may run in parallel; 0 keeps the library default.
+    """
+    global _threads_configured
+    if _threads_configured:
+        return
+    import torch
+
+    intra_op = env_int("FACTOS_INTRA_OP_THREADS", 0)
+    inter_op = env_int("FACTOS_INTER_OP_THREADS", 0)
+    if intra_op:
+        torch.set_num_threads(intra_op)
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            # Can only be set before any inter-op parallel work has started.
+            print("[inference] Inter-op thread count already fixed for this process.")
+    _threads_configured = True
+
+
+def _ort_session_options():
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    intra_op = env_int("FACTOS_INTRA_OP_THREADS", 0)
+    inter_op = env_int("FACTOS_INTER_OP_THREADS", 0)
+    if intra_op:
+        options.intra_op_num_threads = intra_op
+    if inter_op:
+        options.inter_op_num_threads = inter_op
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+def _quantize_linear_layers(model):
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_or_build_torch_int8(cache_dir: str, build):
+    """Loads a dynamically quantized module from disk, building and saving it on first use."""
+    import torch
+
+    path = os.path.join(cache_dir, "model_int8.pt")
+    if os.path.exists(path):
+        # The cache is written by this process family only, so full unpickling is acceptable.
+        return torch.load(path, weights_only=False)
+    model = _quantize_linear_layers(build())
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+
+def _quantize_onnx_dir(source_dir: str, target_dir: str):
+    """Dynamically quantizes every ONNX graph in `source_dir` to int8."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for onnx_path in glob.glob(os.path.join(source_dir, "*.onnx")):
+        quantizer = ORTQuantizer.from_pretrained(source_dir, file_name=os.path.basename(onnx_path))
+        quantizer.quantize(save_dir=target_dir, quantization_config=config)
+
+
+def load_summarizer(backend: Optional[str] = None):
+    """
+    Loads the BART summarization pipeline on the configured backend
+    (`FACTOS_SUMMARIZER_BACKEND`):
+    'torch' (stock), 'torch-int8' (dynamic int8 Linear layers, CPU),
+    'onnx' (ONNX Runtime export) or 'onnx-int8' (quantized ONNX export).
+    Converted models are cached under `FACTOS_MODEL_CACHE_DIR` so the
+    conversion only happens once.
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+    from transformers import pipeline as hf_pipeline
+
+    backend = backend or _backend("FACTOS_SUMMARIZER_BACKEND")
+    configure_threads()
+    print(f"[inference] Loading {SUMMARIZER_MODEL} with backend '{backend}'...")
+
+    if backend == "torch":
+        return hf_pipeline("summarization", model=SUMMARIZER_MODEL, device_map="auto")
+
+    tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+    cache_dir = _cache_dir(SUMMARIZER_MODEL, backend)
+
+    if backend == "torch-int8":
+        model = _load_or_build_torch_int8(
+            cache_dir, lambda: AutoModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL).eval()
+        )
+        return hf_pipeline("summarization", model=model, tokenizer=tokenizer, device="cpu")
+
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    onnx_dir = _cache_dir(SUMMARIZER_MODEL, "onnx")
+    if not glob.glob(os.path.join(onnx_dir, "*.onnx")):
+        print(f"[inference] Exporting {SUMMARIZER_MODEL} to ONNX in {onnx_dir}...")
+        ORTModelForSeq2SeqLM.from_pretrained(SUMMARIZER_MODEL, export=True).save_pretrained(onnx_dir)
+        tokenizer.save_pretrained(onnx_dir)
+
+    model_dir = onnx_dir
+    file_names = {}
+    if backend == "onnx-int8":
+        model_dir = cache_dir
+        if not glob.glob(os.path.join(model_dir, "*_quantized.onnx")):
+            print(f"[inference] Quantizing ONNX graphs into {model_dir}...")
+            _quantize_onnx_dir(onnx_dir, model_dir)
+        for key, prefix in (
+            ("encoder_file_name", "encoder_model"),
+            ("decoder_file_name", "decoder_model"),
+            ("decoder_with_past_file_name", "decoder_with_past_model"),
+        ):
+            if os.path.exists(os.path.join(model_dir, f"{prefix}_quantized.onnx")):
+                file_names[key] = f"{prefix}_quantized.onnx"
+        # Configs are needed next to the quantized graphs.
+        for config_path in glob.glob(os.path.join(onnx_dir, "*.json")):
+            target = os.path.join(model_dir, os.path.basename(config_path))
+            if not os.path.exists(target):
+                with open(config_path, "rb") as src, open(target, "wb") as dst:
+                    dst.write(src.read())
+
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir,
+        session_options=_ort_session_options(),
+        provider="CPUExecutionProvider",
+        **file_names,
+    )
+    return hf_pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+def load_embedder(backend: Optional[str] = None):
+    """
+    Loads the MiniLM sentence embedder on the configured backend
+    (`FACTOS_EMBEDDER_BACKEND`), with the same options and caching as
+    `load_summarizer`.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    backend = backend or _backend("FACTOS_EMBEDDER_BACKEND")
+    configure_threads()
+    print(f"[inference] Loading {EMBEDDING_MODEL} with backend '{backend}'...")
+
+    if backend == "torch":
+        return SentenceTransformer(EMBEDDING_MODEL, device=resolve_device())
+
+    cache_dir = _cache_dir(EMBEDDING_MODEL, backend)
+    if backend == "torch-int8":
+        return _load_or_build_torch_int8(
+            cache_dir, lambda: SentenceTransformer(EMBEDDING_MODEL, device="cpu").eval()
+        )
+
+    model_kwargs = {"provider": "CPUExecutionProvider", "session_options": _ort_session_options()}
+    onnx_dir = _cache_dir(EMBEDDING_MODEL, "onnx")
+    if not os.path.exists(os.path.join(onnx_dir, "onnx", "model.onnx")):
+        print(f"[inference] Exporting {EMBEDDING_MODEL} to ONNX in {onnx_dir}...")
+        SentenceTransformer(EMBEDDING_MODEL, device="cpu", backend="onnx").save_pretrained(onnx_dir)
+
+    if backend == "onnx-int8":
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        quantized_file = os.path.join("onnx", "model_qint8_avx2.onnx")
+        if not os.path.exists(os.path.join(onnx_dir, quantized_file)):
+            print(f"[inference] Quantizing ONNX graph in {onnx_dir}...")
+            model = SentenceTransformer(onnx_dir, device="cpu", backend="onnx")
+            export_dynamic_quantized_onnx_model(model, "avx2", onnx_dir)
+        model_kwargs["file_name"] = quantized_file
+
+    return SentenceTransformer(onnx_dir, device="cpu", backend="onnx", model_kwargs=model_kwargs)
@@ -0,0 +1,396 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import env_float, env_int, env_str
+from core.streaming import micro_batches
+
+DEFAULT_ADDRESS = "unix:///tmp/factos-inference.sock"
+
+# Every message is a JSON header plus an optional binary payload (raw array bytes).
+_FRAME = struct.Struct("!II")
+
+
+class InferenceServerError(RuntimeError):
+    """Raised by the client when the inference server is unreachable or reports an error."""
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """
+    Parses 'unix:///path/to.sock' (or 'unix:/path') into ('unix', path) and
+    'tcp://host:port' (or 'host:port') into ('tcp', (host, port)).
+    """
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        if path.startswith("//"):
+            path = path[2:]
+        return "unix", path
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid inference server address '{address}', expected unix:///path or tcp://host:port.")
+    return "tcp", (host, int(port))
+
+
+def _encode_frame(header: Dict[str, Any], payload: bytes = b"") -> bytes:
+    header_bytes = json.dumps(header).encode("utf-8")
+    return _FRAME.pack(len(header_bytes), len(payload)) + header_bytes + payload
+
+
+def _encode_array(array: np.ndarray) -> Tuple[Dict[str, Any], bytes]:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {"shape": list(array.shape), "dtype": "float32"}, array.tobytes()
+
+
+def _decode_array(meta: Dict[str, Any], payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=meta["dtype"]).reshape(meta["shape"]).copy()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[Dict[str, Any], bytes]:
+    header_size, payload_size = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+    header = json.loads(await reader.readexactly(header_size))
+    payload = await reader.readexactly(payload_size) if payload_size else b""
+    return header, payload
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Inference server closed the connection.")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    header_size, payload_size = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_size))
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    return header, payload
+
+
+# --- server ----------------------------------------------------------------
+
+
+class _BatchedModel:
+    """
+    Queues requests for one model from every connection and runs them as
+    micro-batches (at most `max_batch` requests, waiting at most `max_wait`
+    seconds after the first) on the model's own thread. Requests are only
+    merged when their options match.
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[List[str], Dict[str, Any]], Any], max_batch: int, max_wait: float):
+        self.name = name
+        self._run_batch = run_batch
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"inference-{name}")
+        self._queue: Optional[asyncio.Queue] = None
+        self.requests = 0
+        self.batches = 0
+
+    async def submit(self, texts: List[str], options: Dict[str, Any]):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((texts, options, future))
+        return await future
+
+    async def _pending(self):
+        while True:
+            yield await self._queue.get()
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        async for batch in micro_batches(self._pending(), self._max_batch, self._max_wait):
+            groups: Dict[str, List[Tuple[List[str], Dict[str, Any], asyncio.Future]]] = {}
+            for request in batch:
+                groups.setdefault(json.dumps(request[1], sort_keys=True), []).append(request)
+            for requests in groups.values():
+                texts = [text for request_texts, _, _ in requests for text in request_texts]
+                try:
+                    outputs = await loop.run_in_executor(self._executor, self._run_batch, texts, requests[0][1])
+                except Exception as e:
+                    for _, _, future in requests:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self.requests += len(requests)
+                self.batches += 1
+                start = 0
+                for request_texts, _, future in requests:
+                    if not future.done():
+                        future.set_result(outputs[start:start + len(request_texts)])
+                    start += len(request_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_requests_per_batch": self.requests / self.batches if self.batches else 0.0,
+        }
+
+
+class InferenceServer:
+    """
+    Local sidecar that hosts the summarizer and the embedder once for every
+    API worker on the machine. Requests arriving from all connections are
+    micro-batched per model (`FACTOS_INFERENCE_MAX_BATCH` requests within
+    `FACTOS_INFERENCE_MAX_WAIT_MS`).
+    """
+
+    def __init__(
+        self,
+        summarizer,
+        embedder,
+        address: Optional[str] = None,
+        max_batch: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        summarizer_batch_size: Optional[int] = None,
+    ):
+        self.address = address or env_str("FACTOS_INFERENCE_SERVER", DEFAULT_ADDRESS)
+        # Merged requests only pay off if the pipeline generates them together.
+        self.summarizer_batch_size = max(1, summarizer_batch_size or env_int("FACTOS_SUMMARIZER_BATCH_SIZE", 8))
+        max_batch = max_batch or env_int("FACTOS_INFERENCE_MAX_BATCH", 32)
+        max_wait = (max_wait_ms if max_wait_ms is not None else env_float("FACTOS_INFERENCE_MAX_WAIT_MS", 10.0)) / 1000
+        self._summarizer = summarizer
+        self._embedder = embedder
+        self._models = {
+            "summarize": _BatchedModel("summarizer", self._summarize, max_batch, max_wait),
+            "encode": _BatchedModel("embedder", self._encode, max_batch, max_wait),
+        }
+
+    def _summarize(self, texts: List[str], options: Dict[str, Any]) -> List[Dict[str, str]]:
+        options = {**options, "batch_size": min(self.summarizer_batch_size, len(texts))}
+        return self._summarizer(texts, **options)
+
+    def _encode(self, texts: List[str], options: Dict[str, Any]) -> np.ndarray:
+        return self._embedder.encode(
+            texts,
+            batch_size=64,
+            normalize_embeddings=options.get("normalize_embeddings", False),
+            convert_to_numpy=True,
+        )
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "summarizer": {"tokenizer": self._summarizer.tokenizer.name_or_path},
+            "embedder": {
+                "tokenizer": self._embedder.tokenizer.name_or_path,
+                "max_seq_length": getattr(self._embedder, "max_seq_length", 256),
+            },
+            "batching": {name: model.stats() for name, model in self._models.items()},
+        }
+
+    async def _respond(self, header: Dict[str, Any]) -> bytes:
+        op = header.get("op")
+        if op == "info":
+            return _encode_frame(self.info())
+        if op == "summarize":
+            summaries = await self._models["summarize"].submit(header["texts"], header.get("options", {}))
+            return _encode_frame({"summaries": list(summaries)})
+        if op == "encode":
+            embeddings = await self._models["encode"].submit(header["texts"], header.get("options", {}))
+            meta, payload = _encode_array(embeddings)
+            return _encode_frame(meta, payload)
+        return _encode_frame({"error": f"Unknown op '{op}'."})
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    header, _ = await _read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    return
+                try:
+                    response = await self._respond(header)
+                except Exception as e:
+                    response = _encode_frame({"error": f"{type(e).__name__}: {e}"})
+                writer.write(response)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        kind, target = parse_address(self.address)
+        if kind == "unix":
+            if os.path.exists(target):
+                os.remove(target)
+            server = await asyncio.start_unix_server(self._handle, path=target)
+            # Only processes of the same user may talk to the models.
+            os.chmod(target, 0o600)
+        else:
+            server = await asyncio.start_server(self._handle, host=target[0], port=target[1])
+
+        batchers = [asyncio.ensure_future(model.serve()) for model in self._models.values()]
+        print(f"[InferenceServer] Serving on {self.address}.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in batchers:
+                task.cancel()
+
+
+# --- client ----------------------------------------------------------------
+
+
+class InferenceClient:
+    """
+    Blocking client for the inference sidecar. Each thread keeps its own
+    connection; a dropped connection is re-established once per call. A call
+    that gets no answer within `timeout` seconds (`FACTOS_INFERENCE_TIMEOUT`)
+    fails with `InferenceServerError` instead of blocking its worker forever.
+    """
+
+    def __init__(self, address: Optional[str] = None, connect_timeout: Optional[float] = None, timeout: Optional[float] = None):
+        self.address = address or env_str("FACTOS_INFERENCE_SERVER", DEFAULT_ADDRESS)
+        self.connect_timeout = connect_timeout if connect_timeout is not None else env_float("FACTOS_INFERENCE_CONNECT_TIMEOUT", 30.0)
+        self.timeout = timeout if timeout is not None else env_float("FACTOS_INFERENCE_TIMEOUT", 120.0)
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        kind, target = parse_address(self.address)
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX if kind == "unix" else socket.AF_INET, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout or None)
+            try:
+                sock.connect(target)
+                return sock
+            except OSError as e:
+                sock.close()
+                # The sidecar may still be starting next to us.
+                if time.monotonic() >= deadline:
+                    raise InferenceServerError(f"Cannot reach the inference server at {self.address}: {e}")
+                time.sleep(0.2)
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = self._local.sock = self._connect()
+        return sock
+
+    def call(self, header: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                sock.sendall(_encode_frame(header))
+                response, payload = _recv_frame(sock)
+                break
+            except socket.timeout:
+                # The answer may still arrive and would be read as the next call's; start over.
+                sock.close()
+                self._local.sock = None
+                raise InferenceServerError(
+                    f"The inference server at {self.address} did not answer '{header.get('op')}' within {self.timeout:g}s."
+                )
+            except (OSError, ConnectionError):
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        if "error" in response:
+            raise InferenceServerError(response["error"])
+        return response, payload
+
+    def info(self) -> Dict[str, Any]:
+        return self.call({"op": "info"})[0]
+
+
+class RemoteSummarizer:
+    """
+    Drop-in for the summarization pipeline: called with a list of texts and
+    generation options, returns `[{'summary_text': ...}]`. The tokenizer is
+    loaded locally since chunking needs it on every call.
+    """
+
+    def __init__(self, client: Optional[InferenceClient] = None):
+        from transformers import AutoTokenizer
+
+        self._client = client or InferenceClient()
+        info = self._client.info()
+        self.tokenizer = AutoTokenizer.from_pretrained(info["summarizer"]["tokenizer"])
+        print(f"[RemoteSummarizer] Using the inference server at {self._client.address}.")
+
+    def __call__(self, texts, **options) -> List[Dict[str, str]]:
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        if not texts:
+            return []
+        # Like the embedder's, the batch size is the server's concern.
+        options.pop("batch_size", None)
+        response, _ = self._client.call({"op": "summarize", "texts": texts, "options": options})
+        return response["summaries"]
+
+
+class RemoteEmbedder:
+    """
+    Drop-in for the SentenceTransformer embedder's `encode`, `tokenizer`
+    and `max_seq_length`, backed by the inference server.
+    """
+
+    def __init__(self, client: Optional[InferenceClient] = None):
+        from transformers import AutoTokenizer
+
+        self._client = client or InferenceClient()
+        info = self._client.info()["embedder"]
+        self.tokenizer = AutoTokenizer.from_pretrained(info["tokenizer"])
+        self.max_seq_length = info["max_seq_length"]
+        print(f"[RemoteEmbedder] Using the inference server at {self._client.address}.")
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        # batch_size is the server's concern: it batches across all callers.
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        meta, payload = self._client.call({
+            "op": "encode",
+            "texts": texts,
+            "options": {"normalize_embeddings": bool(normalize_embeddings)},
+        })
+        embeddings = _decode_array(meta, payload)
+        return embeddings[0] if single else embeddings
+
+
+def main():
+    """
+    Runs the inference sidecar. Point every API worker at it with the same
+    `FACTOS_INFERENCE_SERVER` address; backends and thread limits are taken
+    from the usual FACTOS_* variables.
+    """
+    parser = argparse.ArgumentParser(description="Serve the summarizer and embedder to local API workers.")
+    parser.add_argument("--address", default=env_str("FACTOS_INFERENCE_SERVER", DEFAULT_ADDRESS))
+    parser.add_argument("--max-batch", type=int, default=None)
+    parser.add_argument("--max-wait-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    from agents.claim_extractor.agent import load_summarizer
+    from agents.fact_check_matcher.agent import load_embedding_model
+
+    server = InferenceServer(
+        summarizer=load_summarizer(),
+        embedder=load_embedding_model(),
+        address=args.address,
+        max_batch=args.max_batch,
+        max_wait_ms=args.max_wait_ms,
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import asyncio
+import functools
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.config import env_bool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(header + self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum.
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = {key: (list(counts), total[0]) for key, (counts, total) in self._series.items()}
+        lines = []
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-local collection of counters and histograms rendered in the
+    Prometheus text exposition format.
+
+    With the process executor, agent-level metrics are recorded in the worker
+    processes; the API process still sees every pipeline stage's wall time
+    and queue wait.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "factos_stage_seconds", "Wall time of a pipeline stage.", ("stage",)
+)
+STAGE_QUEUE_SECONDS = metrics.histogram(
+    "factos_stage_queue_seconds", "Time a model stage waited for a free executor worker.", ("stage",)
+)
+STAGE_ITEMS = metrics.histogram(
+    "factos_stage_items", "Number of items entering or leaving a stage.", ("stage", "direction"), SIZE_BUCKETS
+)
+AGENT_RUN_SECONDS = metrics.histogram(
+    "factos_agent_run_seconds", "Wall time of an agent method.", ("agent", "method")
+)
+ARTICLE_CHUNKS = metrics.histogram(
+    "factos_article_chunks", "Summarizer chunks produced per article.", (), SIZE_BUCKETS
+)
+MODEL_LOAD_SECONDS = metrics.histogram(
+    "factos_model_load_seconds", "Time to build a registry entry (model, store or agent).", ("entry",)
+)
+FIRECRAWL_REQUEST_SECONDS = metrics.histogram(
+    "factos_firecrawl_request_seconds", "Latency of a single Firecrawl HTTP attempt.", ("outcome",)
+)
+FIRECRAWL_RETRIES = metrics.counter(
+    "factos_firecrawl_retries_total", "Firecrawl attempts that were retried."
+)
+LLM_REQUEST_SECONDS = metrics.histogram(
+    "factos_llm_request_seconds", "Latency of a Gemini report generation.", ("model",)
+)
+LLM_TOKENS = metrics.histogram(
+    "factos_llm_tokens", "Gemini token usage per report.", ("model", "kind"), TOKEN_BUCKETS
+)
+FORMATTER_REPORTS = metrics.counter(
+    "factos_formatter_reports_total", "Reports produced, by how they were produced.", ("source",)
+)
+CLAIM_CACHE_LOOKUPS = metrics.counter(
+    "factos_claim_cache_lookups_total", "Claims looked up in the claim-verdict cache, by outcome.", ("outcome",)
+)
+ADMISSION_REQUESTS = metrics.counter(
+    "factos_admission_requests_total", "Verification requests by admission outcome.", ("outcome",)
+)
+ADMISSION_QUEUE_SECONDS = metrics.histogram(
+    "factos_admission_queue_seconds", "Time admitted requests waited for a verification slot."
+)
+STAGE_LIMIT_WAIT_SECONDS = metrics.histogram(
+    "factos_stage_limit_wait_seconds", "Time spent waiting for a stage's concurrency limit.", ("stage",)
+)
+VERIFY_SECONDS = metrics.histogram(
+    "factos_verify_seconds", "End-to-end verification time per request.", ("mode",)
+)
+
+
+_tracer = None
+_tracer_resolved = False
+
+
+def _get_tracer():
+    """
+    Returns an OpenTelemetry tracer when `FACTOS_TRACING` is enabled and the
+    API is installed. Exporters are configured the usual OpenTelemetry way
+    (e.g. `opentelemetry-instrument` and the `OTEL_*` variables).
+    """
+    global _tracer, _tracer_resolved
+    if not _tracer_resolved:
+        if env_bool("FACTOS_TRACING", False):
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("factos")
+            except ImportError:
+                print("[metrics] FACTOS_TRACING is set but opentelemetry is not installed; spans are disabled.")
+        _tracer_resolved = True
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Opens a trace span when tracing is enabled, otherwise does nothing."""
+    tracer = _get_tracer()
+    if tracer is None:
+        yield
+        return
+    with tracer.start_as_current_span(name, attributes={k: str(v) for k, v in attributes.items()}):
+        yield
+
+
+def _observe_sizes(stage: str, args: Tuple, result: Any):
+    if args and isinstance(args[0], list):
+        STAGE_ITEMS.observe(len(args[0]), stage=stage, direction="in")
+    if isinstance(result, list):
+        STAGE_ITEMS.observe(len(result), stage=stage, direction="out")
+
+
+def instrumented(agent: str) -> Callable:
+    """
+    Decorates an agent method to record its wall time, a trace span and, when
+    the first argument or the result is a list, its input/output size.
+    Works for plain and async methods.
+    """
+    def decorator(fn: Callable) -> Callable:
+        stage = f"{agent}.{fn.__name__}"
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                with span(stage), AGENT_RUN_SECONDS.time(agent=agent, method=fn.__name__):
+                    result = await fn(self, *args, **kwargs)
+                _observe_sizes(stage, args, result)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with span(stage), AGENT_RUN_SECONDS.time(agent=agent, method=fn.__name__):
+                result = fn(self, *args, **kwargs)
+            _observe_sizes(stage, args, result)
+            return result
+        return wrapper
+
+    return decorator
@@ -0,0 +1,420 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import time
+from contextlib import aclosing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from core.admission import StageLimits
+from core.cache import VerificationCache
+from core.claim_cache import ClaimLookup, ClaimVerdictCache, collapse
+from core.config import env_int, env_str
+from core.formatter import LlmFormatter
+from core.metrics import STAGE_QUEUE_SECONDS, STAGE_SECONDS, VERIFY_SECONDS, span
+from core.registry import registry
+from core.streaming import micro_batch_settings, micro_batches
+from schemas.messages import Claim, FactCheck, ScoredClaim
+
+# Agents whose `run` is CPU/model bound and must stay off the event loop.
+MODEL_AGENTS = ("claim_extractor", "fact_check_matcher")
+# Registry entries only the model agents use; with worker processes the API process never loads them.
+WORKER_ENTRIES = ("summarizer", "embedding_model") + MODEL_AGENTS
+# The stage concurrency limit each model agent's calls count against.
+AGENT_STAGES = {"claim_extractor": "extract", "fact_check_matcher": "match"}
+
+
+def _run_agent(agent_name: str, payload: Any, method: str = "run") -> Any:
+    """Runs a registry agent. Module-level so it can be shipped to worker processes."""
+    return getattr(registry.get(agent_name), method)(payload)
+
+
+def _run_agent_timed(agent_name: str, payload: Any, method: str, submitted_at: float) -> Tuple[Any, float]:
+    """Runs a registry agent and also returns how long the job waited for a worker."""
+    queue_wait = time.time() - submitted_at
+    return _run_agent(agent_name, payload, method), queue_wait
+
+
+def _init_model_worker(ready=None):
+    registry.warm_up(MODEL_AGENTS)
+    if ready is not None:
+        # Tells the API process that this worker can take jobs.
+        ready.put(os.getpid())
+
+
+def _create_executor(kind: str, max_workers: int, ready=None) -> Executor:
+    if kind == "process":
+        # Each worker process loads the models once in its initializer.
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_model_worker,
+            initargs=(ready,),
+        )
+    if kind == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="factos-model")
+    raise ValueError(f"Unknown executor kind '{kind}', expected 'thread' or 'process'.")
+
+
+class VerificationPipeline:
+    """
+    Async verification pipeline used by the API.
+
+    The Firecrawl scrape runs on non-blocking I/O, while claim extraction and
+    fact-check matching are offloaded to a bounded executor so concurrent
+    requests overlap instead of blocking the event loop. Every scrape,
+    extraction, match and format call also counts against a per-stage
+    concurrency limit shared by all requests (`StageLimits`).
+    """
+
+    def __init__(
+        self,
+        executor_kind: Optional[str] = None,
+        model_workers: Optional[int] = None,
+        formatter: Optional[LlmFormatter] = None,
+        cache: Optional[VerificationCache] = None,
+        claim_cache: Optional[ClaimVerdictCache] = None,
+        stage_limits: Optional[StageLimits] = None,
+    ):
+        executor_kind = executor_kind or env_str("FACTOS_MODEL_EXECUTOR", "thread")
+        model_workers = model_workers or env_int("FACTOS_MODEL_WORKERS", 2)
+        self._model_workers = model_workers
+        self._workers_ready = multiprocessing.get_context("spawn").Queue() if executor_kind == "process" else None
+        self._executor = _create_executor(executor_kind, model_workers, self._workers_ready)
+        self._formatter = formatter or LlmFormatter(policy=registry.get("formatter_policy"))
+        self._cache = cache or VerificationCache()
+        self._claim_cache = claim_cache or registry.get("claim_cache")
+        self._stage_limits = stage_limits or StageLimits()
+        self._stream_chunk_batch = max(1, env_int("FACTOS_STREAM_CHUNK_BATCH", 1))
+        self._stream_batch_size, self._stream_max_wait = micro_batch_settings()
+
+    @property
+    def cache(self) -> VerificationCache:
+        return self._cache
+
+    @property
+    def claim_cache(self) -> ClaimVerdictCache:
+        return self._claim_cache
+
+    @property
+    def stage_limits(self) -> StageLimits:
+        return self._stage_limits
+
+    @property
+    def worker_entries(self) -> Tuple[str, ...]:
+        """Registry entries that live in the worker processes, so the API process need not load them."""
+        return WORKER_ENTRIES if self._workers_ready is not None else ()
+
+    def start_workers(self) -> int:
+        """
+        Starts every model worker process and blocks until each has loaded its
+        models. Returns how many were started; thread workers share the API
+        process's models and need no start-up.
+        """
+        if self._workers_ready is None:
+            return 0
+        # One job per worker makes the pool spawn all of them now instead of on demand.
+        futures = [self._executor.submit(os.getpid) for _ in range(self._model_workers)]
+        started = 0
+        while started < self._model_workers:
+            try:
+                self._workers_ready.get(timeout=1.0)
+                started += 1
+            except queue.Empty:
+                # A worker whose initializer failed breaks the pool and fails every job.
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+        return started
+
+    async def _run_model_stage(self, agent_name: str, payload: Any, method: str = "run") -> Any:
+        loop = asyncio.get_running_loop()
+        stage = f"{agent_name}.{method}"
+        async with self._stage_limits.stage(AGENT_STAGES[agent_name]):
+            with span(stage), STAGE_SECONDS.time(stage=stage):
+                # Wall clock, so the wait is comparable across worker processes.
+                result, queue_wait = await loop.run_in_executor(
+                    self._executor, _run_agent_timed, agent_name, payload, method, time.time()
+                )
+        STAGE_QUEUE_SECONDS.observe(max(0.0, queue_wait), stage=stage)
+        return result
+
+    async def scrape(self, url: str) -> Dict[str, Any]:
+        async with self._stage_limits.stage("scrape"):
+            with span("scrape", url=url), STAGE_SECONDS.time(stage="scrape"):
+                return await registry.get("smart_scraper").run_async(url)
+
+    async def extract(self, scraped_data: Dict[str, Any]) -> List[Claim]:
+        return await self._run_model_stage("claim_extractor", scraped_data)
+
+    async def match(self, claims: List[Claim]) -> List[FactCheck]:
+        return await self._run_model_stage("fact_check_matcher", claims)
+
+    async def score(self, fact_checks: List[FactCheck]) -> List[ScoredClaim]:
+        # Rule-based scoring is cheap enough to run inline.
+        with STAGE_SECONDS.time(stage="score"):
+            return registry.get("truth_scorer").run(fact_checks)
+
+    async def fetch_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        # Through the executor, so with worker processes the API process never loads the matcher.
+        return await self._run_model_stage("fact_check_matcher", document_id, method="fetch_document")
+
+    async def format(self, scored_claims: List[ScoredClaim]) -> str:
+        async with self._stage_limits.stage("format"):
+            with span("format"), STAGE_SECONDS.time(stage="format"):
+                return await self._formatter.format(scored_claims)
+
+    async def lookup_claims(self, claims: List[Claim], corpus_version: str) -> ClaimLookup:
+        """
+        Matches and scores `claims` through the claim-verdict cache: near-duplicates
+        are collapsed and claims close to an earlier one reuse its verdict, so
+        only new claims reach the matcher and the scorer.
+        """
+        embeddings = []
+        if claims:
+            embeddings = await self._run_model_stage(
+                "fact_check_matcher", [claim.claim_text for claim in claims], method="embed_claims"
+            )
+        lookup = self._claim_cache.lookup(claims, embeddings, corpus_version)
+        if lookup.pending:
+            fact_checks = await self.match(lookup.pending)
+            self._claim_cache.store(lookup, await self.score(fact_checks), corpus_version)
+        return lookup
+
+    def corpus_version(self) -> str:
+        # Blocking: a live store may open a newly published snapshot here, so
+        # async callers run it in a thread. Imported lazily so the API process
+        # does not load the matcher's model stack here.
+        from agents.fact_check_matcher.agent import get_corpus_version
+        return get_corpus_version(registry.get("vector_store"))
+
+    @staticmethod
+    def _error_result(url: str, error: str) -> Dict[str, Any]:
+        return {"url": url, "error": error, "claims": [], "report": None}
+
+    @staticmethod
+    def _build_result(url: str, scored_claims: List[ScoredClaim], report: str) -> Dict[str, Any]:
+        return {
+            "url": url,
+            "claims": [sc.model_dump() for sc in scored_claims],
+            "report": report,
+        }
+
+    def _cached_content_result(self, url: str, markdown: str, corpus_version: str) -> Optional[Dict[str, Any]]:
+        """Looks up a syndicated copy of the same article and remembers it under `url` too."""
+        if not markdown:
+            return None
+        cached = self._cache.get_by_content(markdown, corpus_version)
+        if cached is None:
+            return None
+        result = {**cached, "url": url}
+        self._cache.put(result, corpus_version, url=url)
+        return result
+
+    async def verify(self, url: str) -> Dict[str, Any]:
+        """Runs every stage for `url` and returns the result as a dictionary."""
+        with span("verify", url=url), VERIFY_SECONDS.time(mode="single"):
+            return await self._verify(url)
+
+    async def _verify(self, url: str) -> Dict[str, Any]:
+        corpus_version = await asyncio.to_thread(self.corpus_version)
+        cached = self._cache.get_by_url(url, corpus_version)
+        if cached is not None:
+            return cached
+
+        scraped_data = await self.scrape(url)
+        if scraped_data.get("error"):
+            return self._error_result(url, scraped_data["error"])
+
+        markdown = scraped_data.get("content", "")
+        cached = self._cached_content_result(url, markdown, corpus_version)
+        if cached is not None:
+            return cached
+
+        claims = await self.extract(scraped_data)
+        scored_claims = (await self.lookup_claims(claims, corpus_version)).results()
+        report = await self.format(scored_claims)
+
+        result = self._build_result(url, scored_claims, report)
+        self._cache.put(result, corpus_version, url=url, markdown=markdown)
+        return result
+
+    async def run(self, url: str) -> str:
+        """Verifies `url` and returns the JSON response body."""
+        return json.dumps(await self.verify(url))
+
+    @staticmethod
+    def _event(name: str, data: Any) -> Dict[str, Any]:
+        if hasattr(data, "model_dump"):
+            data = data.model_dump()
+        return {"event": name, "data": data}
+
+    async def _replay(self, result: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Replays a cached result with the same events a live run ends with."""
+        yield self._event("cached", {"url": result["url"]})
+        for scored_claim in result["claims"]:
+            yield self._event("score", scored_claim)
+        if result.get("report"):
+            yield self._event("report", {"text": result["report"]})
+        yield self._event("done", result)
+
+    async def _stream_claims(self, scraped_data: Dict[str, Any]) -> AsyncIterator[Claim]:
+        """
+        Yields unique claims chunk group by chunk group. Each summarizer call is
+        a separate executor job, so this works with thread and process workers.
+        """
+        chunks: List[str] = await self._run_model_stage("claim_extractor", scraped_data, method="chunk_article")
+        seen_claims = set()
+        for start in range(0, len(chunks), self._stream_chunk_batch):
+            claims = await self._run_model_stage(
+                "claim_extractor", chunks[start:start + self._stream_chunk_batch], method="summarize_chunks"
+            )
+            for claim in claims:
+                # Separate chunks can summarize to the same claim; only surface it once.
+                if claim.claim_text not in seen_claims:
+                    seen_claims.add(claim.claim_text)
+                    yield claim
+
+    async def stream(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Verifies `url` and yields progress events as each stage completes:
+        'scraped', then 'claim', 'match' and 'score' per claim, then the
+        formatter's output as 'report' text pieces and finally 'done' with the
+        full result. Failures end the stream with an 'error' event.
+
+        Claims are matched and scored in micro-batches as they are extracted,
+        so the first scores arrive while the rest of the article is still
+        being summarized.
+        """
+        try:
+            async for event in self._stream(url):
+                yield event
+        except Exception as e:
+            # Headers are already sent, so a failing stage can only be reported in-band.
+            yield self._event("error", self._error_result(url, f"Verification failed: {type(e).__name__}: {e}"))
+
+    async def _stream(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        start = time.perf_counter()
+        corpus_version = await asyncio.to_thread(self.corpus_version)
+        cached = self._cache.get_by_url(url, corpus_version)
+        if cached is not None:
+            async for event in self._replay(cached):
+                yield event
+            return
+
+        scraped_data = await self.scrape(url)
+        if scraped_data.get("error"):
+            yield self._event("error", self._error_result(url, scraped_data["error"]))
+            return
+
+        markdown = scraped_data.get("content", "")
+        yield self._event("scraped", {"url": url, "characters": len(markdown)})
+        cached = self._cached_content_result(url, markdown, corpus_version)
+        if cached is not None:
+            async for event in self._replay(cached):
+                yield event
+            return
+
+        scored_claims: List[ScoredClaim] = []
+        # Claim keys already reported, so near-duplicates in later batches are collapsed too.
+        seen_verdicts = set()
+        # Extraction keeps running in the background while each micro-batch of
+        # claims is matched and scored; closing the batches stops it if a stage fails.
+        async with aclosing(micro_batches(
+            self._stream_claims(scraped_data), self._stream_batch_size, self._stream_max_wait
+        )) as batches:
+            async for claims in batches:
+                for claim in claims:
+                    yield self._event("claim", claim)
+
+                batch_scored_claims = (await self.lookup_claims(claims, corpus_version)).results(seen_verdicts)
+                for scored_claim in batch_scored_claims:
+                    yield self._event("match", scored_claim.fact_check)
+
+                for scored_claim in batch_scored_claims:
+                    scored_claims.append(scored_claim)
+                    yield self._event("score", scored_claim)
+
+        report_parts: List[str] = []
+        async with self._stage_limits.stage("format"):
+            async for text in self._formatter.stream(scored_claims):
+                report_parts.append(text)
+                yield self._event("report", {"text": text})
+
+        result = self._build_result(url, scored_claims, "".join(report_parts))
+        self._cache.put(result, corpus_version, url=url, markdown=markdown)
+        VERIFY_SECONDS.observe(time.perf_counter() - start, mode="stream")
+        yield self._event("done", result)
+
+    async def verify_many(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Verifies several URLs together. Articles are scraped concurrently, all
+        of their chunks go through one batched summarizer call, identical and
+        near-duplicate claims are matched only once, and the results are fanned
+        back out per URL.
+        """
+        with span("verify_many", urls=len(urls)), VERIFY_SECONDS.time(mode="batch"):
+            return await self._verify_many(urls)
+
+    async def _verify_many(self, urls: List[str]) -> List[Dict[str, Any]]:
+        corpus_version = await asyncio.to_thread(self.corpus_version)
+        results: Dict[int, Dict[str, Any]] = {}
+
+        pending = []
+        for i, url in enumerate(urls):
+            cached = self._cache.get_by_url(url, corpus_version)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+
+        scraped_items = await asyncio.gather(*(self.scrape(urls[i]) for i in pending))
+
+        to_process = []
+        for i, scraped_data in zip(pending, scraped_items):
+            if scraped_data.get("error"):
+                results[i] = self._error_result(urls[i], scraped_data["error"])
+                continue
+            cached = self._cached_content_result(urls[i], scraped_data.get("content", ""), corpus_version)
+            if cached is not None:
+                results[i] = cached
+                continue
+            to_process.append((i, scraped_data))
+
+        if to_process:
+            claims_per_article: List[List[Claim]] = await self._run_model_stage(
+                "claim_extractor", [scraped_data for _, scraped_data in to_process], method="run_many"
+            )
+
+            # Deduplicate identical claims across articles before the batched match.
+            unique_claims = list({
+                claim.claim_text: claim
+                for claims in claims_per_article
+                for claim in claims
+            }.values())
+            print(f"Matching {len(unique_claims)} unique claims for {len(to_process)} articles.")
+            lookup = await self.lookup_claims(unique_claims, corpus_version)
+            index_by_text = {claim.claim_text: index for index, claim in enumerate(unique_claims)}
+
+            async def finish(i: int, scraped_data: Dict[str, Any], claims: List[Claim]):
+                # Near-duplicates are collapsed within each article, not across articles.
+                scored_claims = collapse(lookup.verdict_for(index_by_text[claim.claim_text]) for claim in claims)
+                report = await self.format(scored_claims)
+                results[i] = self._build_result(urls[i], scored_claims, report)
+                self._cache.put(results[i], corpus_version, url=urls[i], markdown=scraped_data.get("content", ""))
+
+            await asyncio.gather(*(
+                finish(i, scraped_data, claims)
+                for (i, scraped_data), claims in zip(to_process, claims_per_article)
+            ))
+
+        return [results[i] for i in range(len(urls))]
+
+    async def run_many(self, urls: List[str]) -> str:
+        """Verifies every URL in `urls` and returns the JSON response body."""
+        return json.dumps(await self.verify_many(urls))
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from core.config import env_str
+from core.metrics import MODEL_LOAD_SECONDS
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of long-lived models and agents.
+
+    Every entry is built once by its factory and the same instance is handed
+    to every caller afterwards, so a verification never pays for model loading.
+    Load and reuse counts are tracked per entry.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._entry_locks: Dict[str, threading.Lock] = {}
+        self._loads: Dict[str, int] = {}
+        self._reuses: Dict[str, int] = {}
+        self._load_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Registers (or replaces) the factory used to build `name`."""
+        with self._lock:
+            self._factories[name] = factory
+            self._entry_locks.setdefault(name, threading.Lock())
+            self._instances.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """Returns the shared instance for `name`, building it on first use."""
+        with self._lock:
+            if name in self._instances:
+                self._reuses[name] = self._reuses.get(name, 0) + 1
+                return self._instances[name]
+            if name not in self._factories:
+                raise KeyError(f"No factory registered for '{name}'.")
+            entry_lock = self._entry_locks[name]
+
+        with entry_lock:
+            # Another thread may have finished loading while we waited.
+            with self._lock:
+                if name in self._instances:
+                    self._reuses[name] = self._reuses.get(name, 0) + 1
+                    return self._instances[name]
+                factory = self._factories[name]
+
+            print(f"[ModelRegistry] Loading '{name}'...")
+            start = time.perf_counter()
+            instance = factory()
+            elapsed = time.perf_counter() - start
+            MODEL_LOAD_SECONDS.observe(elapsed, entry=name)
+
+            with self._lock:
+                self._instances[name] = instance
+                self._loads[name] = self._loads.get(name, 0) + 1
+                self._load_seconds[name] = elapsed
+            print(f"[ModelRegistry] Loaded '{name}' in {elapsed:.2f}s.")
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            return name in self._instances
+
+    def warm_up(self, names: Optional[Iterable[str]] = None):
+        """Eagerly builds the given entries (all registered entries by default)."""
+        with self._lock:
+            targets = list(names) if names is not None else list(self._factories)
+        for name in targets:
+            if not self.is_loaded(name):
+                self.get(name)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns load/reuse counts and load time for every registered entry."""
+        with self._lock:
+            return {
+                name: {
+                    "loaded": name in self._instances,
+                    "loads": self._loads.get(name, 0),
+                    "reuses": self._reuses.get(name, 0),
+                    "load_seconds": self._load_seconds.get(name),
+                }
+                for name in self._factories
+            }
+
+
+def _register_defaults(reg: ModelRegistry):
+    # Agent modules are imported inside the factories so that importing the
+    # registry does not pull in torch, transformers or chromadb.
+    # With FACTOS_INFERENCE_SERVER set, both models are proxies to the shared
+    # sidecar (`python -m core.inference_server`) instead of local copies.
+    def summarizer():
+        if env_str("FACTOS_INFERENCE_SERVER"):
+            from core.inference_server import RemoteSummarizer
+            return RemoteSummarizer()
+        from agents.claim_extractor.agent import load_summarizer
+        return load_summarizer()
+
+    def embedding_model():
+        if env_str("FACTOS_INFERENCE_SERVER"):
+            from core.inference_server import RemoteEmbedder
+            return RemoteEmbedder()
+        from agents.fact_check_matcher.agent import load_embedding_model
+        return load_embedding_model()
+
+    def vector_store():
+        from agents.fact_check_matcher.agent import open_vector_store
+        return open_vector_store()
+
+    def firecrawl_client():
+        from core.firecrawl import FirecrawlClient
+        return FirecrawlClient()
+
+    def smart_scraper():
+        from agents.smart_scraper.agent import SmartScraperAgent
+        return SmartScraperAgent(client=reg.get("firecrawl_client"))
+
+    def claim_extractor():
+        from agents.claim_extractor.agent import ClaimExtractorAgent
+        return ClaimExtractorAgent(
+            summarizer=reg.get("summarizer"),
+            embedding_model=reg.get("embedding_model"),
+        )
+
+    def fact_check_matcher():
+        from agents.fact_check_matcher.agent import FactCheckMatcherAgent
+        return FactCheckMatcherAgent(
+            embedding_model=reg.get("embedding_model"),
+            vector_store=reg.get("vector_store"),
+        )
+
+    def truth_scorer():
+        from agents.truth_scorer.agent import TruthScorerAgent
+        return TruthScorerAgent()
+
+    def response_formatter():
+        from agents.response_formatter.agent import ResponseFormatterAgent
+        return ResponseFormatterAgent()
+
+    def formatter_policy():
+        from core.formatter import FormatterPolicy
+        return FormatterPolicy(local_formatter=reg.get("response_formatter"))
+
+    def claim_cache():
+        from core.claim_cache import ClaimVerdictCache
+        return ClaimVerdictCache()
+
+    reg.register("summarizer", summarizer)
+    reg.register("embedding_model", embedding_model)
+    reg.register("vector_store", vector_store)
+    reg.register("firecrawl_client", firecrawl_client)
+    reg.register("smart_scraper", smart_scraper)
+    reg.register("claim_extractor", claim_extractor)
+    reg.register("fact_check_matcher", fact_check_matcher)
+    reg.register("truth_scorer", truth_scorer)
+    reg.register("response_formatter", response_formatter)
+    reg.register("formatter_policy", formatter_policy)
+    reg.register("claim_cache", claim_cache)
+
+
+registry = ModelRegistry()
+_register_defaults(registry)
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from core.registry import ModelRegistry
+
+# Warm-up order: models first, then the index, then the agents built on them,
+# so each phase is timed on its own instead of inside the agent that needs it.
+MODEL_ENTRIES = ("summarizer", "embedding_model")
+INDEX_ENTRIES = ("vector_store",)
+
+
+class WarmUp:
+    """
+    Loads every registry entry on a background thread at startup, so the
+    server accepts connections (and answers liveness probes) immediately,
+    and records how long imports, model loading and opening the index took.
+
+    Entries in `skip` are not loaded here, e.g. the models that only model
+    worker processes use. `start_workers` (if given) is called last and must
+    block until those workers are ready; readiness waits for it.
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        import_seconds: Optional[float] = None,
+        skip: Iterable[str] = (),
+        start_workers: Optional[Callable[[], int]] = None,
+    ):
+        self._registry = registry
+        self._import_seconds = import_seconds
+        self._skip = set(skip)
+        self._start_workers = start_workers
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._phases: Dict[str, Dict[str, float]] = {"models": {}, "index": {}, "agents": {}, "workers": {}}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._error: Optional[str] = None
+
+    def start(self) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name="factos-warm-up", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _load(self, phase: str, name: str):
+        start = time.perf_counter()
+        self._registry.get(name)
+        with self._lock:
+            self._phases[phase][name] = time.perf_counter() - start
+
+    def _run(self):
+        try:
+            for name in MODEL_ENTRIES:
+                if name not in self._skip:
+                    self._load("models", name)
+            for name in INDEX_ENTRIES:
+                self._load("index", name)
+            for name in self._registry.stats():
+                if name not in MODEL_ENTRIES and name not in INDEX_ENTRIES and name not in self._skip:
+                    self._load("agents", name)
+            if self._start_workers is not None:
+                start = time.perf_counter()
+                workers = self._start_workers()
+                with self._lock:
+                    self._phases["workers"][f"{workers} model workers"] = time.perf_counter() - start
+        except Exception as e:
+            with self._lock:
+                self._error = f"{type(e).__name__}: {e}"
+            print(f"[startup] Warm-up failed: {self._error}")
+            return
+        finally:
+            with self._lock:
+                self._finished_at = time.perf_counter()
+        print(f"[startup] {self.summary()}")
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._finished_at is not None and self._error is None
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = {phase: dict(entries) for phase, entries in self._phases.items()}
+            finished_at, error, started_at = self._finished_at, self._error, self._started_at
+        if finished_at is not None:
+            status = "failed" if error else "ready"
+        else:
+            status = "warming_up" if started_at is not None else "not_started"
+        return {
+            "status": status,
+            "error": error,
+            "import_s": self._import_seconds,
+            "model_load_s": phases["models"],
+            "index_open_s": sum(phases["index"].values()),
+            "agents_s": phases["agents"],
+            "workers_s": sum(phases["workers"].values()),
+            "warm_up_s": (finished_at or time.perf_counter()) - started_at if started_at is not None else None,
+        }
+
+    def summary(self) -> str:
+        report = self.report()
+        models = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in report["model_load_s"].items())
+        import_s = f"{report['import_s']:.1f}s" if report["import_s"] is not None else "n/a"
+        return (
+            f"Ready after {report['warm_up_s']:.1f}s warm-up: imports {import_s}, "
+            f"models {sum(report['model_load_s'].values()):.1f}s ({models}), "
+            f"index {report['index_open_s']:.1f}s, agents {sum(report['agents_s'].values()):.1f}s, "
+            f"workers {report['workers_s']:.1f}s."
+        )
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from core.config import env_int
+
+T = TypeVar("T")
+
+_ITEM, _END, _ERROR = "item", "end", "error"
+
+
+async def iterate_in_thread(
+    iterator_factory: Callable[[], Iterator[T]],
+    executor: Optional[Executor] = None,
+) -> AsyncIterator[T]:
+    """
+    Runs a blocking generator on a worker thread and yields each item on the
+    event loop as soon as it is produced. Closing the async iterator early
+    stops the generator after the item it is currently computing.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def publish(kind: str, value=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (kind, value))
+        except RuntimeError:
+            # The event loop has already closed; nobody is listening any more.
+            stopped.set()
+
+    def produce():
+        try:
+            for item in iterator_factory():
+                if stopped.is_set():
+                    return
+                publish(_ITEM, item)
+        except BaseException as e:
+            publish(_ERROR, e)
+            return
+        publish(_END)
+
+    loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == _END:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stopped.set()
+
+
+async def micro_batches(items: AsyncIterator[T], max_size: int, max_wait: float) -> AsyncIterator[List[T]]:
+    """
+    Groups `items` into lists of at most `max_size`, flushing a partial batch
+    once its first item has waited `max_wait` seconds. The source is drained
+    by a background task, so the producer keeps running while the consumer
+    works on the previous batch.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def drain():
+        try:
+            async for item in items:
+                await queue.put((_ITEM, item))
+        except Exception as e:
+            await queue.put((_ERROR, e))
+            return
+        await queue.put((_END, None))
+
+    drainer = asyncio.ensure_future(drain())
+    # A pending `queue.get()` is carried across waits instead of being cancelled,
+    # so an item that arrives just as a wait times out is never lost.
+    getter: Optional[asyncio.Future] = None
+
+    async def next_entry(timeout: Optional[float]):
+        nonlocal getter
+        if getter is None:
+            getter = asyncio.ensure_future(queue.get())
+        done, _ = await asyncio.wait({getter}, timeout=timeout)
+        if not done:
+            return None
+        entry, getter = getter.result(), None
+        return entry
+
+    try:
+        finished = False
+        while not finished:
+            kind, value = await next_entry(None)
+            if kind == _END:
+                return
+            if kind == _ERROR:
+                raise value
+
+            batch = [value]
+            deadline = loop.time() + max_wait
+            error: Optional[BaseException] = None
+            while len(batch) < max_size:
+                entry = await next_entry(max(0.0, deadline - loop.time()))
+                if entry is None:
+                    break
+                kind, value = entry
+                if kind == _ITEM:
+                    batch.append(value)
+                    continue
+                finished = True
+                error = value if kind == _ERROR else None
+                break
+
+            yield batch
+            if error is not None:
+                raise error
+    finally:
+        if getter is not None:
+            getter.cancel()
+        drainer.cancel()
+
+
+def micro_batch_settings() -> Tuple[int, float]:
+    """
+    Micro-batch limits for streamed claims: `FACTOS_STREAM_BATCH_SIZE` claims
+    per match call, flushed after `FACTOS_STREAM_MAX_WAIT_MS` milliseconds.
+    """
+    max_size = max(1, env_int("FACTOS_STREAM_BATCH_SIZE", 8))
+    max_wait = max(0, env_int("FACTOS_STREAM_MAX_WAIT_MS", 50)) / 1000
+    return max_size, max_wait
@@ -1,11 +1,31 @@
-from fastapi import FastAPI, Response
-from pydantic import BaseModel
+import time
+
+_import_start = time.perf_counter()
+
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
+from core.admission import AdmissionController, ClientDisconnected, Overloaded, cancel_on_disconnect
+from core.config import env_int
+from core.inference_server import InferenceServerError
+from core.metrics import metrics
 from core.pipeline import VerificationPipeline
+from core.registry import registry
+from core.startup import WarmUp
 
 load_dotenv()
 
+# Model-heavy modules (torch, transformers, chromadb) are only imported by the
+# registry factories, so this covers the web stack and the pipeline wiring.
+import_seconds = time.perf_counter() - _import_start
+
 app = FastAPI(
     title="Factos ADK",
     description="A multi-agent system for verifying news truth.",
@@ -13,18 +33,184 @@ app = FastAPI(
 )
 
 pipeline = VerificationPipeline()
+admission = AdmissionController()
+# With worker processes the models load there, not in the API process.
+warm_up = WarmUp(
+    registry,
+    import_seconds=import_seconds,
+    skip=pipeline.worker_entries,
+    start_workers=pipeline.start_workers,
+)
 
 
 class VerifyRequest(BaseModel):
     url: str
 
 
+# Every URL of a batch is scraped and summarized in one request; keep it bounded.
+MAX_BATCH_URLS = max(1, env_int("FACTOS_MAX_BATCH_URLS", 20))
+
+
+class VerifyBatchRequest(BaseModel):
+    urls: List[str] = Field(min_length=1, max_length=MAX_BATCH_URLS)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    # Shed load quickly and tell clients when to come back.
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody reads this; 499 keeps cancelled requests apart in access logs.
+    admission.record_disconnect()
+    return Response(status_code=499)
+
+
+@app.exception_handler(InferenceServerError)
+async def inference_server_error_handler(request: Request, exc: InferenceServerError):
+    # The shared model sidecar is down or too slow; the request may succeed later.
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.on_event("startup")
+def warm_up_models():
+    # Load every model and agent once at service start instead of on the first
+    # request, in the background so the server starts answering probes at once.
+    warm_up.start()
+
+
+@app.on_event("shutdown")
+def shutdown_pipeline():
+    pipeline.shutdown()
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    report = warm_up.report()
+    return JSONResponse(content=report, status_code=200 if warm_up.ready else 503)
+
+
+@app.get("/startup")
+def startup_report():
+    return warm_up.report()
+
+
+@app.get("/registry")
+def registry_stats():
+    return registry.stats()
+
+
+@app.get("/cache")
+def cache_stats():
+    return pipeline.cache.stats()
+
+
+@app.get("/corpus")
+def corpus_info():
+    # Imported here so startup does not pull in the matcher's store modules.
+    from agents.fact_check_matcher.snapshots import LiveVectorStore
+
+    store = registry.get("vector_store")
+    info = {"corpus_version": store.version(), "passages": store.count()}
+    if isinstance(store, LiveVectorStore):
+        snapshots = store.snapshots
+        info.update(
+            active=store.active_version,
+            previous=snapshots.previous(),
+            versions=[snapshots.info(version) for version in snapshots.versions()],
+        )
+    return info
+
+
+@app.get("/admission")
+def admission_stats():
+    return {**admission.stats(), "stages": pipeline.stage_limits.stats()}
+
+
+@app.get("/claim-cache")
+def claim_cache_stats():
+    return pipeline.claim_cache.stats()
+
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/formatter")
+def formatter_stats():
+    return registry.get("formatter_policy").stats()
+
+
+@app.get("/documents/{document_id}")
+async def fact_check_document(document_id: str):
+    # Matches only carry a snippet; the full passage is fetched here when a client asks for it.
+    document = await pipeline.fetch_document(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Unknown document '{document_id}'.")
+    return document
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Factos ADK API"}
 
 
 @app.post("/verify")
-async def verify_article(request: VerifyRequest):
-    final_response = pipeline.run(request.url)
+async def verify_article(body: VerifyRequest, request: Request):
+    async with admission.admit():
+        final_response = await cancel_on_disconnect(pipeline.run(body.url), request.is_disconnected)
+    return Response(content=final_response, media_type="application/json")
+
+
+@app.post("/verify/batch")
+async def verify_articles(body: VerifyBatchRequest, request: Request):
+    # Charged per URL, since a batch does the work of that many single requests.
+    async with admission.admit(weight=len(body.urls)):
+        final_response = await cancel_on_disconnect(pipeline.run_many(body.urls), request.is_disconnected)
     return Response(content=final_response, media_type="application/json")
+
+
+async def _sse(events: AsyncIterator[Dict[str, Any]], request: Request) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            if await request.is_disconnected():
+                admission.record_disconnect()
+                break
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    finally:
+        # Closing the pipeline generator cancels the stages still running for it.
+        await events.aclose()
+
+
+@app.post("/verify/stream")
+async def verify_article_stream(body: VerifyRequest, request: Request):
+    # Admitted before the response starts, so an overloaded server answers 429/503 instead of an empty stream.
+    slot = await admission.acquire()
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for chunk in _sse(pipeline.stream(body.url), request):
+                yield chunk
+        finally:
+            slot.release()
+
+    # Server-sent events: one per completed stage, then the report as it is generated.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the body was never iterated; releasing twice is a no-op.
+        background=BackgroundTask(slot.release),
+    )
@@ -0,0 +1,57 @@
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+from agents.fact_check_matcher.agent import legacy_store_path, open_vector_store
+from agents.fact_check_matcher.snapshots import CorpusSnapshots
+from agents.fact_check_matcher.stores import DEFAULT_QUANT_DIR, QuantizedVectorStore, evaluate_recall
+
+
+def main():
+    """
+    Builds the compact quantized store from the existing Chroma corpus and
+    reports how much recall it loses against the Chroma results.
+    """
+    parser = argparse.ArgumentParser(description="Build a quantized copy of the fact-check corpus.")
+    parser.add_argument("--path", default=DEFAULT_QUANT_DIR, help="Output directory.")
+    parser.add_argument("--dtype", choices=["int8", "float16"], default="int8")
+    parser.add_argument("--rescore", action="store_true", help="Keep full-precision vectors for re-scoring.")
+    parser.add_argument("--k", type=int, default=10, help="Top-k used for the recall report.")
+    parser.add_argument("--queries", type=int, default=500, help="Number of corpus passages reused as queries.")
+    args = parser.parse_args()
+
+    print("--- Building Quantized Corpus ---")
+    # Read the Chroma corpus that is being served: the published snapshot if there is one.
+    snapshots = CorpusSnapshots("chroma")
+    current = snapshots.current()
+    chroma = open_vector_store("chroma", path=snapshots.path(current) if current else legacy_store_path("chroma"))
+    quantized = QuantizedVectorStore(path=args.path, dtype=args.dtype, rescore=args.rescore)
+
+    sample = []
+    for ids, embeddings, documents, metadatas in chroma.iter_all():
+        quantized.upsert(ids, embeddings, documents, metadatas)
+        sample.extend(embeddings[: max(0, args.queries - len(sample))])
+    quantized.persist()
+    # Both stores hold the same passages, so they can share the manifest.
+    if os.path.exists(chroma.manifest_path):
+        shutil.copyfile(chroma.manifest_path, quantized.manifest_path)
+    print(f"Wrote {quantized.count()} passages to {args.path}.")
+
+    if sample:
+        # Perturb corpus vectors slightly so queries are not exact duplicates.
+        rng = np.random.default_rng(0)
+        queries = np.asarray(sample, dtype=np.float32)
+        queries += rng.normal(scale=0.02, size=queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        report = evaluate_recall(quantized, chroma, queries, k=args.k)
+        print("Recall versus Chroma:")
+        print(json.dumps(report, indent=2))
+
+    print("--- Quantized Corpus Finished ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 from dotenv import load_dotenv
@@ -16,14 +17,16 @@ if not os.getenv("GOOGLE_API_KEY"):
     else:
         raise ValueError("GEMINI_API_KEY or GOOGLE_API_KEY must be set in the environment.")
 
+from core.batch import run_batch
 from core.factos_agent import FactosAgent
 
+DEFAULT_TEST_URL = "https://www.theguardian.com/world/2025/jun/11/uk-and-gibraltar-strike-deal-over-territorys-future-and-borders"
 
-async def main():
+
+async def verify_one(test_url: str = DEFAULT_TEST_URL):
     """
     Runs the Factos verification pipeline with a test URL.
     """
-    test_url = "https://www.theguardian.com/world/2025/jun/11/uk-and-gibraltar-strike-deal-over-territorys-future-and-borders"
     print(f"--- Running ADK Agent for URL: {test_url} ---")
 
     session_service = InMemorySessionService()
@@ -64,5 +67,28 @@ async def main():
     print("\n--- Pipeline Finished ---")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Verify one article, or a JSONL file of URLs in bulk.")
+    parser.add_argument("--url", default=DEFAULT_TEST_URL, help="Single URL to verify with the ADK agent.")
+    parser.add_argument("--batch", metavar="URLS_JSONL", help="JSONL file with a 'url' field per line.")
+    parser.add_argument("--output", default="data/verification_results.jsonl", help="Batch results, one JSON per line.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--retry-errors", action="store_true", help="Verify again URLs whose saved result is an error.")
+    args = parser.parse_args()
+
+    if not args.batch:
+        asyncio.run(verify_one(args.url))
+        return
+
+    summary = run_batch(args.batch, args.output, workers=args.workers, retry_errors=args.retry_errors)
+    minutes = summary["elapsed_s"] / 60
+    rate = summary["verified"] / minutes if minutes else 0.0
+    print("\n--- Batch Finished ---")
+    print(
+        f"Verified {summary['verified']} articles ({summary['errors']} errors, {summary['skipped']} skipped) "
+        f"in {minutes:.1f} min: {rate:.1f} articles/min. Results in {args.output}."
+    )
+
+
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    main()
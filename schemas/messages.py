@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, HttpUrl
 
 
@@ -20,9 +20,17 @@ class Claim(BaseModel):
 class FactCheck(BaseModel):
     """
     A fact-check result corresponding to a claim.
+    The matched passage is referenced rather than copied: `document_id` is its
+    ID in the vector store, `source_url` and the character span locate it in
+    the source page, and `snippet` is a short excerpt. The full passage text
+    is fetched on demand with `FactCheckMatcherAgent.fetch_document`.
     """
     claim: Claim
-    match_document: str
+    document_id: str
+    source_url: Optional[str] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
+    snippet: str
     match_score: float
 
 
@@ -0,0 +1,31 @@
+from agents.claim_extractor.agent import ClaimExtractorAgent
+
+
+class FakeTokenizer:
+    model_max_length = 1024
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+class FakeSummarizer:
+    tokenizer = FakeTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, **options):
+        self.calls.append(options)
+        return [{"summary_text": f"summary of {text}"} for text in texts]
+
+
+def test_summarize_chunks_batches_the_summarizer_call(monkeypatch):
+    monkeypatch.setenv("FACTOS_SUMMARIZER_BATCH_SIZE", "4")
+    summarizer = FakeSummarizer()
+    agent = ClaimExtractorAgent(summarizer=summarizer)
+
+    claims = agent.summarize_chunks(["a", "b", "c", "d", "e", "f"])
+    agent.summarize_chunks(["g"])
+
+    assert [claim.claim_text for claim in claims] == [f"summary of {text}" for text in "abcdef"]
+    assert [call["batch_size"] for call in summarizer.calls] == [4, 1]
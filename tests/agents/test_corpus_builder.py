@@ -0,0 +1,42 @@
+import asyncio
+
+from agents.corpus_builder.agent import CorpusBuilderAgent
+from core.firecrawl import FirecrawlError
+
+
+class FakeClient:
+    has_credentials = True
+
+    def __init__(self, responses):
+        self._responses = responses
+
+    async def scrape_async(self, url):
+        response = self._responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+async def collect(agent, urls):
+    return dict([item async for item in agent.crawl(urls, concurrency=2)])
+
+
+def test_crawl_yields_a_result_for_every_url_even_when_scrapes_fail():
+    client = FakeClient({
+        "ok": {"success": True, "data": {"markdown": "# Page"}},
+        "firecrawl-error": FirecrawlError("boom", status_code=500),
+        "bad-json": ValueError("Expecting value"),
+        "null-data": {"success": True, "data": None},
+        "unsuccessful": {"success": False, "error": "blocked"},
+    })
+    agent = CorpusBuilderAgent(client=client)
+
+    results = asyncio.run(asyncio.wait_for(collect(agent, list(client._responses)), timeout=5))
+
+    assert results == {
+        "ok": "# Page",
+        "firecrawl-error": None,
+        "bad-json": None,
+        "null-data": None,
+        "unsuccessful": None,
+    }
@@ -0,0 +1,281 @@
+import os
+
+import numpy as np
+import pytest
+
+from agents.fact_check_matcher.agent import FactCheckMatcherAgent, open_vector_store
+from agents.fact_check_matcher.snapshots import CorpusSnapshots, LiveVectorStore
+from agents.fact_check_matcher.stores import FaissVectorStore, QuantizedVectorStore, VectorStore
+
+
+def unit_vectors(n, dimension=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add(store, ids, vectors):
+    store.upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[f"text of {passage_id}" for passage_id in ids],
+        metadatas=[{"source_url": f"https://example.com/{passage_id}"} for passage_id in ids],
+    )
+
+
+STORES = {
+    "faiss": lambda path: FaissVectorStore(path=str(path), index_type="flat"),
+    "quantized": lambda path: QuantizedVectorStore(path=str(path), dtype="int8"),
+}
+
+
+ROUND_TRIP_STORES = {
+    "faiss-flat": lambda path: FaissVectorStore(path=str(path), index_type="flat"),
+    "faiss-hnsw": lambda path: FaissVectorStore(path=str(path), index_type="hnsw"),
+    "faiss-ivf": lambda path: FaissVectorStore(path=str(path), index_type="ivf", nlist=2, nprobe=2),
+    "quantized-int8": lambda path: QuantizedVectorStore(path=str(path), dtype="int8"),
+    "quantized-float16": lambda path: QuantizedVectorStore(path=str(path), dtype="float16"),
+    "quantized-rescore": lambda path: QuantizedVectorStore(path=str(path), dtype="int8", rescore=True),
+}
+
+
+@pytest.mark.parametrize("backend", sorted(ROUND_TRIP_STORES))
+def test_store_round_trip(tmp_path, backend):
+    vectors = unit_vectors(100)
+    ids = [f"p{i}" for i in range(100)]
+    store = ROUND_TRIP_STORES[backend](tmp_path)
+    add(store, ids, vectors)
+    store.persist()
+
+    reopened = ROUND_TRIP_STORES[backend](tmp_path)
+    assert reopened.count() == 100
+    assert reopened.existing_ids(["p3", "missing"]) == {"p3"}
+    assert reopened.get(["p3"]) == {"p3": ("text of p3", {"source_url": "https://example.com/p3"})}
+
+    hits = reopened.query(vectors[:10], k=3)
+    assert [row[0].passage_id for row in hits] == ids[:10]
+    assert all(len(row) == 3 for row in hits)
+    assert hits[0][0].similarity == pytest.approx(1.0, abs=0.02)
+
+    reopened.delete(["p0"])
+    assert "p0" not in {hit.passage_id for hit in reopened.query(vectors[:1], k=3)[0]}
+    assert reopened.count() == 99
+
+
+@pytest.mark.parametrize("backend", sorted(ROUND_TRIP_STORES))
+def test_deleted_near_duplicates_do_not_crowd_out_live_hits(tmp_path, backend):
+    rng = np.random.default_rng(1)
+    query = unit_vectors(1, seed=2)
+    near = query + 0.01 * rng.normal(size=(25, 16)).astype(np.float32)
+    vectors = np.concatenate([near / np.linalg.norm(near, axis=1, keepdims=True), unit_vectors(25)])
+    ids = [f"p{i}" for i in range(50)]
+    store = ROUND_TRIP_STORES[backend](tmp_path)
+    add(store, ids, vectors)
+    store.persist()
+
+    store.delete(ids[:25])
+    assert len(store.query(query, k=5)[0]) == min(5, store.count())
+
+    # Persisting drops the tombstoned vectors; a revived passage is added back.
+    store.persist()
+    add(store, ids[:1], vectors[:1])
+    store.persist()
+    reopened = ROUND_TRIP_STORES[backend](tmp_path)
+    row = reopened.query(query, k=5)[0]
+    assert reopened.count() == 26
+    assert len(row) == min(5, reopened.count())
+    assert row[0].passage_id == "p0"
+
+
+@pytest.mark.parametrize("backend", sorted(STORES))
+def test_version_changes_when_a_passage_is_replaced_at_the_same_count(tmp_path, backend):
+    store = STORES[backend](tmp_path)
+    vectors = unit_vectors(3)
+    add(store, ["a", "b", "c"], vectors)
+    store.delete(["c"])
+    store.persist()
+    before = store.version()
+
+    # Same number of stored vectors and live passages, different corpus.
+    store.delete(["b"])
+    add(store, ["c"], vectors[2:])
+    store.persist()
+
+    assert store.count() == 2
+    assert store.version() != before
+    # Another process opening the same files sees the same version.
+    assert STORES[backend](tmp_path).version() == store.version()
+
+
+def test_enabling_rescore_on_a_store_without_full_vectors_keeps_rows_aligned(tmp_path):
+    vectors = unit_vectors(20)
+    store = QuantizedVectorStore(path=str(tmp_path), dtype="int8", rescore=False)
+    add(store, [f"p{i}" for i in range(10)], vectors[:10])
+    store.persist()
+
+    store = QuantizedVectorStore(path=str(tmp_path), dtype="int8", rescore=True)
+    add(store, [f"p{i}" for i in range(10, 20)], vectors[10:])
+    store.persist()
+
+    reopened = QuantizedVectorStore(path=str(tmp_path), dtype="int8", rescore=True)
+    hits = reopened.query(vectors, k=1)
+    assert [row[0].passage_id for row in hits] == [f"p{i}" for i in range(20)]
+    assert hits[15][0].similarity == pytest.approx(1.0, abs=1e-5)
+
+
+class WhitespaceTokenizer:
+    def __call__(self, text, **kwargs):
+        offsets, start = [], None
+        for i, char in enumerate(text + " "):
+            if char.isspace() and start is not None:
+                offsets.append((start, i))
+                start = None
+            elif not char.isspace() and start is None:
+                start = i
+        return {"offset_mapping": offsets}
+
+
+class FakeEmbeddingModel:
+    tokenizer = WhitespaceTokenizer()
+    max_seq_length = 64
+
+    def encode(self, texts, **kwargs):
+        return np.vstack([unit_vectors(1, seed=sum(map(ord, text)))[0] for text in texts])
+
+
+def make_matcher(store):
+    return FactCheckMatcherAgent(embedding_model=FakeEmbeddingModel(), vector_store=store)
+
+
+def stored_texts(store):
+    with store._table._lock:
+        ids = [row[0] for row in store._table._conn.execute("SELECT passage_id FROM passages WHERE deleted = 0")]
+    return sorted(document for document, _ in store.get(ids).values())
+
+
+def test_a_passage_moved_to_another_page_in_the_same_batch_is_kept(tmp_path):
+    store = QuantizedVectorStore(path=str(tmp_path), dtype="float16")
+    matcher = make_matcher(store)
+    matcher.add_documents(["alpha beta", "gamma delta"], sources=["https://a", "https://b"])
+
+    # Page b is processed first and drops the text that page a picks up.
+    matcher.add_documents(["epsilon", "gamma delta"], sources=["https://b", "https://a"])
+
+    assert stored_texts(store) == ["epsilon", "gamma delta"]
+
+
+def test_legacy_whole_page_entries_are_removed_once(tmp_path):
+    store = QuantizedVectorStore(path=str(tmp_path), dtype="float16")
+    add(store, ["doc_0", "doc_1"], unit_vectors(2))
+    matcher = make_matcher(store)
+
+    matcher.add_documents(["alpha beta"], sources=["https://a"])
+
+    assert stored_texts(store) == ["alpha beta"]
+    assert make_matcher(store)._manifest.legacy_ids_removed
+
+
+def test_ivf_index_is_retrained_once_the_corpus_outgrows_its_first_batch(tmp_path):
+    vectors = unit_vectors(640, dimension=32)
+    store = FaissVectorStore(path=str(tmp_path), index_type="ivf", nlist=8, nprobe=8)
+    add(store, [f"p{i}" for i in range(40)], vectors[:40])
+    store.persist()
+    assert store._index.nlist == 1
+
+    add(store, [f"p{i}" for i in range(40, 640)], vectors[40:])
+    store.persist()
+
+    reopened = FaissVectorStore(path=str(tmp_path), index_type="ivf", nprobe=8)
+    assert reopened._faiss.downcast_index(reopened._index).nlist == 8
+    assert reopened._index.ntotal == 640
+    hits = reopened.query(vectors[::64], k=1)
+    assert [row[0].passage_id for row in hits] == [f"p{i}" for i in range(0, 640, 64)]
+
+
+class RecordingStore(VectorStore):
+    def __init__(self, path):
+        self.path = path
+        self.manifest_path = os.path.join(path, "manifest.json")
+        self.closed = False
+
+    def count(self):
+        assert not self.closed
+        return 1
+
+    def existing_ids(self, ids):
+        return set()
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def query(self, embeddings, k):
+        return [[] for _ in embeddings]
+
+    def get(self, ids):
+        return {}
+
+    def version(self):
+        return self.path
+
+    def close(self):
+        self.closed = True
+
+
+def publish(snapshots, marker):
+    staging, _ = snapshots.prepare_staging(None, fresh=True)
+    open(os.path.join(staging, "marker"), "w").write(marker)
+    return snapshots.publish({"ok": True})
+
+
+@pytest.mark.parametrize("backend", ["recording", "chroma"])
+def test_live_store_closes_the_old_version_once_its_readers_are_done(tmp_path, backend):
+    if backend == "chroma":
+        pytest.importorskip("chromadb")
+        opener = lambda path: open_vector_store("chroma", path)
+        is_closed = lambda store: store._collection is None
+    else:
+        opener, is_closed = RecordingStore, lambda store: store.closed
+    snapshots = CorpusSnapshots(backend, root=str(tmp_path))
+    first = publish(snapshots, "first")
+    live = LiveVectorStore(snapshots, opener, poll_seconds=3600)
+    old_store = live._active.store
+
+    with live._reading() as store:
+        second = publish(snapshots, "second")
+        assert live.refresh()
+        # A query that started before the swap keeps a usable store.
+        store.count()
+        assert not is_closed(old_store)
+
+    assert is_closed(old_store)
+    assert live.version() == f"snapshot:{second}"
+    live.count()
+    assert snapshots.pinned() == {second}
+    assert first != second
+
+
+def test_prune_keeps_previous_and_pinned_versions(tmp_path):
+    snapshots = CorpusSnapshots("faiss", root=str(tmp_path), keep=2)
+    versions = [publish(snapshots, "v0")]
+    snapshots.pin(versions[0])
+    versions += [publish(snapshots, f"v{i}") for i in range(1, 4)]
+
+    assert snapshots.current() == versions[3]
+    assert snapshots.previous() == versions[2]
+    assert snapshots.versions() == [versions[0], versions[2], versions[3]]
+
+    snapshots.unpin(versions[0])
+    snapshots.prune()
+    assert snapshots.versions() == versions[2:]
+
+
+def test_rollback_serves_the_previous_version(tmp_path):
+    snapshots = CorpusSnapshots("faiss", root=str(tmp_path))
+    first, second = publish(snapshots, "first"), publish(snapshots, "second")
+
+    assert snapshots.rollback() == first
+    assert (snapshots.current(), snapshots.previous()) == (first, second)
+    with open(os.path.join(snapshots.path(first), "marker")) as f:
+        assert f.read() == "first"
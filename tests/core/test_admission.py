@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from core.admission import AdmissionController, Overloaded
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, timeout=5))
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queued=1, queue_timeout=5)
+        held = await controller.acquire()
+        waiting = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.acquire()
+        held.release()
+        (await waiting).release()
+        return excinfo.value, controller.stats()
+
+    error, stats = run(scenario())
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert stats["rejected"] == 1
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_queue_timeout_is_shed_with_503():
+    async def scenario():
+        controller = AdmissionController(max_active=1, max_queued=4, queue_timeout=0.05)
+        held = await controller.acquire()
+        with pytest.raises(Overloaded) as excinfo:
+            await controller.acquire()
+        held.release()
+        return excinfo.value, controller.stats()
+
+    error, stats = run(scenario())
+    assert error.status_code == 503
+    assert stats["timed_out"] == 1
+    assert stats["queued"] == 0
+
+
+def test_a_batch_is_charged_per_url_and_admitted_in_order():
+    async def scenario():
+        controller = AdmissionController(max_active=4, max_queued=8, queue_timeout=5)
+        single = await controller.acquire()
+        batch = asyncio.ensure_future(controller.acquire(weight=4))
+        later = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        # Three slots are free, but the batch needs four and the later request must not jump it.
+        assert not batch.done() and not later.done()
+        assert controller.stats()["queued"] == 5
+
+        single.release()
+        batch_slot = await batch
+        assert controller.stats()["active"] == 4 and not later.done()
+        batch_slot.release()
+        (await later).release()
+        return controller.stats()
+
+    stats = run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+    assert stats["admitted"] == 3
+
+
+def test_a_batch_larger_than_the_server_still_runs_alone():
+    async def scenario():
+        controller = AdmissionController(max_active=2, max_queued=0, queue_timeout=5)
+        slot = await controller.acquire(weight=50)
+        active = controller.stats()["active"]
+        slot.release()
+        return slot.weight, active
+
+    assert run(scenario()) == (2, 2)
@@ -0,0 +1,74 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import batch
+from core.batch import completed_urls, run_batch
+
+
+class FakePipeline:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.verified = []
+
+    async def verify(self, url):
+        self.verified.append(url)
+        if url in self.failing:
+            raise RuntimeError("scrape failed")
+        return {"url": url, "claims": [], "report": "ok"}
+
+
+class InlineExecutor(ThreadPoolExecutor):
+    """Stands in for the process pool; the worker state is set up by the test instead."""
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        super().__init__(max_workers=1)
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    fake = FakePipeline(failing={"https://d.example"})
+    loop = asyncio.new_event_loop()
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", InlineExecutor)
+    monkeypatch.setattr(batch, "_worker_loop", loop)
+    monkeypatch.setattr(batch, "_worker_pipeline", fake)
+    yield fake
+    loop.close()
+
+
+def write_batch(tmp_path):
+    input_path = tmp_path / "batch.jsonl"
+    urls = ["https://a.example", "https://b.example", "https://c.example", "https://d.example", "https://a.example"]
+    input_path.write_text("".join(json.dumps({"url": url}) + "\n" for url in urls))
+    output_path = tmp_path / "results.jsonl"
+    output_path.write_text(
+        json.dumps({"url": "https://a.example", "claims": [], "report": "ok"}) + "\n"
+        + json.dumps({"url": "https://b.example", "error": "Verification failed: timeout", "claims": [], "report": None}) + "\n"
+        # Torn by a crash while c was being written.
+        + '{"url": "https://c.exa'
+    )
+    return str(input_path), str(output_path)
+
+
+@pytest.mark.parametrize("retry_errors, expected", [
+    (False, ["https://c.example", "https://d.example"]),
+    (True, ["https://b.example", "https://c.example", "https://d.example"]),
+])
+def test_run_batch_resumes_after_done_rows_and_a_torn_line(tmp_path, pipeline, retry_errors, expected):
+    input_path, output_path = write_batch(tmp_path)
+
+    summary = run_batch(input_path, output_path, workers=2, retry_errors=retry_errors)
+
+    assert sorted(pipeline.verified) == expected
+    assert summary["total"] == 4
+    assert summary["skipped"] == 4 - len(expected)
+    assert summary["verified"] == len(expected)
+    # d fails in the fake pipeline; b's earlier error is not counted again.
+    assert summary["errors"] == 1
+    # The torn line stays unreadable, but every new result starts on a line of its own.
+    assert completed_urls(output_path) == {"https://a.example", "https://b.example", "https://c.example", "https://d.example"}
+    if retry_errors:
+        # Only d is still an error; b succeeded this time.
+        assert completed_urls(output_path, retry_errors=True) == {"https://a.example", "https://b.example", "https://c.example"}
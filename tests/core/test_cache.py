@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from core.cache import VerificationCache, normalize_url
+
+
+@pytest.mark.parametrize("variant", [
+    "HTTPS://Example.com:443/news/story/",
+    "https://example.com/news/story?utm_source=x&fbclid=abc",
+    "https://example.com/news/story#comments",
+    " https://example.com/news/story ",
+])
+def test_trivially_different_links_normalize_to_the_same_url(variant):
+    assert normalize_url(variant) == "https://example.com/news/story"
+
+
+def test_normalization_keeps_meaningful_query_parameters_in_a_stable_order():
+    assert normalize_url("http://example.com:8080/a?page=2&id=7") == "http://example.com:8080/a?id=7&page=2"
+    assert normalize_url("https://example.com/a?id=7") != normalize_url("https://example.com/a?id=8")
+    # Some sites route articles by `ref`, so it is not treated as tracking.
+    assert normalize_url("https://example.com/a?ref=7") != normalize_url("https://example.com/a?ref=8")
+
+
+def make_cache(**kwargs):
+    return VerificationCache(persist=False, **kwargs)
+
+
+def test_result_is_found_by_normalized_url_and_by_content():
+    cache = make_cache()
+    result = {"url": "https://example.com/a", "claims": [], "report": "ok"}
+    cache.put(result, "v1", url="https://example.com/a/", markdown="Some  article\ntext")
+
+    assert cache.get_by_url("https://EXAMPLE.com/a?utm_medium=social", "v1") == result
+    assert cache.get_by_content("Some article text", "v1") == result
+    assert cache.stats()["url_hits"] == 1 and cache.stats()["content_hits"] == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    cache = make_cache(ttl_seconds=60)
+    cache.put({"url": "u"}, "v1", url="https://example.com/a")
+    now = time.time()
+
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get_by_url("https://example.com/a", "v1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_a_new_corpus_version_invalidates_every_entry():
+    cache = make_cache()
+    cache.put({"url": "a"}, "v1", url="https://example.com/a")
+    cache.put({"url": "b"}, "v1", url="https://example.com/b")
+
+    assert cache.get_by_url("https://example.com/a", "v2") is None
+    assert cache.get_by_url("https://example.com/b", "v1") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_persistent_entries_survive_a_restart_but_not_a_corpus_change(tmp_path):
+    VerificationCache(persist=True, cache_dir=str(tmp_path)).put({"url": "a"}, "v1", url="https://example.com/a")
+
+    assert VerificationCache(persist=True, cache_dir=str(tmp_path)).get_by_url("https://example.com/a", "v1") == {"url": "a"}
+    assert VerificationCache(persist=True, cache_dir=str(tmp_path)).get_by_url("https://example.com/a", "v2") is None
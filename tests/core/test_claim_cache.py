@@ -0,0 +1,69 @@
+import numpy as np
+
+from core.claim_cache import ClaimVerdictCache
+from schemas.messages import Claim, FactCheck, ScoredClaim
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def verdict(claim, score=0.8):
+    fact_check = FactCheck(claim=claim, document_id="doc", snippet="...", match_score=0.9)
+    return ScoredClaim(claim=claim, fact_check=fact_check, truth_score=score, explanation="matched")
+
+
+def score_pending(cache, lookup, version="v1"):
+    cache.store(lookup, [verdict(claim) for claim in lookup.pending], version)
+    return lookup
+
+
+def test_near_duplicates_reuse_a_verdict_and_distinct_claims_do_not():
+    cache = ClaimVerdictCache(threshold=0.9, max_entries=8, enabled=True)
+    original = Claim(claim_text="The bridge was closed in 2020.")
+    score_pending(cache, cache.lookup([original], np.vstack([unit(1, 0, 0)]), "v1"))
+
+    reworded = Claim(claim_text="In 2020 the bridge closed.")
+    different = Claim(claim_text="The mayor resigned.")
+    lookup = cache.lookup([reworded, different], np.vstack([unit(1, 0.1, 0), unit(0.5, 1, 0)]), "v1")
+
+    assert lookup.pending == [different]
+    results = score_pending(cache, lookup).results()
+    # The reused verdict is rebound to the claim it now answers.
+    assert [sc.claim for sc in results] == [reworded, different]
+    assert results[0].fact_check.claim == reworded
+    assert cache.stats()["hits"] == 1
+
+
+def test_near_duplicates_in_one_list_are_collapsed_onto_the_first():
+    cache = ClaimVerdictCache(threshold=0.9, max_entries=8, enabled=True)
+    claims = [Claim(claim_text="A"), Claim(claim_text="A, reworded"), Claim(claim_text="B")]
+    lookup = cache.lookup(claims, np.vstack([unit(1, 0), unit(1, 0.05), unit(0, 1)]), "v1")
+
+    assert lookup.pending == [claims[0], claims[2]]
+    assert [sc.claim for sc in score_pending(cache, lookup).results()] == [claims[0], claims[2]]
+    assert cache.stats()["collapsed"] == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ClaimVerdictCache(threshold=0.99, max_entries=2, enabled=True)
+    vectors = {"a": unit(1, 0, 0), "b": unit(0, 1, 0), "c": unit(0, 0, 1)}
+    for text in ("a", "b"):
+        score_pending(cache, cache.lookup([Claim(claim_text=text)], np.vstack([vectors[text]]), "v1"))
+    # Touch "a" so "b" is the least recently used.
+    cache.lookup([Claim(claim_text="a")], np.vstack([vectors["a"]]), "v1")
+    score_pending(cache, cache.lookup([Claim(claim_text="c")], np.vstack([vectors["c"]]), "v1"))
+
+    assert cache.lookup([Claim(claim_text="b")], np.vstack([vectors["b"]]), "v1").pending
+    assert not cache.lookup([Claim(claim_text="a")], np.vstack([vectors["a"]]), "v1").pending
+    assert cache.stats()["evictions"] == 1
+
+
+def test_a_corpus_change_drops_every_verdict():
+    cache = ClaimVerdictCache(threshold=0.9, max_entries=8, enabled=True)
+    claim = Claim(claim_text="A")
+    score_pending(cache, cache.lookup([claim], np.vstack([unit(1, 0)]), "v1"))
+
+    assert cache.lookup([claim], np.vstack([unit(1, 0)]), "v2").pending == [claim]
+    assert cache.stats()["entries"] == 0
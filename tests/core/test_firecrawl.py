@@ -0,0 +1,45 @@
+import asyncio
+import gc
+
+import httpx
+import pytest
+
+from core.firecrawl import FirecrawlClient, FirecrawlError
+
+
+def make_client(handler, **kwargs):
+    client = FirecrawlClient(base_url="http://firecrawl.test", api_key="test", max_retries=0, **kwargs)
+    client._client = httpx.Client(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_scrape_raises_firecrawl_error_for_a_non_json_body():
+    client = make_client(lambda request: httpx.Response(200, text="<html>gateway</html>"))
+
+    with pytest.raises(FirecrawlError) as excinfo:
+        client.scrape("https://example.com/a")
+
+    assert excinfo.value.status_code == 200
+    assert "gateway" in excinfo.value.details
+
+
+def test_retry_after_is_clamped_to_the_max_backoff():
+    client = FirecrawlClient(base_url="http://firecrawl.test", max_backoff_seconds=30.0)
+    response = httpx.Response(429, headers={"Retry-After": "3600"})
+
+    assert client._backoff(0, response) == 30.0
+    assert client._backoff(0, httpx.Response(429, headers={"Retry-After": "2"})) == 2.0
+    assert client._backoff(10, None) <= 45.0
+
+
+def test_async_state_is_dropped_when_its_event_loop_goes_away():
+    client = FirecrawlClient(base_url="http://firecrawl.test")
+
+    async def touch():
+        client._get_loop_state()
+
+    for _ in range(3):
+        asyncio.run(touch())
+    gc.collect()
+
+    assert len(client._loop_states) == 0
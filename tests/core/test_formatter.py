@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+from core.formatter import FormatterPolicy, LlmFormatter
+from schemas.messages import Claim, FactCheck, ScoredClaim
+
+
+def scored(text, match_score):
+    claim = Claim(claim_text=text)
+    fact_check = FactCheck(claim=claim, document_id="doc", snippet="...", match_score=match_score)
+    return ScoredClaim(claim=claim, fact_check=fact_check, truth_score=0.8, explanation="matched")
+
+
+class FakeLocalFormatter:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, scored_claims):
+        self.calls += 1
+        return f"local report for {len(scored_claims)} claims"
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents):
+        self.calls += 1
+        return SimpleNamespace(text=f"llm report {self.calls}", usage_metadata=None)
+
+
+def make_formatter():
+    local = FakeLocalFormatter()
+    formatter = LlmFormatter(policy=FormatterPolicy(local, min_confidence=0.9, memo_size=8))
+    models = FakeModels()
+    formatter._client = SimpleNamespace(aio=SimpleNamespace(models=models))
+    return formatter, local, models
+
+
+def run(formatter, scored_claims):
+    return asyncio.run(asyncio.wait_for(formatter.format(scored_claims), timeout=5))
+
+
+def test_confident_matches_are_rendered_locally():
+    formatter, local, models = make_formatter()
+
+    report = run(formatter, [scored("a", 0.95), scored("b", 0.9)])
+
+    assert report == "local report for 2 claims"
+    assert (local.calls, models.calls) == (1, 0)
+    stats = formatter.policy.stats()
+    assert stats["local_reports"] == 1
+    assert stats["llm_calls"] == 0
+    assert stats["llm_calls_avoided"] == 1
+
+
+def test_ambiguous_matches_call_the_llm_once_per_distinct_input():
+    formatter, local, models = make_formatter()
+    ambiguous = [scored("a", 0.95), scored("b", 0.6)]
+
+    first = run(formatter, ambiguous)
+    second = run(formatter, [scored("a", 0.95), scored("b", 0.6)])
+    other = run(formatter, [scored("c", 0.5)])
+
+    assert first == second == "llm report 1"
+    assert other == "llm report 2"
+    assert (local.calls, models.calls) == (0, 2)
+    stats = formatter.policy.stats()
+    assert stats["llm_calls"] == 2
+    assert stats["memoized_reports"] == 1
+    assert stats["local_reports"] == 0
+    assert stats["llm_calls_avoided"] == 1
+    assert stats["memo_entries"] == 2
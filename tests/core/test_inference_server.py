@@ -0,0 +1,40 @@
+import socket
+
+import pytest
+
+from core.inference_server import InferenceClient, InferenceServer, InferenceServerError
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.options = []
+
+    def __call__(self, texts, **options):
+        self.options.append(options)
+        return [{"summary_text": text.upper()} for text in texts]
+
+
+def test_server_summarizes_merged_requests_in_batches():
+    summarizer = FakeSummarizer()
+    server = InferenceServer(summarizer, embedder=None, address="tcp://127.0.0.1:0", summarizer_batch_size=4)
+
+    summaries = server._summarize(["a", "b", "c", "d", "e"], {"max_length": 150})
+    server._summarize(["f"], {"max_length": 150})
+
+    assert [summary["summary_text"] for summary in summaries] == ["A", "B", "C", "D", "E"]
+    assert summarizer.options == [{"max_length": 150, "batch_size": 4}, {"max_length": 150, "batch_size": 1}]
+
+
+def test_client_call_times_out_when_the_server_does_not_answer():
+    # A listening socket that never accepts: the connection succeeds, no answer ever comes.
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    host, port = listener.getsockname()
+    try:
+        client = InferenceClient(address=f"tcp://{host}:{port}", connect_timeout=1.0, timeout=0.2)
+        with pytest.raises(InferenceServerError, match="did not answer"):
+            client.info()
+        assert client._local.sock is None
+    finally:
+        listener.close()
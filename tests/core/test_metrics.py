@@ -0,0 +1,22 @@
+from core.metrics import MetricsRegistry
+
+
+def test_render_writes_counters_and_cumulative_histogram_buckets():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests served.", ("route",))
+    latency = registry.histogram("test_latency_seconds", "Request latency.", ("route",), buckets=(0.1, 1.0))
+    requests.inc(route="/verify")
+    requests.inc(2, route="/verify")
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, route="/verify")
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{route="/verify"} 3' in lines
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{route="/verify",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/verify",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/verify",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_sum{route="/verify"} 5.55' in lines
+    assert 'test_latency_seconds_count{route="/verify"} 3' in lines
@@ -0,0 +1,99 @@
+import asyncio
+
+import numpy as np
+
+from core.admission import StageLimits
+from core.cache import VerificationCache
+from core.claim_cache import ClaimVerdictCache
+from core.pipeline import VerificationPipeline
+from schemas.messages import Claim, FactCheck, ScoredClaim
+
+
+class FailingFormatter:
+    async def stream(self, scored_claims):
+        raise RuntimeError("Gemini is unavailable")
+        yield
+
+
+def make_pipeline(run_model_stage, formatter=None):
+    pipeline = VerificationPipeline(
+        executor_kind="thread",
+        model_workers=1,
+        formatter=formatter or FailingFormatter(),
+        cache=VerificationCache(persist=False),
+        claim_cache=ClaimVerdictCache(enabled=False),
+        stage_limits=StageLimits(),
+    )
+    pipeline.corpus_version = lambda: "v1"
+
+    async def scrape(url):
+        return {"url": url, "content": "Some article text."}
+
+    pipeline.scrape = scrape
+    pipeline._run_model_stage = run_model_stage
+    return pipeline
+
+
+def collect(pipeline, url):
+    async def run():
+        return [event async for event in pipeline.stream(url)]
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_stream_reports_a_failing_stage_as_an_error_event():
+    async def run_model_stage(agent_name, payload, method="run"):
+        raise RuntimeError("summarizer crashed")
+
+    events = collect(make_pipeline(run_model_stage), "https://example.com/a")
+
+    assert [event["event"] for event in events] == ["scraped", "error"]
+    assert events[-1]["data"]["url"] == "https://example.com/a"
+    assert "summarizer crashed" in events[-1]["data"]["error"]
+
+
+def test_stream_reports_a_failing_formatter_as_an_error_event():
+    async def run_model_stage(agent_name, payload, method="run"):
+        return []
+
+    events = collect(make_pipeline(run_model_stage), "https://example.com/a")
+
+    assert [event["event"] for event in events] == ["scraped", "error"]
+    assert "Gemini is unavailable" in events[-1]["data"]["error"]
+
+
+class CountingFormatter:
+    async def format(self, scored_claims):
+        return f"{len(scored_claims)} claims"
+
+
+def test_verify_many_matches_a_claim_shared_by_two_articles_once():
+    shared = "The bridge was closed in 2020."
+    claims_by_url = {
+        "https://example.com/a": [shared, "Tolls doubled in 2021."],
+        "https://example.com/b": ["The mayor resigned.", shared],
+    }
+    matched = []
+
+    async def run_model_stage(agent_name, payload, method="run"):
+        if method == "run_many":
+            return [[Claim(claim_text=text) for text in claims_by_url[item["url"]]] for item in payload]
+        if method == "embed_claims":
+            return np.eye(len(payload), dtype=np.float32)
+        assert (agent_name, method) == ("fact_check_matcher", "run")
+        matched.extend(claim.claim_text for claim in payload)
+        return [FactCheck(claim=claim, document_id=f"doc:{claim.claim_text}", snippet="...", match_score=0.95) for claim in payload]
+
+    async def score(fact_checks):
+        return [ScoredClaim(claim=fc.claim, fact_check=fc, truth_score=0.8, explanation="matched") for fc in fact_checks]
+
+    pipeline = make_pipeline(run_model_stage, CountingFormatter())
+    pipeline.score = score
+    results = asyncio.run(asyncio.wait_for(pipeline.verify_many(list(claims_by_url)), timeout=5))
+
+    assert matched.count(shared) == 1
+    assert len(matched) == 3
+    for result, (url, texts) in zip(results, claims_by_url.items()):
+        assert result["url"] == url
+        assert [claim["claim"]["claim_text"] for claim in result["claims"]] == texts
+        assert [claim["fact_check"]["document_id"] for claim in result["claims"]] == [f"doc:{text}" for text in texts]
+        assert result["report"] == "2 claims"
@@ -0,0 +1,49 @@
+import threading
+
+from core.startup import WarmUp
+
+
+class FakeRegistry:
+    def __init__(self, names):
+        self._names = names
+        self.loaded = []
+
+    def get(self, name):
+        self.loaded.append(name)
+        return object()
+
+    def stats(self):
+        return {name: {} for name in self._names}
+
+
+def test_warm_up_skips_worker_entries_and_waits_for_the_workers():
+    registry = FakeRegistry(["summarizer", "embedding_model", "vector_store", "claim_extractor", "truth_scorer"])
+    release = threading.Event()
+
+    def start_workers():
+        release.wait(timeout=5)
+        return 2
+
+    warm_up = WarmUp(registry, skip=("summarizer", "embedding_model", "claim_extractor"), start_workers=start_workers)
+    thread = warm_up.start()
+    while "truth_scorer" not in registry.loaded:
+        thread.join(timeout=0.01)
+
+    assert not warm_up.ready
+    release.set()
+    thread.join(timeout=5)
+
+    assert warm_up.ready
+    assert registry.loaded == ["vector_store", "truth_scorer"]
+    assert warm_up.report()["workers_s"] > 0
+
+
+def test_warm_up_is_not_ready_when_the_workers_fail():
+    def start_workers():
+        raise RuntimeError("worker initializer failed")
+
+    warm_up = WarmUp(FakeRegistry(["vector_store"]), start_workers=start_workers)
+    warm_up.start().join(timeout=5)
+
+    assert not warm_up.ready
+    assert warm_up.report()["status"] == "failed"
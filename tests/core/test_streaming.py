@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from core.streaming import micro_batches
+
+
+async def produce(items, delay=0.0, error=None):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+    if error is not None:
+        raise error
+
+
+def collect(items, max_size, max_wait):
+    async def run():
+        return [batch async for batch in micro_batches(items, max_size, max_wait)]
+    return asyncio.run(asyncio.wait_for(run(), timeout=5))
+
+
+def test_batches_are_capped_at_max_size_and_keep_order():
+    assert collect(produce(range(7)), max_size=3, max_wait=1.0) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_a_partial_batch_is_flushed_after_max_wait():
+    # Items arrive every 50ms; a 10ms wait flushes each before the next arrives.
+    assert collect(produce(range(3), delay=0.05), max_size=8, max_wait=0.01) == [[0], [1], [2]]
+
+
+def test_items_before_a_source_error_are_delivered_first():
+    batches = []
+
+    async def run():
+        async for batch in micro_batches(produce(range(2), error=RuntimeError("boom")), 8, 0.5):
+            batches.append(batch)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert batches == [[0, 1]]
+
+
+def test_an_empty_source_yields_no_batches():
+    assert collect(produce([]), max_size=4, max_wait=0.01) == []